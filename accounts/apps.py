@@ -3,4 +3,8 @@ from django.apps import AppConfig
 class AccountsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'accounts'
-    verbose_name = 'إدارة المستخدمين'
\ No newline at end of file
+    verbose_name = 'إدارة المستخدمين'
+    def ready(self):
+        from . import checks  # noqa: F401 تسجيل فحوصات النظام
+        from .signals import connect_signals
+        connect_signals()
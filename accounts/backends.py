@@ -0,0 +1,31 @@
+"""
+مصادقة مع تخزين مؤقت للمستخدم حتى لا تقرأ كل صفحة جدول المستخدمين
+"""
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+
+def user_cache_key(user_id):
+    return f'accounts:user:{user_id}'
+
+
+def invalidate_cached_user(user_id):
+    cache.delete(user_cache_key(user_id))
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    مثل ModelBackend لكن get_user يقرأ المستخدم من التخزين المؤقت أولاً
+    يتم حذف النسخة المخزنة عند حفظ المستخدم أو حذفه (انظر accounts.signals)
+    """
+
+    def get_user(self, user_id):
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is None:
+                return None
+            cache.set(key, user, getattr(settings, 'USER_CACHE_TIMEOUT', 300))
+        return user if self.user_can_authenticate(user) else None
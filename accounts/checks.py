@@ -0,0 +1,39 @@
+"""
+فحوصات النظام (manage.py check --deploy) لإعدادات التخزين المؤقت مع عدة عمليات
+"""
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+from employee_management.workers import gunicorn_workers
+
+LOCMEM_BACKEND = 'django.core.cache.backends.locmem.LocMemCache'
+
+
+@register(Tags.caches, deploy=True)
+def check_locmem_with_workers(app_configs, **kwargs):
+    """
+    LocMem نسخة مستقلة في كل عملية: تسجيل الخروج أو تعطيل مستخدم في عملية
+    لا يحذف الجلسة أو المستخدم المخزن في بقية العمليات
+    """
+    if settings.CACHES['default']['BACKEND'] != LOCMEM_BACKEND:
+        return []
+    workers = gunicorn_workers()
+    if workers <= 1:
+        return []
+
+    cached = []
+    if settings.SESSION_ENGINE == 'django.contrib.sessions.backends.cached_db':
+        cached.append('الجلسات')
+    if 'accounts.backends.CachedModelBackend' in settings.AUTHENTICATION_BACKENDS:
+        cached.append('المستخدمون')
+    detail = f' ({"، ".join(cached)} مخزنة مؤقتاً في كل عملية على حدة)' if cached else ''
+    return [
+        Warning(
+            f'التخزين المؤقت LocMemCache غير مشترك بين {workers} عمليات Gunicorn{detail}',
+            hint=(
+                'استخدم خادماً مشتركاً عبر CACHE_BACKEND و CACHE_LOCATION '
+                '(مثل django.core.cache.backends.redis.RedisCache) أو GUNICORN_WORKERS=1'
+            ),
+            id='accounts.W001',
+        )
+    ]
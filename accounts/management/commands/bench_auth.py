@@ -0,0 +1,101 @@
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from employees.profiling import QueryCounter
+
+
+# إعدادات الجلسات والمصادقة التي تتم مقارنتها
+AUTH_CONFIGS = {
+    'db': {
+        'SESSION_ENGINE': 'django.contrib.sessions.backends.db',
+        'AUTHENTICATION_BACKENDS': ['django.contrib.auth.backends.ModelBackend'],
+    },
+    'cached_db': {
+        'SESSION_ENGINE': 'django.contrib.sessions.backends.cached_db',
+        'AUTHENTICATION_BACKENDS': ['accounts.backends.CachedModelBackend'],
+    },
+    'signed_cookies': {
+        'SESSION_ENGINE': 'django.contrib.sessions.backends.signed_cookies',
+        'AUTHENTICATION_BACKENDS': ['accounts.backends.CachedModelBackend'],
+    },
+}
+
+
+class Command(BaseCommand):
+    help = 'قياس التكلفة الثابتة لكل طلب (الجلسة والمستخدم) على صفحة الملف الشخصي بإعدادات مختلفة'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests', type=int, default=500,
+            help='عدد الطلبات لكل إعداد (افتراضي: 500)'
+        )
+        parser.add_argument(
+            '--configs', nargs='+', choices=list(AUTH_CONFIGS), default=list(AUTH_CONFIGS),
+            help='الإعدادات المراد قياسها'
+        )
+
+    def handle(self, *args, **options):
+        setup_test_environment(debug=False)
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            user = get_user_model().objects.create_user(username='bench', password='bench')
+            results = [
+                self.measure(name, user, options['requests'])
+                for name in options['configs']
+            ]
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        self.print_table(results)
+
+    def measure(self, name, user, count):
+        """قياس متوسط زمن الطلب وعدد الاستعلامات لإعداد واحد"""
+        url = reverse('accounts:profile')
+        cache.clear()
+
+        with override_settings(**AUTH_CONFIGS[name]):
+            client = Client()
+            client.force_login(user)
+            # طلب تمهيدي لملء التخزين المؤقت
+            client.get(url)
+
+            timings = []
+            counter = QueryCounter()
+            with connection.execute_wrapper(counter):
+                for _ in range(count):
+                    start = time.perf_counter()
+                    response = client.get(url)
+                    timings.append(time.perf_counter() - start)
+
+        self.stdout.write(f'  {name}: {statistics.mean(timings) * 1000:.2f} ms')
+        return {
+            'config': name,
+            'status': response.status_code,
+            'mean_ms': round(statistics.mean(timings) * 1000, 2),
+            'p95_ms': round(statistics.quantiles(timings, n=20)[-1] * 1000, 2),
+            'queries_per_request': round(counter.count / count, 2),
+        }
+
+    def print_table(self, results):
+        columns = [
+            ('config', 'Config', 16),
+            ('status', 'Status', 7),
+            ('mean_ms', 'Mean ms', 10),
+            ('p95_ms', 'P95 ms', 10),
+            ('queries_per_request', 'Queries/req', 12),
+        ]
+        header = ' '.join(title.ljust(width) for _, title, width in columns)
+        self.stdout.write('')
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for row in results:
+            self.stdout.write(' '.join(str(row[key]).ljust(width) for key, _, width in columns))
@@ -0,0 +1,16 @@
+"""
+حذف نسخة المستخدم المخزنة مؤقتاً عند تعديله
+"""
+from django.db.models.signals import post_delete, post_save
+
+from .backends import invalidate_cached_user
+from .models import User
+
+
+def clear_cached_user(sender, instance, **kwargs):
+    invalidate_cached_user(instance.pk)
+
+
+def connect_signals():
+    post_save.connect(clear_cached_user, sender=User, dispatch_uid='accounts_user_cache_save')
+    post_delete.connect(clear_cached_user, sender=User, dispatch_uid='accounts_user_cache_delete')
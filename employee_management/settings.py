@@ -37,6 +37,8 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'employees.profiling.ProfilingMiddleware',
+    'employees.db_routing.ReplicaPinningMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -94,6 +96,65 @@ DATABASES = {
 #         'PORT': url.port,
 #     }
 
+# نسخة للقراءة فقط لصفحات التقارير والتصدير ولوحة التحكم (انظر employees.db_routing)
+# محلياً بملف SQLite ثان: REPLICA_DB_NAME=db_replica.sqlite3 ثم python manage.py sync_sqlite_replica
+# أو نسخة PostgreSQL احتياطية: REPLICA_DB_ENGINE=django.db.backends.postgresql REPLICA_DB_NAME=... REPLICA_DB_HOST=...
+if os.environ.get('REPLICA_DB_NAME'):
+    DATABASES['replica'] = {
+        'ENGINE': os.environ.get('REPLICA_DB_ENGINE', 'django.db.backends.sqlite3'),
+        'NAME': os.environ['REPLICA_DB_NAME'],
+        'USER': os.environ.get('REPLICA_DB_USER', ''),
+        'PASSWORD': os.environ.get('REPLICA_DB_PASSWORD', ''),
+        'HOST': os.environ.get('REPLICA_DB_HOST', ''),
+        'PORT': os.environ.get('REPLICA_DB_PORT', ''),
+        # الاختبارات تستخدم قاعدة default نفسها بدلاً من إنشاء نسخة
+        'TEST': {'MIRROR': 'default'},
+    }
+    if DATABASES['replica']['ENGINE'].endswith('sqlite3'):
+        DATABASES['replica']['NAME'] = BASE_DIR / DATABASES['replica']['NAME']
+
+DATABASE_ROUTERS = ['employees.db_routing.ReplicaRouter']
+REPORT_DATABASE_ALIAS = 'replica' if 'replica' in DATABASES else None
+# مدة قراءة المستخدم من default بعد أي طلب كتابة (بالثواني) حتى يرى تعديلاته
+REPLICA_PIN_SECONDS = int(os.environ.get('REPLICA_PIN_SECONDS', 5))
+
+# التخزين المؤقت: ذاكرة العملية افتراضياً، ويمكن استخدام خادم مشترك بين العمليات
+# مثل Redis عبر CACHE_BACKEND=django.core.cache.backends.redis.RedisCache و CACHE_LOCATION
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'employee-management'),
+    }
+}
+
+# ذاكرة العملية (LocMem) غير مشتركة بين عمليات Gunicorn، فحذف جلسة أو مستخدم مخزن
+# في عملية لا يصل إلى بقية العمليات. لذلك لا تخزن الجلسات والمستخدمون مؤقتاً إلا مع
+# خادم مشترك مثل Redis أو Memcached (انظر accounts.checks)
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+SHARED_CACHE = CACHES['default']['BACKEND'] not in PROCESS_LOCAL_CACHES
+
+# الجلسات: cached_db تقرأ من التخزين المؤقت وتحفظ في قاعدة البيانات
+# ويمكن استخدام django.contrib.sessions.backends.signed_cookies للاستغناء عن جدول الجلسات
+SESSION_ENGINE = os.environ.get(
+    'SESSION_ENGINE',
+    'django.contrib.sessions.backends.cached_db' if SHARED_CACHE else 'django.contrib.sessions.backends.db',
+)
+
+# المصادقة مع تخزين المستخدم مؤقتاً (بالثواني) عند توفر تخزين مشترك
+AUTHENTICATION_BACKENDS = [
+    'accounts.backends.CachedModelBackend' if SHARED_CACHE else 'django.contrib.auth.backends.ModelBackend'
+]
+USER_CACHE_TIMEOUT = int(os.environ.get('USER_CACHE_TIMEOUT', 300))
+
+# تحليل أداء الطلب للمستخدمين الإداريين (?_profile=flame أو ?_profile=cprofile أو ترويسة X-Profile)
+# انظر employees.profiling، مفعل افتراضياً مع DEBUG فقط و PROFILING_ENABLED=False يزيل الوسيط تماماً
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', str(DEBUG)) == 'True'
+PROFILING_DIR = os.environ.get('PROFILING_DIR', BASE_DIR / 'profiles')
+PROFILING_SAMPLE_INTERVAL = float(os.environ.get('PROFILING_SAMPLE_INTERVAL', 0.002))
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -0,0 +1,12 @@
+"""
+عدد عمليات Gunicorn، مشترك بين gunicorn.conf.py وفحوصات accounts.checks
+لا يستورد Django حتى يحمل في ملف إعدادات Gunicorn قبل تحميل التطبيق
+"""
+import multiprocessing
+import os
+
+
+def gunicorn_workers():
+    """GUNICORN_WORKERS أو (2 × عدد الأنوية) + 1"""
+    value = os.environ.get('GUNICORN_WORKERS')
+    return int(value) if value else multiprocessing.cpu_count() * 2 + 1
@@ -1,5 +1,11 @@
-from django.contrib import admin
-from .models import Employee, AllowanceType, Allowance
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
+from django.core.exceptions import ValidationError
+from .bulk_operations import apply_deactivate, apply_salary_raise, update_employees
+from .models import Employee, AllowanceType, Allowance, ArchivedAllowance, ArchivedEmployee, EmployeeImport
+from .paginators import EstimatedCountPaginator
+from .templatetags.currency_filters import currency
 
 from django.contrib import admin
 from employees.models import EmployeeCategory
@@ -20,14 +26,32 @@ class EmployeeCategoryAdmin(admin.ModelAdmin):
     pass
 
 
+class EmployeeActionForm(ActionForm):
+    percentage = forms.DecimalField(
+        required=False, min_value=0.01, max_value=100, decimal_places=2,
+        label='نسبة الزيادة %', help_text='تستخدم مع إجراء زيادة الراتب الأساسي',
+    )
+
+
 @admin.register(Employee)
 class EmployeeAdmin(admin.ModelAdmin):
-    list_display = ['employee_number', 'name', 'nationality', 'category', 'basic_salary', 'hire_date', 'is_active']
+    list_display = [
+        'employee_number', 'name', 'nationality', 'category', 'basic_salary',
+        'monthly_gross_display', 'annual_cost_display', 'hire_date', 'is_active',
+    ]
     list_filter = ['category', 'nationality', 'insurance_type', 'is_active']
+    list_select_related = ['category']
     search_fields = ['employee_number', 'name', 'id_number']
     readonly_fields = ['created_at', 'updated_at']
     inlines = [AllowanceInline]
-    
+
+    # ترقيم بدون COUNT(*) كامل مع كل طلب، وبدون عدد إجمالي ثانٍ عند الفلترة
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    action_form = EmployeeActionForm
+    actions = ['activate_employees', 'deactivate_employees', 'raise_basic_salary']
+
     fieldsets = (
         ('البيانات الأساسية', {
             'fields': ('employee_number', 'name', 'nationality', 'hire_date', 'id_number', 'category', 'photo')
@@ -44,6 +68,40 @@ class EmployeeAdmin(admin.ModelAdmin):
         }),
     )
 
+    def get_queryset(self, request):
+        # أعمدة التكلفة من قاعدة البيانات بدلاً من استدعاء دوال النموذج لكل صف
+        return super().get_queryset(request).with_cost_columns()
+
+    @admin.display(description='إجمالي الراتب الشهري', ordering='monthly_gross')
+    def monthly_gross_display(self, obj):
+        return currency(obj.monthly_gross)
+
+    @admin.display(description='التكلفة السنوية', ordering='annual_cost')
+    def annual_cost_display(self, obj):
+        return currency(obj.annual_cost)
+
+    @admin.action(description='تفعيل الموظفين المحددين', permissions=['change'])
+    def activate_employees(self, request, queryset):
+        updated = update_employees(queryset.filter(is_active=False), is_active=True)
+        self.message_user(request, f'تم تفعيل {updated} موظف', messages.SUCCESS)
+
+    @admin.action(description='إلغاء تفعيل الموظفين المحددين', permissions=['change'])
+    def deactivate_employees(self, request, queryset):
+        updated = apply_deactivate(queryset)
+        self.message_user(request, f'تم إلغاء تفعيل {updated} موظف', messages.SUCCESS)
+
+    @admin.action(description='زيادة الراتب الأساسي بنسبة مئوية', permissions=['change'])
+    def raise_basic_salary(self, request, queryset):
+        try:
+            percentage = self.action_form.base_fields['percentage'].clean(request.POST.get('percentage'))
+        except ValidationError:
+            percentage = None
+        if percentage is None:
+            self.message_user(request, 'يرجى إدخال نسبة زيادة صحيحة بين 0.01 و 100', messages.ERROR)
+            return
+        updated = apply_salary_raise(queryset, 'percent', percentage)
+        self.message_user(request, f'تمت زيادة الراتب الأساسي {percentage}% لـ {updated} موظف', messages.SUCCESS)
+
 
 @admin.register(AllowanceType)
 class AllowanceTypeAdmin(admin.ModelAdmin):
@@ -52,6 +110,46 @@ class AllowanceTypeAdmin(admin.ModelAdmin):
     search_fields = ['name', 'name_arabic']
 
 
+class ArchivedAllowanceInline(admin.TabularInline):
+    model = ArchivedAllowance
+    extra = 0
+    can_delete = False
+    fields = ['allowance_type', 'amount', 'type', 'notes', 'is_active']
+    readonly_fields = fields
+
+
+@admin.register(ArchivedEmployee)
+class ArchivedEmployeeAdmin(admin.ModelAdmin):
+    """عرض الموظفين المؤرشفين للقراءة فقط (انظر أمر archive_inactive_employees)"""
+    list_display = ['employee_number', 'name', 'nationality', 'category', 'basic_salary', 'deactivated_at', 'archived_at']
+    list_filter = ['category', 'nationality']
+    list_select_related = ['category']
+    search_fields = ['employee_number', 'name', 'id_number']
+    inlines = [ArchivedAllowanceInline]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(EmployeeImport)
+class EmployeeImportAdmin(admin.ModelAdmin):
+    """سجل عمليات الاستيراد للقراءة فقط"""
+    list_display = [
+        'file_name', 'imported_at', 'created_count', 'updated_count', 'unchanged_count',
+        'allowances_count', 'error_count',
+    ]
+    readonly_fields = [field.name for field in EmployeeImport._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
 # @admin.register(Allowance)
 # class AllowanceAdmin(admin.ModelAdmin):
 #     list_display = ['employee', 'allowance_type', 'amount', 'type', 'is_active']
@@ -4,4 +4,7 @@ from django.apps import AppConfig
 class EmployeesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'employees'
-    verbose_name = 'إدارة الموظفين'
\ No newline at end of file
+    verbose_name = 'إدارة الموظفين'
+    def ready(self):
+        from .signals import connect_signals
+        connect_signals()
@@ -0,0 +1,101 @@
+"""
+أرشفة الموظفين غير النشطين منذ مدة طويلة
+
+ينقل الموظف وبدلاته إلى جداول الأرشيف (ArchivedEmployee, ArchivedAllowance) ويحفظ سجل
+الراتب والبدلات في حقول JSON، ثم يحذف من جداول العمل فتبقى بحجم القوى العاملة الحالية.
+التقارير في تاريخ سابق (cost_rows_as_of) لا تشمل المؤرشفين، لذلك تحسب ملخصات الأشهر
+غير المحسوبة قبل الأرشفة حتى تبقى اتجاهات التكلفة الشهرية كاملة
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Prefetch
+from django.utils import timezone
+
+from .models import Allowance, ArchivedAllowance, ArchivedEmployee, Employee
+
+ARCHIVED_FIELDS = [
+    'employee_number', 'name', 'nationality', 'hire_date', 'id_number', 'category_id', 'basic_salary',
+    'insurance_type', 'num_wives', 'num_children', 'recruitment_cost', 'training_cost',
+    'ticket_type', 'family_ticket_cost', 'created_at',
+]
+
+
+def archive_candidates(days=365):
+    """الموظفون غير النشطين الذين لم يعدلوا منذ عدد الأيام المحدد"""
+    cutoff = timezone.now() - timedelta(days=days)
+    return Employee.objects.filter(is_active=False, updated_at__lt=cutoff)
+
+
+def _json_value(value):
+    return str(value) if isinstance(value, Decimal) else value
+
+
+def _history(rows, *fields):
+    return [
+        {
+            **{field: _json_value(getattr(row, field)) for field in fields},
+            'effective_from': row.effective_from.isoformat(),
+            'effective_to': row.effective_to.isoformat() if row.effective_to else None,
+        }
+        for row in rows
+    ]
+
+
+def _archived_employee(employee, stamp):
+    return ArchivedEmployee(
+        original_id=employee.pk,
+        photo=employee.photo.name if employee.photo else '',
+        deactivated_at=employee.updated_at,
+        salary_history=_history(employee.salary_history.all(), 'basic_salary'),
+        allowance_history=_history(employee.allowance_history.all(), 'allowance_type_id', 'amount'),
+        archived_at=stamp,
+        **{field: getattr(employee, field) for field in ARCHIVED_FIELDS},
+    )
+
+
+def archive_batch(employees):
+    """أرشفة دفعة من الموظفين في معاملة واحدة وإرجاع عددهم"""
+    employees = list(employees.prefetch_related(
+        Prefetch('allowances', queryset=Allowance.objects.order_by()),
+        'salary_history',
+        'allowance_history',
+    ))
+    if not employees:
+        return 0
+
+    stamp = timezone.now()
+    with transaction.atomic():
+        ArchivedEmployee.objects.bulk_create([_archived_employee(employee, stamp) for employee in employees])
+        archived_ids = dict(
+            ArchivedEmployee.objects.filter(archived_at=stamp).values_list('original_id', 'pk')
+        )
+        ArchivedAllowance.objects.bulk_create([
+            ArchivedAllowance(
+                employee_id=archived_ids[employee.pk],
+                allowance_type_id=allowance.allowance_type_id,
+                amount=allowance.amount,
+                type=allowance.type,
+                notes=allowance.notes,
+                is_active=allowance.is_active,
+                created_at=allowance.created_at,
+            )
+            for employee in employees
+            for allowance in employee.allowances.all()
+        ])
+        # الحذف يشمل البدلات وسجل الرواتب والبدلات (CASCADE)
+        Employee.objects.filter(pk__in=[employee.pk for employee in employees]).delete()
+    return len(employees)
+
+
+def archive_employees(employees, batch_size=500, progress=None):
+    """أرشفة جميع الموظفين في الاستعلام على دفعات"""
+    total = 0
+    while True:
+        archived = archive_batch(employees.order_by('pk')[:batch_size])
+        if not archived:
+            return total
+        total += archived
+        if progress:
+            progress(total)
@@ -0,0 +1,50 @@
+"""
+تنفيذ استعلامات مستقلة بالتوازي داخل العروض غير المتزامنة
+
+استدعاءات ORM غير المتزامنة في Django تنفذ كلها على خيط واحد بالتتابع،
+لذا تنفذ كل دالة هنا في خيط من مجموعة خيوط دائمة لكل منها اتصال قاعدة بيانات خاص به.
+اتصالات هذه الخيوط تبقى مفتوحة بين الطلبات (بحد أقصى GATHER_THREADS اتصالاً لكل عملية)
+فلا يفتح اتصال جديد لكل استعلام، ولا يغلق الاتصال إلا إذا تعطل
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.db import connection, connections
+
+# أقصى عدد من الاستعلامات المتوازية في العملية (ولوحة التحكم تنفذ أربعة)
+GATHER_THREADS = 4
+
+_executor = ThreadPoolExecutor(max_workers=GATHER_THREADS, thread_name_prefix='gather-queries')
+
+
+def _with_reused_connection(func):
+    def run():
+        # مثل close_if_unusable_or_obsolete دون CONN_MAX_AGE: بعد خطأ يعاد فتح الاتصال المعطل فقط
+        for conn in connections.all(initialized_only=True):
+            if conn.errors_occurred:
+                if conn.is_usable():
+                    conn.errors_occurred = False
+                else:
+                    conn.close()
+        return func()
+    return run
+
+
+async def gather_queries(**queries):
+    """
+    تنفيذ دوال الاستعلام المتزامنة (بدون معاملات) بالتوازي وإرجاع النتائج بنفس المفاتيح
+
+    داخل معاملة مفتوحة (مثل ATOMIC_REQUESTS أو الاختبارات) تنفذ الدوال بالتتابع
+    على نفس الاتصال لأن الاتصالات الأخرى لا ترى البيانات غير المحفوظة
+    """
+    # اتصالات قاعدة البيانات خاصة بكل خيط، فتفحص المعاملة على خيط الطلب المتزامن لا على خيط الحلقة
+    in_atomic_block = await sync_to_async(lambda: connection.in_atomic_block)()
+    if in_atomic_block:
+        results = [await sync_to_async(func)() for func in queries.values()]
+    else:
+        results = await asyncio.gather(*(
+            sync_to_async(_with_reused_connection(func), thread_sensitive=False, executor=_executor)()
+            for func in queries.values()
+        ))
+    return dict(zip(queries, results))
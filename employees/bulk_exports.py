@@ -0,0 +1,115 @@
+"""
+تصدير تقارير الموظفين الفردية دفعة واحدة في أرشيف ZIP
+"""
+import logging
+import os
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import Prefetch
+
+from .excel_reports import (
+    build_individual_report_workbook,
+    individual_report_filename,
+    individual_report_payload,
+)
+from .models import Allowance
+from .streaming import ChunkBuffer
+
+logger = logging.getLogger(__name__)
+
+# عدد الموظفين الذين تجلب بياناتهم في كل استعلام
+FETCH_CHUNK_SIZE = 500
+
+
+def default_workers():
+    """عدد العمليات الافتراضي لبناء الملفات"""
+    return getattr(settings, 'BULK_EXPORT_WORKERS', None) or os.cpu_count() or 1
+
+
+def iter_individual_report_payloads(employees, chunk_size=FETCH_CHUNK_SIZE):
+    """
+    جلب بيانات التقارير على دفعات: استعلام للموظفين مع الفئة واستعلام للبدلات لكل دفعة
+    """
+    employees = employees.select_related('category').prefetch_related(
+        Prefetch('allowances', queryset=Allowance.objects.select_related('allowance_type'))
+    ).order_by('employee_number')
+
+    for employee in employees.iterator(chunk_size=chunk_size):
+        yield individual_report_payload(employee)
+
+
+def _bounded_map(executor, fn, iterable, window):
+    """
+    مثل executor.map مع الحفاظ على الترتيب، لكن بعدد محدود من المهام المعلقة
+    حتى لا يتم تحميل جميع الموظفين في الذاكرة مرة واحدة
+    """
+    pending = deque()
+    for item in iterable:
+        pending.append((item, executor.submit(fn, item)))
+        if len(pending) >= window:
+            item, future = pending.popleft()
+            yield item, future.result()
+    while pending:
+        item, future = pending.popleft()
+        yield item, future.result()
+
+
+def iter_individual_workbooks(employees, workers=None):
+    """إنتاج (بيانات الموظف، محتوى الملف) مع توزيع بناء الملفات على عدة عمليات"""
+    payloads = iter_individual_report_payloads(employees)
+    workers = workers or default_workers()
+
+    if workers <= 1:
+        for payload in payloads:
+            yield payload, build_individual_report_workbook(payload)
+        return
+
+    executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        yield from _bounded_map(executor, build_individual_report_workbook, payloads, workers * 4)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _iter_zip_entries(employees, fileobj, workers):
+    """كتابة ملفات التقارير في الأرشيف واحداً تلو الآخر مع إرجاع عدد الملفات بعد كل ملف"""
+    timestamp = datetime.now().timetuple()[:6]
+    count = 0
+
+    # ملفات xlsx مضغوطة مسبقاً لذا يتم تخزينها دون إعادة ضغط
+    with zipfile.ZipFile(fileobj, 'w', compression=zipfile.ZIP_STORED) as archive:
+        for payload, content in iter_individual_workbooks(employees, workers):
+            info = zipfile.ZipInfo(individual_report_filename(payload), date_time=timestamp)
+            archive.writestr(info, content)
+            count += 1
+            yield count
+
+
+def write_individual_reports_zip(employees, fileobj, workers=None, progress=None):
+    """
+    كتابة تقارير الموظفين في أرشيف ZIP داخل fileobj مع إضافة كل ملف فور جاهزيته
+    progress: دالة اختيارية تستدعى بعدد الملفات المكتوبة حتى الآن
+    """
+    count = 0
+    for count in _iter_zip_entries(employees, fileobj, workers):
+        if progress:
+            progress(count)
+    return count
+
+
+def stream_individual_reports_zip(employees, workers=None, log_every=100):
+    """مولد يرسل أجزاء أرشيف ZIP تدريجياً للاستخدام مع StreamingHttpResponse"""
+    buffer = ChunkBuffer()
+    count = 0
+    for count in _iter_zip_entries(employees, buffer, workers):
+        if count % log_every == 0:
+            logger.info('تصدير التقارير الفردية: تم تجهيز %s ملف', count)
+        yield buffer.drain()
+
+    # السجل المركزي للأرشيف يكتب عند إغلاقه بعد آخر ملف
+    logger.info('تصدير التقارير الفردية: اكتمل بعدد %s ملف', count)
+    yield buffer.drain()
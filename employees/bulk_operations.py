@@ -0,0 +1,169 @@
+"""
+عمليات جماعية على الرواتب والبدلات لمجموعة موظفين (حسب الفئة أو الجنسية)
+
+كل عملية تنفذ بأمر UPDATE واحد أو bulk_create واحد داخل معاملة واحدة،
+ثم يحدث سجل الرواتب والبدلات ورقم إصدار البيانات لأن هذه الأوامر لا تطلق إشارات الحفظ.
+لكل عملية دالة معاينة تعيد عدد الموظفين المتأثرين والفرق في التكلفة قبل التنفيذ
+"""
+from dataclasses import dataclass
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, FloatField, Sum
+from django.db.models.functions import Cast, Round
+from django.utils import timezone
+
+from .cost_math import annual_factor, monthly_factor
+from .history import sync_allowance_history_bulk, sync_salary_history_bulk
+from .models import Allowance, DataVersion, Employee, _real
+
+OPERATION_CHOICES = [
+    ('raise_percent', 'زيادة الراتب الأساسي بنسبة مئوية'),
+    ('raise_fixed', 'زيادة الراتب الأساسي بمبلغ ثابت'),
+    ('allowance', 'إضافة أو تعديل بدل'),
+    ('deactivate', 'إلغاء تفعيل الموظفين'),
+]
+
+
+@dataclass(frozen=True, slots=True)
+class BulkPreview:
+    """نتيجة معاينة عملية جماعية"""
+    affected: int
+    monthly_delta: float
+    annual_delta: float
+
+
+def select_employees(category=None, nationality=None):
+    """الموظفون النشطون الذين تشملهم العملية"""
+    employees = Employee.active.all()
+    if category:
+        employees = employees.filter(category=category)
+    if nationality:
+        employees = employees.filter(nationality=nationality)
+    return employees
+
+
+def update_employees(queryset, **values):
+    """
+    تعديل الموظفين بأمر UPDATE واحد ثم تحديث سجل الرواتب وإصدار البيانات في نفس المعاملة
+    الصفوف المعدلة تعرف بقيمة updated_at المشتركة حتى لو تغيرت نتيجة فلتر queryset بعد التعديل
+    """
+    stamp = timezone.now()
+    with transaction.atomic():
+        updated = queryset.update(updated_at=stamp, **values)
+        if updated:
+            sync_salary_history_bulk(Employee.objects.filter(updated_at=stamp))
+            DataVersion.bump()
+    return updated
+
+
+def _new_salary_expression(mode, value):
+    if mode == 'percent':
+        return Round(F('basic_salary') * (1 + Decimal(value) / 100), 2)
+    return F('basic_salary') + Decimal(value)
+
+
+def preview_salary_raise(employees, mode, value):
+    totals = employees.aggregate(
+        affected=Count('pk'),
+        delta=Sum(Cast(_new_salary_expression(mode, value), output_field=FloatField()) - _real('basic_salary')),
+    )
+    delta = totals['delta'] or 0.0
+    return BulkPreview(totals['affected'], round(delta, 2), round(delta * 12, 2))
+
+
+def apply_salary_raise(employees, mode, value):
+    """زيادة الراتب الأساسي بنسبة مئوية (mode='percent') أو بمبلغ ثابت (mode='fixed')"""
+    return update_employees(employees, basic_salary=_new_salary_expression(mode, value))
+
+
+def preview_allowance(employees, allowance_type, amount, update_existing=True):
+    monthly = monthly_factor(allowance_type.frequency, allowance_type.custom_months)
+    annual = 12 * monthly + annual_factor(allowance_type.frequency, allowance_type.custom_months)
+
+    total = employees.count()
+    existing = Allowance.objects.filter(employee__in=employees.values('pk'), allowance_type=allowance_type).aggregate(
+        count=Count('pk'), amount=Sum('amount'),
+    )
+    missing = total - existing['count']
+    amount = float(amount)
+
+    delta = missing * amount
+    affected = missing
+    if update_existing:
+        delta += existing['count'] * amount - float(existing['amount'] or 0)
+        affected = total
+    return BulkPreview(affected, round(delta * monthly, 2), round(delta * annual, 2))
+
+
+def apply_allowance(employees, allowance_type, amount, kind='CASH', update_existing=True):
+    """
+    إضافة نوع بدل لجميع الموظفين بأمر bulk_create واحد
+    update_existing: تعديل مبلغ البدل لمن لديه نفس النوع، وإلا يبقى كما هو
+    """
+    targets = employees
+    if not update_existing:
+        targets = employees.exclude(
+            pk__in=Allowance.objects.filter(allowance_type=allowance_type).values('employee_id')
+        )
+    rows = [
+        Allowance(employee_id=pk, allowance_type=allowance_type, amount=amount, type=kind)
+        for pk in targets.values_list('pk', flat=True)
+    ]
+    if not rows:
+        return 0
+
+    with transaction.atomic():
+        if update_existing:
+            Allowance.objects.bulk_create(
+                rows, batch_size=1000, update_conflicts=True,
+                unique_fields=['employee', 'allowance_type'], update_fields=['amount', 'type', 'is_active'],
+            )
+        else:
+            Allowance.objects.bulk_create(rows, batch_size=1000, ignore_conflicts=True)
+        sync_allowance_history_bulk(employees, allowance_type)
+        DataVersion.bump()
+    return len(rows)
+
+
+def preview_deactivate(employees):
+    totals = employees.with_cost_columns().aggregate(
+        affected=Count('pk'), monthly=Sum('monthly_gross'), annual=Sum('annual_cost'),
+    )
+    return BulkPreview(
+        totals['affected'],
+        -round(float(totals['monthly'] or 0), 2),
+        -round(float(totals['annual'] or 0), 2),
+    )
+
+
+def apply_deactivate(employees):
+    return update_employees(employees.filter(is_active=True), is_active=False)
+
+
+def preview_operation(operation, employees, **options):
+    if operation == 'raise_percent':
+        return preview_salary_raise(employees, 'percent', options['value'])
+    if operation == 'raise_fixed':
+        return preview_salary_raise(employees, 'fixed', options['value'])
+    if operation == 'allowance':
+        return preview_allowance(employees, options['allowance_type'], options['value'], options['update_existing'])
+    if operation == 'deactivate':
+        return preview_deactivate(employees)
+    raise ValueError(f'عملية غير معروفة: {operation}')
+
+
+def apply_operation(operation, employees, **options):
+    """تنفيذ العملية وإرجاع عدد الموظفين المعدلين"""
+    if operation == 'raise_percent':
+        return apply_salary_raise(employees, 'percent', options['value'])
+    if operation == 'raise_fixed':
+        return apply_salary_raise(employees, 'fixed', options['value'])
+    if operation == 'allowance':
+        return apply_allowance(
+            employees, options['allowance_type'], options['value'],
+            options.get('allowance_kind') or 'CASH', options['update_existing'],
+        )
+    if operation == 'deactivate':
+        return apply_deactivate(employees)
+    raise ValueError(f'عملية غير معروفة: {operation}')
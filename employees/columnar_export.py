@@ -0,0 +1,145 @@
+"""
+تصدير الموظفين مع أعمدة التكلفة بصيغة عمودية (Parquet أو Arrow IPC/Feather) لأدوات BI
+
+- الصفوف تقرأ من with_costs() بـ values_list على دفعات (BATCH_SIZE) وتكتب كل دفعة
+  كـ RecordBatch، فلا يحمل الاستعلام كاملاً في الذاكرة ولا تنشأ كائنات Employee
+- الأعمدة مكتوبة الأنواع: المبالغ decimal128 بنفس دقة حقول النموذج والتواريخ date32،
+  فتقرأ مباشرة في pandas أو polars أو DuckDB دون تحويل النصوص
+- stream_employees للاستجابة المتدفقة و write_employees للكتابة في ملف
+
+pyarrow اعتمادية اختيارية وثقيلة مثل مكتبات Excel، لذا تستورد هذه الوحدة داخل الدالة
+التي تحتاجها فقط (انظر spreadsheets.py)، و available() تتحقق من تثبيتها
+"""
+from decimal import Decimal
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+from .streaming import ChunkBuffer
+
+# عدد الصفوف في كل دفعة (RecordBatch ومجموعة صفوف Parquet)
+BATCH_SIZE = 10000
+
+FORMATS = {
+    'parquet': {'content_type': 'application/vnd.apache.parquet', 'extension': 'parquet'},
+    'arrow': {'content_type': 'application/vnd.apache.arrow.file', 'extension': 'arrow'},
+}
+
+# (اسم العمود، مسار الحقل في values_list، نوع Arrow)
+COLUMNS = [
+    ('employee_number', 'employee_number', 'string'),
+    ('name', 'name', 'string'),
+    ('nationality', 'nationality', 'string'),
+    ('category', 'category__name', 'string'),
+    ('hire_date', 'hire_date', 'date'),
+    ('basic_salary', 'basic_salary', 'money'),
+    ('insurance_type', 'insurance_type', 'string'),
+    ('num_wives', 'num_wives', 'int'),
+    ('num_children', 'num_children', 'int'),
+    ('recruitment_cost', 'recruitment_cost', 'money'),
+    ('training_cost', 'training_cost', 'money'),
+    ('ticket_type', 'ticket_type', 'string'),
+    ('family_ticket_cost', 'family_ticket_cost', 'money'),
+    ('is_active', 'is_active', 'bool'),
+    ('monthly_allowances_total', 'monthly_allowances_total', 'cost'),
+    ('annual_allowances_total', 'annual_allowances_total', 'cost'),
+    ('monthly_gross', 'monthly_gross', 'cost'),
+    ('annual_cost', 'annual_cost', 'cost'),
+    ('cost_factor', 'cost_factor', 'cost'),
+]
+
+
+def available():
+    return pa is not None
+
+
+def _arrow_type(kind):
+    return {
+        'string': pa.string(),
+        'date': pa.date32(),
+        # DecimalField(max_digits=10, decimal_places=2) في النموذج
+        'money': pa.decimal128(10, 2),
+        # COST_FIELD في with_costs
+        'cost': pa.decimal128(20, 4),
+        'int': pa.int32(),
+        'bool': pa.bool_(),
+    }[kind]
+
+
+def schema():
+    return pa.schema([pa.field(name, _arrow_type(kind)) for name, _, kind in COLUMNS])
+
+
+def _open_writer(sink, fmt, arrow_schema):
+    if fmt == 'parquet':
+        return pq.ParquetWriter(sink, arrow_schema, compression='zstd')
+    return pa.ipc.new_file(sink, arrow_schema)
+
+
+def _record_batches(employees, arrow_schema, batch_size):
+    rows = (
+        employees.with_costs()
+        .order_by('employee_number')
+        .values_list(*[path for _, path, _ in COLUMNS])
+        .iterator(chunk_size=batch_size)
+    )
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield _record_batch(batch, arrow_schema)
+            batch = []
+    if batch:
+        yield _record_batch(batch, arrow_schema)
+
+
+def _column(values, arrow_type):
+    if pa.types.is_decimal(arrow_type):
+        # أعمدة with_costs المحسوبة تعود من SQLite بدقة float كاملة، فتقرب لمنازل العمود
+        exponent = Decimal(1).scaleb(-arrow_type.scale)
+        values = [None if value is None else value.quantize(exponent) for value in values]
+    return pa.array(values, type=arrow_type)
+
+
+def _record_batch(rows, arrow_schema):
+    columns = zip(*rows)
+    return pa.RecordBatch.from_arrays(
+        [_column(values, field.type) for values, field in zip(columns, arrow_schema)],
+        schema=arrow_schema,
+    )
+
+
+def write_employees(employees, fileobj, fmt='parquet', batch_size=BATCH_SIZE, progress=None):
+    """
+    كتابة الموظفين في ملف مفتوح للكتابة الثنائية وإرجاع عدد الصفوف
+    progress: دالة اختيارية تستدعى بعدد الصفوف المكتوبة حتى الآن
+    """
+    arrow_schema = schema()
+    count = 0
+    writer = _open_writer(fileobj, fmt, arrow_schema)
+    try:
+        for batch in _record_batches(employees, arrow_schema, batch_size):
+            writer.write_batch(batch)
+            count += batch.num_rows
+            if progress:
+                progress(count)
+    finally:
+        writer.close()
+    return count
+
+
+def stream_employees(employees, fmt='parquet', batch_size=BATCH_SIZE):
+    """مولد يرسل أجزاء الملف بعد كل دفعة للاستخدام مع StreamingHttpResponse"""
+    arrow_schema = schema()
+    buffer = ChunkBuffer()
+    writer = _open_writer(buffer, fmt, arrow_schema)
+    for batch in _record_batches(employees, arrow_schema, batch_size):
+        writer.write_batch(batch)
+        yield buffer.drain()
+
+    # تذييل الملف (البيانات الوصفية للمخطط ومواقع الدفعات) يكتب عند الإغلاق
+    writer.close()
+    yield buffer.drain()
@@ -0,0 +1,69 @@
+"""
+دعم الطلبات الشرطية (ETag / Last-Modified) لصفحات التقارير والتصدير
+
+يبنى ETag من مسار الطلب والمرشحات بعد توحيدها ورقم إصدار البيانات وتاريخ اليوم،
+فإذا لم يتغير أي منها يرد الخادم بـ 304 دون تنفيذ حسابات التكاليف.
+التاريخ جزء من المفتاح لأن سنوات الخدمة ومكافأة نهاية الخدمة وتاريخ الطباعة والتوقعات تتغير كل يوم
+"""
+import hashlib
+from datetime import datetime, time
+from functools import wraps
+
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from .models import DataVersion
+
+
+def normalized_params(request):
+    """مرشحات الطلب مرتبة وبدون القيم الفارغة حتى تعطي نفس المفتاح بأي ترتيب"""
+    return sorted(
+        (key, value)
+        for key, values in request.GET.lists()
+        for value in values
+        if value != ''
+    )
+
+
+def _data_version(request):
+    # يستدعى مرتين لكل طلب (ETag و Last-Modified) لذا يحفظ في الطلب.
+    # conditional_report يوضع بعد replica_reads فيقرأ الإصدار من نفس قاعدة بيانات الصفحة،
+    # وإلا قد يحمل ETag إصدار default الأحدث مع محتوى النسخة القديم
+    if not hasattr(request, '_data_version'):
+        request._data_version = DataVersion.current()
+    return request._data_version
+
+
+def report_etag(request, *args, **kwargs):
+    key = repr((
+        request.path,
+        sorted(kwargs.items()),
+        normalized_params(request),
+        request.user.pk,
+        _data_version(request).version,
+        timezone.localdate().isoformat(),
+    ))
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()[:32]
+
+
+def report_last_modified(request, *args, **kwargs):
+    # الصفحات المحسوبة أمس قديمة حتى لو لم تتغير البيانات
+    start_of_today = timezone.make_aware(datetime.combine(timezone.localdate(), time.min))
+    return max(_data_version(request).updated_at, start_of_today)
+
+
+def conditional_report(view_func):
+    """
+    مزخرف لصفحات التقارير والتصدير: يرد بـ 304 إذا لم تتغير البيانات أو المرشحات
+    ويطلب من المتصفح إعادة التحقق في كل مرة بدلاً من استخدام نسخة قديمة
+    """
+    conditional_view = condition(etag_func=report_etag, last_modified_func=report_last_modified)(view_func)
+
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        response = conditional_view(request, *args, **kwargs)
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    return wrapper
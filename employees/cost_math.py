@@ -0,0 +1,45 @@
+"""
+معادلات التكلفة المشتركة بين محرك السيناريوهات والتوقع والعمليات الجماعية
+
+مطابقة لدوال نموذج Employee و Allowance، لكنها تعمل على القيم المجردة (float)
+حتى تستخدم على الأعمدة المحملة في الذاكرة دون إنشاء كائنات النموذج
+"""
+
+
+def monthly_factor(frequency, custom_months):
+    """معامل تحويل مبلغ البدل إلى مبلغ شهري (مطابق لـ Allowance.get_monthly_amount)"""
+    if frequency == 'MONTHLY':
+        return 1.0
+    if frequency == 'ANNUAL':
+        return 1 / 12
+    if frequency == 'BIENNIAL':
+        return 1 / 24
+    if frequency == 'CUSTOM' and custom_months:
+        return 1 / custom_months
+    return 0.0
+
+
+def annual_factor(frequency, custom_months):
+    """معامل تحويل مبلغ البدل إلى مبلغ سنوي (مطابق لـ Allowance.get_annual_amount)"""
+    if frequency == 'ANNUAL':
+        return 1.0
+    if frequency == 'MONTHLY':
+        return 12.0
+    if frequency == 'BIENNIAL':
+        return 0.5
+    if frequency == 'CUSTOM' and custom_months:
+        return 12 / custom_months
+    return 1.0
+
+
+def years_of_service(hire_date, today):
+    """سنوات الخدمة الكاملة حتى تاريخ معين (صفر لمن لم يبدأ توظيفه)"""
+    years = today.year - hire_date.year
+    if (today.month, today.day) < (hire_date.month, hire_date.day):
+        years -= 1
+    return max(0, years)
+
+
+def eos_months(years):
+    """عدد رواتب مكافأة نهاية الخدمة: نصف شهر لأول 5 سنوات وشهر لكل سنة بعدها"""
+    return min(years, 5) * 0.5 + max(0, years - 5)
@@ -0,0 +1,129 @@
+"""
+توجيه قراءات صفحات التقارير إلى نسخة قاعدة بيانات للقراءة فقط (replica)
+
+- العروض المزخرفة بـ replica_reads (صفحات التقارير والتصدير ولوحة التحكم) تقرأ من
+  REPORT_DATABASE_ALIAS، وجميع الكتابات تذهب دائماً إلى default
+- بعد أي طلب كتابة (POST وغيره) يضع ReplicaPinningMiddleware ملف تعريف ارتباط لمدة
+  REPLICA_PIN_SECONDS ثانية تقرأ خلالها صفحات هذا المستخدم من default، حتى يرى ما كتبه
+  قبل أن تصل التغييرات إلى النسخة
+- بدون REPORT_DATABASE_ALIAS (الافتراضي) تقرأ جميع الصفحات من default كما هي
+
+التوجيه محفوظ في ContextVar، فيشمل استعلامات gather_queries في الخيوط الأخرى،
+ومحتوى الاستجابات المتدفقة الذي يبنى بعد انتهاء العرض
+"""
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+PIN_COOKIE = 'replica_pin'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+_read_alias = ContextVar('report_read_alias', default=None)
+
+
+def report_database_alias():
+    return getattr(settings, 'REPORT_DATABASE_ALIAS', None)
+
+
+def current_read_alias():
+    """قاعدة البيانات التي تقرأ منها الاستعلامات الآن"""
+    return _read_alias.get() or DEFAULT_DB_ALIAS
+
+
+class ReplicaRouter:
+    """موجه قواعد البيانات: القراءة من النسخة داخل replica_reads فقط، والكتابة والترحيلات على default"""
+
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        # الكائنات المقروءة من النسخة تحفظ في default وليس في قاعدة البيانات التي قرئت منها
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, report_database_alias()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # النسخة تأخذ الجداول من default عبر النسخ المتماثل
+        if db == report_database_alias():
+            return False
+        return None
+
+
+def _route_streaming_content(content, alias):
+    """محتوى الاستجابة المتدفقة يقرأ من النسخة أيضاً، ويعاد التوجيه بعد كل جزء"""
+    iterator = iter(content)
+    while True:
+        token = _read_alias.set(alias)
+        try:
+            chunk = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            _read_alias.reset(token)
+        yield chunk
+
+
+def _replica_alias_for(request):
+    request.reads_from_replica = True
+    if request.COOKIES.get(PIN_COOKIE):
+        return None
+    return report_database_alias()
+
+
+def replica_reads(view_func):
+    """
+    مزخرف لعروض القراءة فقط (يوضع بعد login_required): قراءات العرض من REPORT_DATABASE_ALIAS
+    إلا إذا كتب المستخدم شيئاً خلال آخر REPLICA_PIN_SECONDS ثانية
+    """
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def async_wrapper(request, *args, **kwargs):
+            token = _read_alias.set(_replica_alias_for(request))
+            try:
+                return await view_func(request, *args, **kwargs)
+            finally:
+                _read_alias.reset(token)
+        return async_wrapper
+
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        alias = _replica_alias_for(request)
+        token = _read_alias.set(alias)
+        try:
+            response = view_func(request, *args, **kwargs)
+        finally:
+            _read_alias.reset(token)
+        if alias and response.streaming:
+            response.streaming_content = _route_streaming_content(response.streaming_content, alias)
+        return response
+    return wrapper
+
+
+class ReplicaPinningMiddleware:
+    """تثبيت قراءات المستخدم على default لفترة قصيرة بعد أي طلب كتابة"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        # عروض القراءة فقط التي تقبل POST (مثل سيناريوهات "ماذا لو") لا تكتب شيئاً
+        if (
+            report_database_alias()
+            and request.method not in SAFE_METHODS
+            and not getattr(request, 'reads_from_replica', False)
+        ):
+            response.set_cookie(
+                PIN_COOKIE, '1',
+                max_age=getattr(settings, 'REPLICA_PIN_SECONDS', 5),
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
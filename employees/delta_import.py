@@ -0,0 +1,367 @@
+"""
+كتابة صفوف ملف الاستيراد (Excel أو CSV) بالتغييرات فقط
+
+- لكل موظف موجود تقارن قيم أعمدة الملف بعد توحيدها مع نفس الحقول في قاعدة البيانات،
+  وكذلك بدلاته الواردة في الملف، فإذا تطابقت لا يكتب شيء ولا يتغير updated_at
+- المقارنة مع قاعدة البيانات وقت الاستيراد، فأي تعديل من الواجهة أو العمليات الجماعية
+  أو لوحة الإدارة يظهر كتغيير عند إعادة الاستيراد
+- الحقول المتغيرة فقط تكتب بـ bulk_update(fields=...)، والموظفون والبدلات الجدد بـ bulk_create،
+  على دفعات من BATCH_SIZE موظف في معاملة لكل دفعة
+- قيم كل سجل يتحقق منها بمدققات حقول النموذج قبل الدفعة فلا يلغي صف خاطئ بقية الدفعة،
+  وإذا فشلت كتابة دفعة في قاعدة البيانات تعاد كتابتها موظفاً موظفاً حتى لا يسقط إلا الصف الخاطئ
+- إعادة رفع نفس الملف (نفس بصمة الملف) تتخطى القراءة كلياً إذا لم تتغير البيانات بعد آخر
+  استيراد ناجح له (انظر EmployeeImport)
+
+bulk_create و bulk_update لا تطلق إشارات الحفظ، لذا يحدث سجل الرواتب والبدلات ورقم إصدار
+البيانات هنا كما في bulk_operations.py
+"""
+import hashlib
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.db.models import Prefetch
+from django.utils import timezone
+
+from .history import opening_history_rows, sync_allowance_history_bulk, sync_salary_history_bulk
+from .models import (
+    Allowance, AllowanceHistory, AllowanceType, DataVersion, Employee, EmployeeCategory, EmployeeImport,
+    SalaryHistory,
+)
+from .utils import clean_headers, extract_employee_and_allowances_data, read_import_rows
+
+# عدد الموظفين في كل دفعة كتابة
+BATCH_SIZE = 1000
+
+ALLOWANCE_FIELDS = ['amount', 'type', 'notes', 'is_active']
+
+
+def file_hash(uploaded_file):
+    """بصمة SHA-256 لمحتوى الملف، ثم إرجاع المؤشر لبدايته للقراءة"""
+    digest = hashlib.sha256()
+    for chunk in uploaded_file.chunks():
+        digest.update(chunk)
+    uploaded_file.seek(0)
+    return digest.hexdigest()
+
+
+def _normalized(model, attname, value):
+    """القيمة كما ستخزن في قاعدة البيانات حتى تتطابق 8000 و 8000.00"""
+    field = model._meta.get_field(attname)
+    if value is None:
+        return None
+    if isinstance(field, models.DecimalField):
+        return Decimal(value).quantize(Decimal(1).scaleb(-field.decimal_places))
+    return value
+
+
+def _stored_values(instance, attnames):
+    return {attname: _normalized(type(instance), attname, getattr(instance, attname)) for attname in attnames}
+
+
+def _changed_fields(instance, values):
+    """أسماء الحقول التي تختلف قيمتها في الملف عن قاعدة البيانات"""
+    stored = _stored_values(instance, values)
+    return [attname for attname, value in values.items() if stored[attname] != value]
+
+
+def _validation_message(model, values):
+    """
+    أخطاء قيم الملف حسب مدققات حقول النموذج (الطول والمنازل العشرية والحد الأدنى) أو None،
+    وهي ما يفشل كتابة الدفعة كاملة. لا تفحص الخيارات والقيم الفارغة (يقبلها الاستيراد كما كان)
+    ولا القيود الفريدة والعلاقات، فلا يضيف التحقق استعلاماً لكل صف
+    """
+    errors = []
+    for attname, value in values.items():
+        if value is None:
+            continue
+        field = model._meta.get_field(attname)
+        try:
+            field.run_validators(field.to_python(value))
+        except ValidationError as e:
+            errors.append(f"{field.verbose_name}: {' '.join(e.messages)}")
+    return '، '.join(errors) or None
+
+
+def _valid_allowances(record, errors):
+    """بدلات السجل التي تجتاز التحقق، وأخطاء البقية في errors"""
+    allowances = {}
+    for type_id, values in record.allowances.items():
+        message = _validation_message(Allowance, values)
+        if message:
+            errors.append(f"الصف {record.row_num} - خطأ في البدل: {message}")
+        else:
+            allowances[type_id] = values
+    return allowances
+
+
+def _bulk_update_changed(model, changes, **extra):
+    """
+    changes: قائمة (الكائن، الحقول المتغيرة). كل مجموعة كائنات لها نفس الحقول المتغيرة
+    تكتب بـ bulk_update لتلك الحقول فقط. extra: قيم تضاف لجميع الكائنات (مثل updated_at)
+    """
+    groups = {}
+    for instance, attnames in changes:
+        for attname, value in extra.items():
+            setattr(instance, attname, value)
+        fields = tuple(sorted({model._meta.get_field(attname).name for attname in [*attnames, *extra]}))
+        groups.setdefault(fields, []).append(instance)
+    for fields, instances in groups.items():
+        model.objects.bulk_update(instances, fields, batch_size=BATCH_SIZE)
+
+
+def _required_fields():
+    """حقول الموظف التي لا تقبل قيمة فارغة وليس لها قيمة افتراضية"""
+    return [
+        field for field in Employee._meta.concrete_fields
+        if not (field.primary_key or field.null or field.has_default() or field.empty_strings_allowed)
+        and not getattr(field, 'auto_now', False) and not getattr(field, 'auto_now_add', False)
+    ]
+
+
+class _ImportRecord:
+    """بيانات موظف واحد من الملف بعد توحيد القيم"""
+
+    __slots__ = ('row_num', 'values', 'allowances')
+
+    def __init__(self, row_num, values, allowances):
+        self.row_num = row_num
+        self.values = values
+        # نوع البدل: قيم حقول البدل
+        self.allowances = allowances
+
+
+def _parse_rows(header_row, rows, result):
+    """قراءة الصفوف إلى سجلات حسب رقم الموظف (الصف الأخير للموظف المكرر هو المعتمد)"""
+    headers = clean_headers(header_row)
+    categories = {category.name: category for category in EmployeeCategory.objects.all()}
+    allowance_types = {}
+    records = {}
+
+    for row_num, row in enumerate(rows, start=2):
+        try:
+            # تخطي الصفوف الفارغة
+            if not any(row):
+                continue
+
+            employee_data, allowances_data = extract_employee_and_allowances_data(row, headers, categories)
+            if not employee_data.get('employee_number'):
+                raise ValueError('رقم الموظف مطلوب')
+
+            if 'category' in employee_data:
+                category = employee_data.pop('category')
+                employee_data['category_id'] = category.pk if category else None
+            values = {
+                attname: _normalized(Employee, attname, value) for attname, value in employee_data.items()
+            }
+
+            allowances = {}
+            for allowance_data in allowances_data:
+                try:
+                    allowance_type = _allowance_type(allowance_types, allowance_data)
+                    allowances[allowance_type.pk] = {
+                        'amount': _normalized(Allowance, 'amount', allowance_data['amount']),
+                        'type': allowance_data.get('type', 'CASH'),
+                        'notes': allowance_data.get('notes', ''),
+                        'is_active': True,
+                    }
+                except Exception as allowance_error:
+                    result['errors'].append(f"الصف {row_num} - خطأ في البدل: {str(allowance_error)}")
+
+            number = values['employee_number']
+            if number in records:
+                records[number].values.update(values)
+                records[number].allowances.update(allowances)
+                records[number].row_num = row_num
+            else:
+                records[number] = _ImportRecord(row_num, values, allowances)
+
+        except Exception as e:
+            result['errors'].append(f"الصف {row_num}: {str(e)}")
+
+    return records, allowance_types
+
+
+def _allowance_type(allowance_types, allowance_data):
+    """البحث عن نوع البدل أو إنشاؤه (مرة واحدة لكل اسم في الملف)"""
+    name = allowance_data['name']
+    if name not in allowance_types:
+        allowance_types[name], _ = AllowanceType.objects.get_or_create(
+            name_arabic=name,
+            defaults={
+                'name': name,
+                'frequency': allowance_data.get('frequency', 'MONTHLY')
+            }
+        )
+    return allowance_types[name]
+
+
+def _write_batch(records, allowance_types, result):
+    """
+    كتابة دفعة من السجلات: إنشاء الجدد وتعديل الحقول المتغيرة فقط للموجودين
+    لا يتغير result إلا بعد نجاح الكتابة، حتى يمكن إعادة الدفعة صفاً صفاً عند فشلها
+    """
+    existing = {
+        employee.employee_number: employee
+        for employee in Employee.objects.filter(employee_number__in=[r.values['employee_number'] for r in records])
+        .prefetch_related(Prefetch('allowances', queryset=Allowance.objects.order_by()))
+    }
+    required = _required_fields()
+
+    new_employees = []
+    new_employee_allowances = []
+    employee_changes = []
+    allowance_changes = []
+    new_allowances = []
+    changed_allowance_types = {}
+    counts = {'updated_count': 0, 'unchanged_count': 0, 'allowances_count': 0}
+    errors = []
+
+    for record in records:
+        employee = existing.get(record.values['employee_number'])
+
+        if employee is None:
+            missing = [field.verbose_name for field in required if record.values.get(field.attname) is None]
+            if missing:
+                errors.append(f"الصف {record.row_num}: حقول مطلوبة غير موجودة: {', '.join(missing)}")
+                continue
+            message = _validation_message(Employee, record.values)
+            if message:
+                errors.append(f"الصف {record.row_num}: {message}")
+                continue
+            new_employees.append(Employee(**record.values))
+            new_employee_allowances.append(_valid_allowances(record, errors))
+            continue
+
+        changed = _changed_fields(employee, record.values)
+        if changed:
+            message = _validation_message(Employee, {attname: record.values[attname] for attname in changed})
+            if message:
+                errors.append(f"الصف {record.row_num}: {message}")
+                continue
+            employee_changes.append((employee, changed))
+            for attname in changed:
+                setattr(employee, attname, record.values[attname])
+
+        # بدلات الملف فقط، والبدلات غير الموجودة في الملف تبقى كما هي
+        stored = {allowance.allowance_type_id: allowance for allowance in employee.allowances.all()}
+        file_set = _valid_allowances(record, errors)
+        stored_set = {
+            type_id: _stored_values(stored[type_id], ALLOWANCE_FIELDS)
+            for type_id in file_set if type_id in stored
+        }
+        allowances_changed = file_set != stored_set
+        if allowances_changed:
+            for type_id, values in file_set.items():
+                allowance = stored.get(type_id)
+                if allowance is None:
+                    new_allowances.append(Allowance(employee=employee, allowance_type_id=type_id, **values))
+                else:
+                    fields = _changed_fields(allowance, values)
+                    if not fields:
+                        continue
+                    for attname in fields:
+                        setattr(allowance, attname, values[attname])
+                    allowance_changes.append((allowance, fields))
+                changed_allowance_types.setdefault(type_id, set()).add(employee.pk)
+                counts['allowances_count'] += 1
+
+        counts['updated_count' if changed or allowances_changed else 'unchanged_count'] += 1
+
+    if not (new_employees or employee_changes or allowance_changes or new_allowances):
+        result['unchanged_count'] += counts['unchanged_count']
+        result['errors'].extend(errors)
+        return
+
+    types_by_id = {allowance_type.pk: allowance_type for allowance_type in allowance_types.values()}
+    with transaction.atomic():
+        created = Employee.objects.bulk_create(new_employees, batch_size=BATCH_SIZE)
+        created_allowances = [
+            Allowance(employee=employee, allowance_type_id=type_id, **values)
+            for employee, allowances in zip(created, new_employee_allowances)
+            for type_id, values in allowances.items()
+        ]
+        Allowance.objects.bulk_create(created_allowances + new_allowances, batch_size=BATCH_SIZE)
+        salary_rows, allowance_rows = opening_history_rows(created, created_allowances)
+        SalaryHistory.objects.bulk_create(salary_rows, batch_size=BATCH_SIZE)
+        AllowanceHistory.objects.bulk_create(allowance_rows, batch_size=BATCH_SIZE)
+
+        # updated_at لا يتغير تلقائياً مع bulk_update
+        _bulk_update_changed(Employee, employee_changes, updated_at=timezone.now())
+        _bulk_update_changed(Allowance, allowance_changes)
+
+        salary_changed = [employee.pk for employee, fields in employee_changes if 'basic_salary' in fields]
+        if salary_changed:
+            sync_salary_history_bulk(Employee.objects.filter(pk__in=salary_changed))
+        for type_id, employee_ids in changed_allowance_types.items():
+            sync_allowance_history_bulk(Employee.objects.filter(pk__in=employee_ids), types_by_id[type_id])
+
+        DataVersion.bump()
+
+    for key, count in counts.items():
+        result[key] += count
+    result['imported_count'] += len(created)
+    result['allowances_count'] += len(created_allowances)
+    result['errors'].extend(errors)
+
+
+def import_rows(header_row, rows):
+    """
+    كتابة الموظفين والبدلات من صفوف ملف الاستيراد وإرجاع:
+    imported_count (جدد), updated_count, unchanged_count, allowances_count (بدلات مكتوبة), errors
+    """
+    result = {
+        'imported_count': 0,
+        'updated_count': 0,
+        'unchanged_count': 0,
+        'allowances_count': 0,
+        'errors': [],
+        'skipped_file': False,
+    }
+    records, allowance_types = _parse_rows(header_row, rows, result)
+    records = sorted(records.values(), key=lambda record: record.row_num)
+    for start in range(0, len(records), BATCH_SIZE):
+        batch = records[start:start + BATCH_SIZE]
+        try:
+            _write_batch(batch, allowance_types, result)
+        except Exception:
+            # خطأ من قاعدة البيانات لم يكشفه التحقق: إعادة الدفعة موظفاً موظفاً
+            for record in batch:
+                try:
+                    _write_batch([record], allowance_types, result)
+                except Exception as e:
+                    result['errors'].append(f"الصف {record.row_num}: {str(e)}")
+    return result
+
+
+def import_file(uploaded_file):
+    """
+    استيراد ملف Excel أو CSV، مع تخطي الملف إذا سبق استيراده بنجاح ولم تتغير البيانات بعدها
+    """
+    digest = file_hash(uploaded_file)
+    previous = EmployeeImport.objects.filter(
+        file_hash=digest, error_count=0, data_version=DataVersion.current().version
+    ).first()
+    if previous is not None:
+        return {
+            'imported_count': 0,
+            'updated_count': 0,
+            'unchanged_count': previous.created_count + previous.updated_count + previous.unchanged_count,
+            'allowances_count': 0,
+            'errors': [],
+            'skipped_file': True,
+        }
+
+    header_row, rows = read_import_rows(uploaded_file)
+    result = import_rows(header_row, rows)
+    EmployeeImport.objects.create(
+        file_hash=digest,
+        file_name=uploaded_file.name[:255],
+        data_version=DataVersion.current().version,
+        created_count=result['imported_count'],
+        updated_count=result['updated_count'],
+        unchanged_count=result['unchanged_count'],
+        allowances_count=result['allowances_count'],
+        error_count=len(result['errors']),
+    )
+    return result
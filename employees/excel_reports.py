@@ -0,0 +1,145 @@
+"""
+إنشاء ملفات Excel لتقارير الموظفين
+
+هذه الوحدة لا تعتمد على Django حتى يمكن تشغيل دوال بناء الملفات داخل عمليات منفصلة،
+و xlsxwriter يستورد داخل دالة البناء فقط (مثل employees.spreadsheets) لأن العروض تستورد الوحدة عند بدء التشغيل
+"""
+from io import BytesIO
+
+
+def individual_report_payload(employee):
+    """
+    تجهيز بيانات تقرير الموظف بصيغة بسيطة قابلة للتمرير بين العمليات
+    يفترض أن البدلات محملة مسبقاً عبر prefetch_related مع allowance_type
+    """
+    allowances = [allowance for allowance in employee.allowances.all() if allowance.is_active]
+
+    return {
+        'employee_number': employee.employee_number,
+        'name': employee.name,
+        'basic_data': [
+            ('الاسم', employee.name),
+            ('الجنسية', employee.nationality),
+            ('الفئة', employee.category.name if employee.category else ''),
+            ('تاريخ التوظيف', employee.hire_date.strftime('%Y-%m-%d')),
+            ('الراتب الأساسي', float(employee.basic_salary)),
+        ],
+        'allowances': [
+            (
+                allowance.allowance_type.name_arabic,
+                float(allowance.amount),
+                allowance.allowance_type.get_frequency_display(),
+                allowance.get_type_display(),
+                float(allowance.get_monthly_amount()),
+                float(allowance.get_annual_amount()),
+            )
+            for allowance in allowances
+        ],
+        'totals': [
+            ('إجمالي البدلات الشهرية', float(employee.get_total_monthly_allowances())),
+            ('الراتب الإجمالي الشهري', float(employee.get_monthly_gross_salary())),
+            ('التكلفة السنوية', float(employee.get_annual_total_cost())),
+            ('المعامل', float(employee.get_cost_factor())),
+        ],
+    }
+
+
+def build_individual_report_workbook(payload):
+    """بناء ملف Excel لتقرير موظف واحد وإرجاع محتواه"""
+    import xlsxwriter
+
+    output = BytesIO()
+    workbook = xlsxwriter.Workbook(output, {'in_memory': True})
+
+    # تنسيقات مختلفة
+    title_format = workbook.add_format({
+        'bold': True,
+        'font_size': 16,
+        'align': 'center',
+        'valign': 'vcenter',
+        'bg_color': '#4472C4',
+        'font_color': 'white',
+        'border': 1
+    })
+
+    header_format = workbook.add_format({
+        'bold': True,
+        'bg_color': '#D9E2F3',
+        'align': 'center',
+        'valign': 'vcenter',
+        'border': 1
+    })
+
+    data_format = workbook.add_format({
+        'align': 'center',
+        'valign': 'vcenter',
+        'border': 1
+    })
+
+    number_format = workbook.add_format({
+        'num_format': '#,##0.00',
+        'align': 'center',
+        'border': 1
+    })
+
+    # إنشاء ورقة العمل
+    worksheet = workbook.add_worksheet(f'تقرير_{payload["employee_number"]}')
+
+    # عنوان التقرير
+    worksheet.merge_range('A1:F1', f'تقرير مفصل للموظف: {payload["name"]}', title_format)
+    worksheet.merge_range('A2:F2', f'رقم الموظف: {payload["employee_number"]}', header_format)
+
+    # البيانات الأساسية
+    row = 4
+    worksheet.write(row, 0, 'البيانات الأساسية', header_format)
+    for col in range(1, 6):
+        worksheet.write(row, col, '', header_format)
+
+    row += 1
+    for label, value in payload['basic_data']:
+        worksheet.write(row, 0, label, data_format)
+        if isinstance(value, (int, float)):
+            worksheet.write(row, 1, value, number_format)
+        else:
+            worksheet.write(row, 1, value, data_format)
+        row += 1
+
+    # البدلات
+    row += 1
+    for col, title in enumerate(['البدلات والمزايا', 'المبلغ', 'التكرار', 'النوع', 'شهري', 'سنوي']):
+        worksheet.write(row, col, title, header_format)
+
+    row += 1
+    for name, amount, frequency, allowance_type, monthly, annual in payload['allowances']:
+        worksheet.write(row, 0, name, data_format)
+        worksheet.write(row, 1, amount, number_format)
+        worksheet.write(row, 2, frequency, data_format)
+        worksheet.write(row, 3, allowance_type, data_format)
+        worksheet.write(row, 4, monthly, number_format)
+        worksheet.write(row, 5, annual, number_format)
+        row += 1
+
+    # الإجماليات
+    row += 1
+    worksheet.write(row, 0, 'الإجماليات', header_format)
+    for col in range(1, 6):
+        worksheet.write(row, col, '', header_format)
+
+    row += 1
+    for label, value in payload['totals']:
+        worksheet.write(row, 0, label, data_format)
+        worksheet.write(row, 1, value, number_format)
+        row += 1
+
+    # تنسيق عرض الأعمدة
+    worksheet.set_column('A:A', 25)
+    worksheet.set_column('B:F', 18)
+
+    workbook.close()
+    return output.getvalue()
+
+
+def individual_report_filename(payload):
+    """اسم ملف تقرير الموظف داخل الأرشيف"""
+    safe_number = ''.join(c if c.isalnum() or c in '-_' else '_' for c in payload['employee_number'])
+    return f'تقرير_{safe_number}.xlsx'
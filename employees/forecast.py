@@ -0,0 +1,225 @@
+"""
+توقع تكلفة القوى العاملة للسنوات القادمة (من 1 إلى 10 سنوات)
+
+يتم تحميل الموظفين وبدلاتهم مرة واحدة في أعمدة (array) ثم تحسب كل سنة
+كعملية واحدة على جميع الأعمدة. الحسابات مبنية على معادلات نموذج Employee:
+- الراتب الأساسي مع زيادة سنوية مركبة
+- البدلات حسب دورتها: الشهرية × 12، السنوية مرة، وكل سنتين في سنوات الاستحقاق فقط
+- التذاكر العائلية (راتب شهر لكل فرد) سنوياً أو كل سنتين
+- استحقاق نهاية الخدمة: الفرق في الالتزام بين بداية السنة ونهايتها، مع تجاوز حد الخمس سنوات
+التكاليف لمرة واحدة (الاستقدام والتدريب والبدلات لمرة واحدة) لا تتكرر في سنوات التوقع
+"""
+from array import array
+from dataclasses import dataclass
+from datetime import date
+
+from .cost_math import eos_months, monthly_factor
+from .models import Allowance, Employee
+
+MAX_FORECAST_YEARS = 10
+
+
+@dataclass(frozen=True, slots=True)
+class ForecastYear:
+    """إجماليات سنة واحدة في التوقع"""
+    year: int
+    period_end: date
+    headcount: int
+    basic_salaries: float
+    allowances: float
+    family_tickets: float
+    eos_accrual: float
+    eos_liability: float
+    total_cost: float
+
+
+def _add_years(day, years):
+    try:
+        return day.replace(year=day.year + years)
+    except ValueError:  # 29 فبراير
+        return day.replace(year=day.year + years, day=28)
+
+
+class ForecastSnapshot:
+    """أعمدة الموظفين اللازمة للتوقع"""
+
+    def __init__(self):
+        self.hire_dates = []
+        self.basic_salary = array('d')
+        self.family_members = array('i')
+        self.biennial_tickets = array('b')
+
+        # البدلات مجمعة لكل موظف حسب دورة الصرف
+        self.recurring_allowances = array('d')  # المبلغ السنوي للبدلات الشهرية والسنوية والمخصصة
+        self.biennial_allowances = array('d')   # مبلغ البدلات التي تصرف كل سنتين
+        self.eos_allowances = array('d')        # البدلات النقدية الشهرية الداخلة في نهاية الخدمة
+
+    @classmethod
+    def load(cls, employees=None):
+        """تحميل الأعمدة باستعلامين"""
+        if employees is None:
+            employees = Employee.active.all()
+        snapshot = cls()
+
+        rows = {}
+        values = employees.order_by().values_list(
+            'pk', 'hire_date', 'basic_salary', 'num_wives', 'num_children', 'ticket_type'
+        )
+        for pk, hire_date, basic_salary, num_wives, num_children, ticket_type in values.iterator(chunk_size=5000):
+            rows[pk] = len(snapshot.hire_dates)
+            snapshot.hire_dates.append(hire_date)
+            snapshot.basic_salary.append(float(basic_salary))
+            snapshot.family_members.append(num_wives + num_children)
+            snapshot.biennial_tickets.append(1 if ticket_type == 'BIENNIAL' else 0)
+
+        count = len(snapshot.hire_dates)
+        snapshot.recurring_allowances = array('d', bytes(8 * count))
+        snapshot.biennial_allowances = array('d', bytes(8 * count))
+        snapshot.eos_allowances = array('d', bytes(8 * count))
+
+        allowances = Allowance.objects.filter(employee__in=employees.values('pk')).order_by().values_list(
+            'employee_id', 'allowance_type__frequency', 'allowance_type__custom_months', 'amount', 'type', 'is_active'
+        )
+        for employee_id, frequency, custom_months, amount, kind, is_active in allowances.iterator(chunk_size=5000):
+            row = rows.get(employee_id)
+            if row is None:  # موظف أضيف بين الاستعلامين
+                continue
+            amount = float(amount)
+            if frequency == 'BIENNIAL':
+                snapshot.biennial_allowances[row] += amount
+            elif frequency != 'ONE_TIME':
+                snapshot.recurring_allowances[row] += amount * 12 * monthly_factor(frequency, custom_months)
+            if kind == 'CASH' and is_active:
+                snapshot.eos_allowances[row] += amount * monthly_factor(frequency, custom_months)
+
+        return snapshot
+
+    def __len__(self):
+        return len(self.hire_dates)
+
+    def project(self, years=5, raise_rate=0.03, allowance_growth=0.0, start=None):
+        """
+        توقع التكاليف لعدد من السنوات
+        raise_rate: نسبة الزيادة السنوية في الراتب الأساسي (0.03 = 3%)
+        allowance_growth: نسبة الزيادة السنوية في البدلات
+        """
+        if not 1 <= years <= MAX_FORECAST_YEARS:
+            raise ValueError(f'عدد سنوات التوقع يجب أن يكون بين 1 و {MAX_FORECAST_YEARS}')
+
+        start = start or date.today()
+        hire_dates = self.hire_dates
+
+        # سنوات الخدمة في بداية التوقع (سالبة لمن يبدأ توظيفه لاحقاً)، وتزيد سنة مع كل سنة توقع
+        base_tenure = [
+            start.year - hire_date.year - ((start.month, start.day) < (hire_date.month, hire_date.day))
+            for hire_date in hire_dates
+        ]
+
+        # التزام نهاية الخدمة في بداية التوقع بالرواتب الحالية
+        tenure = [max(0, years_of_service) for years_of_service in base_tenure]
+        liability = [
+            eos_months(years_of_service) * (basic + eos_allowances)
+            for years_of_service, basic, eos_allowances in zip(tenure, self.basic_salary, self.eos_allowances)
+        ]
+
+        forecast = []
+        for year in range(1, years + 1):
+            period_end = _add_years(start, year)
+            salary_growth = (1 + raise_rate) ** year
+            allowances_growth = (1 + allowance_growth) ** year
+
+            tenure = [max(0, years_of_service + year) for years_of_service in base_tenure]
+            # الصرف كل سنتين يكون في السنوات التي تكتمل فيها سنة خدمة زوجية
+            cycle_year = [years_of_service > 0 and years_of_service % 2 == 0 for years_of_service in tenure]
+            # الموظفون الذين لم يبدأ توظيفهم قبل نهاية السنة لا يدخلون في تكلفتها
+            employed = [hire_date < period_end for hire_date in hire_dates]
+
+            basic = [salary * salary_growth for salary in self.basic_salary]
+            allowances = [
+                (recurring + (biennial if in_cycle else 0.0)) * allowances_growth
+                for recurring, biennial, in_cycle in zip(self.recurring_allowances, self.biennial_allowances, cycle_year)
+            ]
+            tickets = [
+                salary * members if (not biennial or in_cycle) else 0.0
+                for salary, members, biennial, in_cycle in zip(basic, self.family_members, self.biennial_tickets, cycle_year)
+            ]
+            new_liability = [
+                eos_months(years_of_service) * (salary + eos_allowances * allowances_growth)
+                for years_of_service, salary, eos_allowances in zip(tenure, basic, self.eos_allowances)
+            ]
+            accrual = [end - begin for begin, end in zip(liability, new_liability)]
+            liability = new_liability
+
+            totals = [0.0] * 5
+            headcount = 0
+            for is_employed, salary, allowance, ticket, eos, eos_liability in zip(
+                employed, basic, allowances, tickets, accrual, liability
+            ):
+                if is_employed:
+                    headcount += 1
+                    totals[0] += salary * 12
+                    totals[1] += allowance
+                    totals[2] += ticket
+                    totals[3] += eos
+                    totals[4] += eos_liability
+
+            forecast.append(ForecastYear(
+                year=year,
+                period_end=period_end,
+                headcount=headcount,
+                basic_salaries=round(totals[0], 2),
+                allowances=round(totals[1], 2),
+                family_tickets=round(totals[2], 2),
+                eos_accrual=round(totals[3], 2),
+                eos_liability=round(totals[4], 2),
+                total_cost=round(totals[0] + totals[1] + totals[2] + totals[3], 2),
+            ))
+
+        return forecast
+
+
+def workforce_forecast(employees=None, years=5, raise_rate=0.03, allowance_growth=0.0):
+    return ForecastSnapshot.load(employees).project(years, raise_rate, allowance_growth)
+
+
+FORECAST_COLUMNS = [
+    ('year', 'السنة'),
+    ('period_end', 'نهاية الفترة'),
+    ('headcount', 'عدد الموظفين'),
+    ('basic_salaries', 'الرواتب الأساسية'),
+    ('allowances', 'البدلات'),
+    ('family_tickets', 'التذاكر العائلية'),
+    ('eos_accrual', 'استحقاق نهاية الخدمة'),
+    ('total_cost', 'إجمالي التكلفة'),
+    ('eos_liability', 'التزام نهاية الخدمة'),
+]
+
+
+def write_forecast_sheet(workbook, forecast, title='FORECAST'):
+    """إضافة ورقة التوقع بالإجماليات السنوية إلى ملف xlsxwriter"""
+    header_format = workbook.add_format({
+        'bold': True,
+        'bg_color': '#D9E2F3',
+        'align': 'center',
+        'valign': 'vcenter',
+        'border': 1
+    })
+    data_format = workbook.add_format({'align': 'center', 'border': 1})
+    number_format = workbook.add_format({'num_format': '#,##0.00', 'align': 'center', 'border': 1})
+
+    worksheet = workbook.add_worksheet(title)
+    for col, (_, label) in enumerate(FORECAST_COLUMNS):
+        worksheet.write(0, col, label, header_format)
+
+    for row, item in enumerate(forecast, 1):
+        for col, (key, _) in enumerate(FORECAST_COLUMNS):
+            value = getattr(item, key)
+            if key == 'period_end':
+                worksheet.write(row, col, value.strftime('%Y-%m-%d'), data_format)
+            elif isinstance(value, float):
+                worksheet.write(row, col, value, number_format)
+            else:
+                worksheet.write(row, col, value, data_format)
+
+    worksheet.set_column(0, len(FORECAST_COLUMNS) - 1, 18)
+    return worksheet
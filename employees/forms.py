@@ -3,6 +3,7 @@ from django.forms import inlineformset_factory
 from crispy_forms.helper import FormHelper
 from crispy_forms.layout import Layout, Row, Column, Submit, HTML, Fieldset
 from crispy_forms.bootstrap import FormActions
+from .bulk_operations import OPERATION_CHOICES
 from .models import Employee, Allowance, AllowanceType
 from employees.models import EmployeeCategory
 
@@ -202,12 +203,12 @@ class ReportFilterForm(forms.Form):
 
 
 class ExcelImportForm(forms.Form):
-    """نموذج استيراد ملف Excel"""
+    """نموذج استيراد ملف Excel أو CSV"""
     
     excel_file = forms.FileField(
-        label='ملف Excel',
-        help_text='اختر ملف Excel يحتوي على بيانات الموظفين',
-        widget=forms.FileInput(attrs={'accept': '.xlsx,.xls', 'class': 'form-control'})
+        label='ملف Excel أو CSV',
+        help_text='اختر ملف Excel أو CSV (UTF-8 أو Windows-1256) يحتوي على بيانات الموظفين',
+        widget=forms.FileInput(attrs={'accept': '.xlsx,.xls,.csv', 'class': 'form-control'})
     )
     
     def __init__(self, *args, **kwargs):
@@ -219,4 +220,119 @@ class ExcelImportForm(forms.Form):
                 Submit('submit', 'استيراد البيانات', css_class='btn btn-success'),
                 HTML('<a href="{% url "employees:employee_list" %}" class="btn btn-secondary">إلغاء</a>'),
             )
-        )
\ No newline at end of file
+        )
+
+class ForecastForm(forms.Form):
+    """نموذج إعدادات توقع تكلفة القوى العاملة"""
+
+    years = forms.IntegerField(
+        min_value=1,
+        max_value=10,
+        initial=5,
+        widget=forms.NumberInput(attrs={'class': 'form-control'}),
+        label='عدد السنوات'
+    )
+
+    raise_rate = forms.DecimalField(
+        min_value=-100,
+        max_value=100,
+        decimal_places=2,
+        initial=3,
+        widget=forms.NumberInput(attrs={'class': 'form-control', 'step': '0.5'}),
+        label='الزيادة السنوية في الراتب (%)'
+    )
+
+    allowance_growth = forms.DecimalField(
+        min_value=-100,
+        max_value=100,
+        decimal_places=2,
+        initial=0,
+        widget=forms.NumberInput(attrs={'class': 'form-control', 'step': '0.5'}),
+        label='الزيادة السنوية في البدلات (%)'
+    )
+
+
+class BulkOperationForm(forms.Form):
+    """نموذج العمليات الجماعية على الموظفين النشطين"""
+
+    operation = forms.ChoiceField(
+        choices=OPERATION_CHOICES,
+        widget=forms.Select(attrs={'class': 'form-select'}),
+        label='العملية'
+    )
+
+    category = forms.ModelChoiceField(
+        queryset=EmployeeCategory.objects.all(),
+        required=False,
+        empty_label="جميع الفئات",
+        widget=forms.Select(attrs={'class': 'form-select'}),
+        label='الفئة'
+    )
+
+    nationality = forms.CharField(
+        max_length=100,
+        required=False,
+        widget=forms.Select(attrs={'class': 'form-select'}),
+        label='الجنسية'
+    )
+
+    value = forms.DecimalField(
+        required=False,
+        max_digits=10,
+        decimal_places=2,
+        widget=forms.NumberInput(attrs={'class': 'form-control', 'step': '0.01'}),
+        label='القيمة',
+        help_text='النسبة المئوية أو مبلغ الزيادة أو مبلغ البدل حسب العملية'
+    )
+
+    allowance_type = forms.ModelChoiceField(
+        queryset=AllowanceType.objects.filter(is_active=True),
+        required=False,
+        empty_label="اختر نوع البدل",
+        widget=forms.Select(attrs={'class': 'form-select'}),
+        label='نوع البدل'
+    )
+
+    allowance_kind = forms.ChoiceField(
+        choices=Allowance.ALLOWANCE_TYPE_CHOICES,
+        initial='CASH',
+        required=False,
+        widget=forms.Select(attrs={'class': 'form-select'}),
+        label='طبيعة البدل'
+    )
+
+    update_existing = forms.BooleanField(
+        required=False,
+        initial=True,
+        widget=forms.CheckboxInput(attrs={'class': 'form-check-input'}),
+        label='تعديل مبلغ البدل لمن لديه نفس النوع'
+    )
+
+    # عدد الموظفين في المعاينة، للتأكد من عدم تغير البيانات قبل التنفيذ
+    expected_count = forms.IntegerField(required=False, widget=forms.HiddenInput())
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        nationalities = Employee.active.values_list(
+            'nationality', flat=True
+        ).distinct().order_by('nationality')
+        self.fields['nationality'].widget.choices = [('', 'جميع الجنسيات')] + [(nat, nat) for nat in nationalities if nat]
+
+    def clean(self):
+        cleaned_data = super().clean()
+        operation = cleaned_data.get('operation')
+        value = cleaned_data.get('value')
+
+        if operation in ('raise_percent', 'raise_fixed', 'allowance') and value is None:
+            self.add_error('value', 'يرجى إدخال القيمة')
+        elif operation in ('raise_percent', 'raise_fixed') and value <= 0:
+            self.add_error('value', 'قيمة الزيادة يجب أن تكون أكبر من صفر')
+        elif operation == 'raise_percent' and value > 100:
+            self.add_error('value', 'نسبة الزيادة يجب ألا تتجاوز 100%')
+        elif operation == 'allowance' and value < 0:
+            self.add_error('value', 'مبلغ البدل لا يمكن أن يكون سالباً')
+
+        if operation == 'allowance' and not cleaned_data.get('allowance_type'):
+            self.add_error('allowance_type', 'يرجى اختيار نوع البدل')
+
+        return cleaned_data
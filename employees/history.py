@@ -0,0 +1,264 @@
+"""
+سجل الرواتب والبدلات بفترات سريان، وحساب التكاليف في تاريخ معين
+
+يتم تحديث السجل تلقائياً عند حفظ الموظف أو البدل (انظر employees.signals)،
+لذا يشمل ذلك التعديل من الواجهة والاستيراد من Excel ولوحة الإدارة
+"""
+from django.db.models import Count, FloatField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Cast, Coalesce
+from django.utils import timezone
+
+from .models import (
+    COST_FIELD,
+    Allowance,
+    AllowanceHistory,
+    Employee,
+    SalaryHistory,
+    _real,
+    allowance_annual_amount_expression,
+    allowance_monthly_amount_expression,
+)
+
+
+def _effective_date(employee):
+    """
+    تاريخ سريان التغيير: تاريخ التوظيف للموظف المضاف اليوم (البيانات الافتتاحية)
+    وتاريخ اليوم لأي تعديل لاحق
+    """
+    today = timezone.localdate()
+    if employee.created_at and timezone.localdate(employee.created_at) == today:
+        return employee.hire_date
+    return today
+
+
+def _apply_change(open_row, model, values, effective_from, **lookup):
+    """إغلاق السجل المفتوح وفتح سجل جديد بالقيم الجديدة، أو تعديله إذا بدأ في نفس التاريخ أو بعده"""
+    if open_row is not None:
+        if all(getattr(open_row, field) == value for field, value in values.items()):
+            return
+        if open_row.effective_from >= effective_from:
+            for field, value in values.items():
+                setattr(open_row, field, value)
+            open_row.save(update_fields=list(values))
+            return
+        open_row.effective_to = effective_from
+        open_row.save(update_fields=['effective_to'])
+
+    model.objects.create(effective_from=effective_from, **lookup, **values)
+
+
+def _close(open_row, effective_to):
+    """إنهاء سريان السجل، وحذفه إذا لم يبدأ سريانه بعد"""
+    if open_row.effective_from >= effective_to:
+        open_row.delete()
+    else:
+        open_row.effective_to = effective_to
+        open_row.save(update_fields=['effective_to'])
+
+
+def sync_salary_history(employee):
+    """مطابقة سجل الراتب مع الراتب الحالي وحالة نشاط الموظف"""
+    open_row = employee.salary_history.current().first()
+
+    # الموظف غير النشط لا يدخل في التكاليف بعد تاريخ إلغاء تفعيله
+    if not employee.is_active:
+        if open_row is not None:
+            today = timezone.localdate()
+            _close(open_row, today)
+            for row in employee.allowance_history.current():
+                _close(row, today)
+        return
+
+    reactivated = open_row is None and employee.salary_history.exists()
+    _apply_change(
+        open_row, SalaryHistory, {'basic_salary': employee.basic_salary},
+        _effective_date(employee), employee=employee,
+    )
+    if reactivated:
+        sync_allowance_history(employee)
+
+
+def sync_allowance_history(employee, allowance_type_id=None):
+    """
+    مطابقة سجل البدلات مع بدلات الموظف الحالية
+    allowance_type_id: مطابقة نوع بدل واحد فقط (عند حفظ بدل أو حذفه)
+    """
+    if not employee.is_active:
+        return
+
+    effective_from = _effective_date(employee)
+    allowances = employee.allowances.all()
+    history = employee.allowance_history.current()
+    if allowance_type_id is not None:
+        allowances = allowances.filter(allowance_type_id=allowance_type_id)
+        history = history.filter(allowance_type_id=allowance_type_id)
+    amounts = dict(allowances.values_list('allowance_type_id', 'amount'))
+    open_rows = {row.allowance_type_id: row for row in history}
+
+    for allowance_type_id, row in open_rows.items():
+        if allowance_type_id not in amounts:
+            _close(row, effective_from)
+
+    for allowance_type_id, amount in amounts.items():
+        _apply_change(
+            open_rows.get(allowance_type_id), AllowanceHistory, {'amount': amount},
+            effective_from, employee=employee, allowance_type_id=allowance_type_id,
+        )
+
+
+def sync_salary_history_bulk(employees):
+    """
+    مطابقة سجل الرواتب لمجموعة موظفين بعد تعديلهم عبر queryset.update() (لا تطلق إشارات الحفظ)
+    بعدد ثابت من الاستعلامات مهما كان عدد الموظفين، والتغييرات سارية من اليوم
+    """
+    today = timezone.localdate()
+    employee_ids = employees.order_by().values('pk')
+
+    # إلغاء التفعيل: إنهاء سريان سجلات الراتب والبدلات المفتوحة
+    inactive_ids = Employee.objects.filter(pk__in=employee_ids, is_active=False).values('pk')
+    for model in (SalaryHistory, AllowanceHistory):
+        open_rows = model.objects.current().filter(employee__in=inactive_ids)
+        open_rows.filter(effective_from__gte=today).delete()
+        open_rows.update(effective_to=today)
+
+    active = Employee.active.filter(pk__in=employee_ids)
+    open_salaries = SalaryHistory.objects.current().filter(employee__in=active.values('pk'))
+    current_salary = Subquery(Employee.objects.filter(pk=OuterRef('employee_id')).values('basic_salary')[:1])
+
+    # السجلات التي بدأت اليوم تعدل مباشرة
+    open_salaries.filter(effective_from__gte=today).update(basic_salary=current_salary)
+
+    # إعادة التفعيل: لا يوجد سجل مفتوح، فتفتح سجلات الراتب والبدلات من جديد
+    reactivated = active.exclude(pk__in=SalaryHistory.objects.current().values('employee_id'))
+    new_rows = [
+        SalaryHistory(employee_id=pk, basic_salary=basic_salary, effective_from=today)
+        for pk, basic_salary in reactivated.values_list('pk', 'basic_salary')
+    ]
+    new_allowance_rows = [
+        AllowanceHistory(employee_id=employee_id, allowance_type_id=allowance_type_id, amount=amount, effective_from=today)
+        for employee_id, allowance_type_id, amount in Allowance.objects.filter(
+            employee__in=reactivated.values('pk')
+        ).values_list('employee_id', 'allowance_type_id', 'amount')
+    ]
+
+    # تغير الراتب: إغلاق السجل المفتوح وفتح سجل جديد من اليوم
+    changed = open_salaries.filter(effective_from__lt=today).exclude(basic_salary=current_salary)
+    new_rows += [
+        SalaryHistory(employee_id=employee_id, basic_salary=basic_salary, effective_from=today)
+        for employee_id, basic_salary in changed.annotate(new_salary=current_salary).values_list(
+            'employee_id', 'new_salary'
+        )
+    ]
+    changed.update(effective_to=today)
+
+    SalaryHistory.objects.bulk_create(new_rows, batch_size=1000)
+    AllowanceHistory.objects.bulk_create(new_allowance_rows, batch_size=1000)
+
+
+def sync_allowance_history_bulk(employees, allowance_type):
+    """
+    مطابقة سجل نوع بدل واحد لمجموعة موظفين بعد إنشاء أو تعديل بدلاتهم عبر bulk_create
+    بعدد ثابت من الاستعلامات، والتغييرات سارية من اليوم
+    """
+    today = timezone.localdate()
+    active_ids = Employee.active.filter(pk__in=employees.order_by().values('pk')).values('pk')
+    allowances = Allowance.objects.filter(employee__in=active_ids, allowance_type=allowance_type)
+    open_rows = AllowanceHistory.objects.current().filter(employee__in=active_ids, allowance_type=allowance_type)
+    current_amount = Subquery(
+        Allowance.objects.filter(employee_id=OuterRef('employee_id'), allowance_type=allowance_type).values('amount')[:1]
+    )
+
+    # السجلات التي بدأت اليوم تعدل مباشرة
+    open_rows.filter(effective_from__gte=today).update(amount=current_amount)
+
+    # بدل جديد: لا يوجد سجل مفتوح
+    new_rows = [
+        AllowanceHistory(employee_id=employee_id, allowance_type=allowance_type, amount=amount, effective_from=today)
+        for employee_id, amount in allowances.exclude(
+            employee__in=open_rows.values('employee_id')
+        ).values_list('employee_id', 'amount')
+    ]
+
+    # تغير المبلغ: إغلاق السجل المفتوح وفتح سجل جديد من اليوم
+    changed = open_rows.filter(effective_from__lt=today).exclude(amount=current_amount)
+    new_rows += [
+        AllowanceHistory(employee_id=employee_id, allowance_type=allowance_type, amount=amount, effective_from=today)
+        for employee_id, amount in changed.annotate(new_amount=current_amount).values_list('employee_id', 'new_amount')
+    ]
+    changed.update(effective_to=today)
+
+    AllowanceHistory.objects.bulk_create(new_rows, batch_size=1000)
+
+
+def opening_history_rows(employees, allowances):
+    """سجلات افتتاحية (من تاريخ التوظيف) لموظفين وبدلات منشأة عبر bulk_create"""
+    hire_dates = {employee.pk: employee.hire_date for employee in employees}
+    salary_rows = [
+        SalaryHistory(employee_id=employee.pk, basic_salary=employee.basic_salary, effective_from=employee.hire_date)
+        for employee in employees
+    ]
+    allowance_rows = [
+        AllowanceHistory(
+            employee_id=allowance.employee_id,
+            allowance_type_id=allowance.allowance_type_id,
+            amount=allowance.amount,
+            effective_from=hire_dates[allowance.employee_id],
+        )
+        for allowance in allowances
+    ]
+    return salary_rows, allowance_rows
+
+
+def _allowances_sum_as_of(date, expression):
+    """مجموع بدلات موظف سجل الراتب الخارجي في التاريخ المحدد"""
+    return Subquery(
+        AllowanceHistory.objects.as_of(date)
+        .filter(employee_id=OuterRef('employee_id'))
+        .values('employee_id')
+        .annotate(total=Sum(expression))
+        .values('total'),
+        output_field=FloatField(),
+    )
+
+
+def cost_rows_as_of(date, employees=None):
+    """
+    سجلات الرواتب السارية في التاريخ مع تكلفة كل موظف في ذلك التاريخ:
+    monthly_allowances_total, monthly_gross, annual_cost
+    """
+    rows = SalaryHistory.objects.as_of(date)
+    if employees is not None:
+        rows = rows.filter(employee__in=employees.values('pk'))
+
+    monthly_allowances = Coalesce(_allowances_sum_as_of(date, allowance_monthly_amount_expression()), Value(0.0))
+    annual_allowances = Coalesce(_allowances_sum_as_of(date, allowance_annual_amount_expression()), Value(0.0))
+    basic_salary = _real('basic_salary')
+
+    return rows.annotate(
+        monthly_allowances_total=Cast(monthly_allowances, output_field=COST_FIELD),
+        monthly_gross=Cast(basic_salary + monthly_allowances, output_field=COST_FIELD),
+        annual_cost=Cast((basic_salary + monthly_allowances) * 12 + annual_allowances, output_field=COST_FIELD),
+    )
+
+
+def company_cost_as_of(date, employees=None):
+    """إجمالي تكلفة الشركة (أو الموظفين المحددين) في تاريخ معين باستعلام واحد"""
+    totals = cost_rows_as_of(date, employees).aggregate(
+        total_employees=Count('id'),
+        total_basic_salary=Sum('basic_salary'),
+        total_monthly_cost=Sum('monthly_gross'),
+        total_annual_cost=Sum('annual_cost'),
+    )
+    for key in ('total_basic_salary', 'total_monthly_cost', 'total_annual_cost'):
+        totals[key] = totals[key] or 0
+    return totals
+
+
+def first_recorded_salaries(employees):
+    """أول راتب مسجل لكل موظف {employee_id: basic_salary} باستعلام واحد"""
+    first_salary = SalaryHistory.objects.filter(
+        employee_id=OuterRef('pk')
+    ).order_by('effective_from').values('basic_salary')[:1]
+    return dict(
+        employees.order_by().annotate(first_salary=Subquery(first_salary)).values_list('pk', 'first_salary')
+    )
@@ -0,0 +1,50 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from employees.archive import archive_candidates, archive_employees
+from employees.rollups import build_month, months_to_build
+
+
+class Command(BaseCommand):
+    help = 'نقل الموظفين غير النشطين منذ مدة طويلة وبدلاتهم إلى جداول الأرشيف'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=365,
+            help='عدد الأيام منذ آخر تعديل على الموظف غير النشط (افتراضي: 365)'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='عدد الموظفين في كل معاملة (افتراضي: 500)'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='عرض عدد الموظفين المرشحين للأرشفة دون تنفيذ'
+        )
+
+    def handle(self, *args, **options):
+        if options['days'] < 1 or options['batch_size'] < 1:
+            raise CommandError('عدد الأيام وحجم الدفعة يجب أن يكونا أكبر من صفر')
+
+        employees = archive_candidates(options['days'])
+        total = employees.count()
+        self.stdout.write(f'الموظفون المرشحون للأرشفة: {total}')
+        if options['dry_run'] or not total:
+            return
+
+        # ملخصات الأشهر السابقة تبقى شاملة للموظفين المؤرشفين
+        months = months_to_build()
+        for month in months:
+            build_month(month)
+        if months:
+            self.stdout.write(f'تم حساب ملخصات {len(months)} شهر قبل الأرشفة')
+
+        start = time.perf_counter()
+        archived = archive_employees(
+            employees,
+            batch_size=options['batch_size'],
+            progress=lambda done: self.stdout.write(f'  {done}/{total}'),
+        )
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(f'تمت أرشفة {archived} موظف خلال {elapsed:.1f} ثانية'))
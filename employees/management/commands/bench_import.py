@@ -0,0 +1,172 @@
+import csv
+import io
+import json
+import time
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from employees.delta_import import import_rows
+from employees.models import Employee, EmployeeCategory
+from employees.sample_data import SampleDataGenerator
+from employees.utils import (
+    clean_headers, extract_employee_and_allowances_data, import_employees_from_excel, read_import_rows,
+)
+
+
+# نفس أعمدة قالب الاستيراد، والبدلات التي تتعرف عليها extract_employee_and_allowances_data
+HEADERS = [
+    'رقم الموظف', 'الاسم', 'الجنسية', 'الراتب الأساسي', 'تاريخ التوظيف', 'رقم الهوية', 'الفئة',
+    'نوع التأمين', 'عدد الزوجات', 'عدد الأبناء', 'تكلفة الاستقدام', 'تكلفة التدريب',
+]
+ALLOWANCE_HEADERS = ['بدل السكن', 'بدل النقل', 'بدل الإعاشة', 'بدل المخاطر', 'بدل الإجازة']
+
+FORMATS = ['xlsx', 'csv-utf8', 'csv-cp1256']
+
+
+def _xlsx_content(rows):
+    import xlsxwriter
+
+    output = io.BytesIO()
+    workbook = xlsxwriter.Workbook(output, {'in_memory': True})
+    worksheet = workbook.add_worksheet()
+    date_format = workbook.add_format({'num_format': 'yyyy-mm-dd'})
+    worksheet.write_row(0, 0, HEADERS + ALLOWANCE_HEADERS)
+    for row_num, row in enumerate(rows, start=1):
+        for col, value in enumerate(row):
+            if col == 4:
+                worksheet.write_datetime(row_num, col, value, date_format)
+            elif value is not None:
+                worksheet.write(row_num, col, value)
+    workbook.close()
+    return output.getvalue()
+
+
+def _csv_content(rows, encoding):
+    output = io.StringIO(newline='')
+    writer = csv.writer(output)
+    writer.writerow(HEADERS + ALLOWANCE_HEADERS)
+    for row in rows:
+        writer.writerow([value.isoformat() if hasattr(value, 'isoformat') else value for value in row])
+    return output.getvalue().encode(encoding)
+
+
+class Command(BaseCommand):
+    help = 'مقارنة سرعة الاستيراد (صف/ثانية) من ملف CSV مقابل ملف Excel على قاعدة بيانات مؤقتة'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows', type=int, default=2000,
+            help='عدد صفوف الملف (افتراضي: 2000)'
+        )
+        parser.add_argument(
+            '--parse-only', action='store_true',
+            help='قياس القراءة واستخراج البيانات فقط دون الكتابة في قاعدة البيانات'
+        )
+        parser.add_argument(
+            '--seed', type=int, default=42,
+            help='بذرة توليد البيانات العشوائية'
+        )
+        parser.add_argument(
+            '--json', dest='json_path',
+            help='مسار ملف JSON لحفظ النتائج (استخدم - للطباعة على الشاشة)'
+        )
+
+    def handle(self, *args, **options):
+        setup_test_environment(debug=False)
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            results = self.run_benchmarks(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        self.stdout.write('')
+        self.stdout.write(
+            f'{"Format":<14}{"Bytes":>12}{"Read rows/s":>16}{"Parse rows/s":>16}'
+            f'{"Import rows/s":>16}{"Re-import rows/s":>18}'
+        )
+        for row in results:
+            self.stdout.write(
+                f'{row["format"]:<14}{row["bytes"]:>12}{row["read_rows_per_s"]:>16}'
+                f'{row["parse_rows_per_s"]:>16}{row["import_rows_per_s"]!s:>16}{row["reimport_rows_per_s"]!s:>18}'
+            )
+
+        if options['json_path']:
+            output = json.dumps(results, ensure_ascii=False, indent=2)
+            if options['json_path'] == '-':
+                self.stdout.write(output)
+            else:
+                with open(options['json_path'], 'w', encoding='utf-8') as f:
+                    f.write(output)
+
+    def sample_rows(self, count, seed):
+        """صفوف الملف من موظفين تجريبيين يحذفون بعد القراءة ليستوردوا من جديد"""
+        SampleDataGenerator(seed=seed, prefix='IMP').generate(count)
+        employees = Employee.objects.select_related('category').prefetch_related('allowances__allowance_type')
+        rows = []
+        for employee in employees.order_by('employee_number'):
+            amounts = {
+                allowance.allowance_type.name_arabic: allowance.amount for allowance in employee.allowances.all()
+            }
+            rows.append([
+                employee.employee_number, employee.name, employee.nationality, float(employee.basic_salary),
+                employee.hire_date, employee.id_number, employee.category.name, employee.insurance_type,
+                employee.num_wives, employee.num_children, float(employee.recruitment_cost),
+                float(employee.training_cost),
+            ] + [float(amounts[name]) if name in amounts else None for name in ALLOWANCE_HEADERS])
+        Employee.objects.all().delete()
+        return rows
+
+    def run_benchmarks(self, options):
+        self.stdout.write(f'تجهيز {options["rows"]} صف...')
+        rows = self.sample_rows(options['rows'], options['seed'])
+        files = {
+            'xlsx': ('employees.xlsx', _xlsx_content(rows)),
+            'csv-utf8': ('employees.csv', _csv_content(rows, 'utf-8-sig')),
+            'csv-cp1256': ('employees.csv', _csv_content(rows, 'cp1256')),
+        }
+
+        results = []
+        for fmt in FORMATS:
+            name, content = files[fmt]
+            result = {'format': fmt, 'rows': len(rows), 'bytes': len(content)}
+
+            # القراءة وحدها: openpyxl مقابل csv
+            start = time.perf_counter()
+            header_row, file_rows = read_import_rows(SimpleUploadedFile(name, content))
+            read = sum(1 for row in file_rows if any(row))
+            result['read_rows_per_s'] = round(read / (time.perf_counter() - start))
+
+            # القراءة مع استخراج بيانات الموظف والبدلات
+            start = time.perf_counter()
+            header_row, file_rows = read_import_rows(SimpleUploadedFile(name, content))
+            headers = clean_headers(header_row)
+            categories = {category.name: category for category in EmployeeCategory.objects.all()}
+            parsed = sum(
+                1 for row in file_rows
+                if any(row) and extract_employee_and_allowances_data(row, headers, categories)
+            )
+            result['parse_rows_per_s'] = round(parsed / (time.perf_counter() - start))
+
+            result['import_rows_per_s'] = result['reimport_rows_per_s'] = None
+            if not options['parse_only']:
+                start = time.perf_counter()
+                imported = import_employees_from_excel(SimpleUploadedFile(name, content))
+                result['import_rows_per_s'] = round(imported['imported_count'] / (time.perf_counter() - start))
+                result['errors'] = len(imported['errors'])
+
+                # إعادة استيراد نفس الصفوف بدون تغييرات (دون تخطي الملف ببصمته)
+                start = time.perf_counter()
+                header_row, file_rows = read_import_rows(SimpleUploadedFile(name, content))
+                reimported = import_rows(header_row, file_rows)
+                result['reimport_rows_per_s'] = round(
+                    reimported['unchanged_count'] / (time.perf_counter() - start)
+                )
+                Employee.objects.all().delete()
+
+            self.stdout.write(f'  {fmt}: {result["read_rows_per_s"]} صف/ثانية')
+            results.append(result)
+        return results
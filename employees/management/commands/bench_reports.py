@@ -0,0 +1,178 @@
+import gc
+import json
+import platform
+import time
+import tracemalloc
+
+import django
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from django.utils import timezone
+
+from employees.models import Employee
+from employees.profiling import QueryCounter
+from employees.sample_data import SampleDataGenerator
+
+
+# الصفحات التي يتم قياسها بالترتيب
+BENCH_VIEWS = [
+    'dashboard',
+    'employee_list',
+    'reports',
+    'comparison_report',
+    'print_report',
+    'export_excel',
+    'export_advanced_excel',
+]
+
+
+class Command(BaseCommand):
+    help = 'قياس أداء صفحات التقارير والتصدير مع أعداد متزايدة من الموظفين على قاعدة بيانات مؤقتة'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', nargs='+', type=int, default=[1000, 10000, 100000],
+            help='أعداد الموظفين التي يتم القياس عليها (افتراضي: 1000 10000 100000)'
+        )
+        parser.add_argument(
+            '--views', nargs='+', choices=BENCH_VIEWS, default=BENCH_VIEWS,
+            help='الصفحات المراد قياسها'
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=1,
+            help='عدد مرات تكرار كل طلب (يتم اعتماد أسرع زمن)'
+        )
+        parser.add_argument(
+            '--seed', type=int, default=42,
+            help='بذرة توليد البيانات العشوائية'
+        )
+        parser.add_argument(
+            '--json', dest='json_path',
+            help='مسار ملف JSON لحفظ النتائج (استخدم - للطباعة على الشاشة)'
+        )
+
+    def handle(self, *args, **options):
+        setup_test_environment(debug=False)
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            results = self.run_benchmarks(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        self.print_table(results)
+
+        if options['json_path']:
+            payload = {
+                'generated_at': timezone.now().isoformat(),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'results': results,
+            }
+            output = json.dumps(payload, ensure_ascii=False, indent=2)
+            if options['json_path'] == '-':
+                self.stdout.write(output)
+            else:
+                with open(options['json_path'], 'w', encoding='utf-8') as f:
+                    f.write(output)
+                self.stdout.write(self.style.SUCCESS(f'تم حفظ النتائج في {options["json_path"]}'))
+
+    def run_benchmarks(self, options):
+        generator = SampleDataGenerator(seed=options['seed'], prefix='BENCH')
+
+        user = get_user_model().objects.create_user(username='bench', password='bench', is_staff=True)
+        client = Client(raise_request_exception=False)
+        client.force_login(user)
+
+        results = []
+        for size in sorted(options['sizes']):
+            self.stdout.write(f'تجهيز {size} موظف...')
+            self.seed_employees(size, generator)
+
+            for view_name in options['views']:
+                results.append(self.measure(client, view_name, size, options['repeat']))
+                self.stdout.write(f'  {view_name}: {results[-1]["wall_ms"]} ms')
+
+        return results
+
+    def measure(self, client, view_name, size, repeat):
+        """قياس صفحة واحدة: الزمن وعدد الاستعلامات والذاكرة وحجم الاستجابة"""
+        url = reverse(f'employees:{view_name}')
+        best = None
+
+        for _ in range(max(1, repeat)):
+            gc.collect()
+            counter = QueryCounter()
+            with connection.execute_wrapper(counter):
+                start = time.perf_counter()
+                response, body_size = self.fetch(client, url)
+                elapsed = time.perf_counter() - start
+
+            if best is None or elapsed < best['elapsed']:
+                best = {
+                    'elapsed': elapsed,
+                    'status': response.status_code,
+                    'queries': counter.count,
+                    'bytes': body_size,
+                }
+
+        return {
+            'view': view_name,
+            'employees': size,
+            'status': best['status'],
+            'wall_ms': round(best['elapsed'] * 1000, 1),
+            'queries': best['queries'],
+            'peak_mb': self.peak_memory_mb(client, url),
+            'response_bytes': best['bytes'],
+        }
+
+    def fetch(self, client, url):
+        """تنفيذ الطلب وقراءة الاستجابة كاملة (بما فيها المتدفقة)"""
+        response = client.get(url)
+        if response.streaming:
+            body_size = sum(len(chunk) for chunk in response.streaming_content)
+        else:
+            body_size = len(response.content)
+        return response, body_size
+
+    def peak_memory_mb(self, client, url):
+        """
+        أعلى ذاكرة يحجزها طلب واحد للصفحة بالميجابايت (tracemalloc)،
+        تقاس في طلب منفصل حتى لا يؤثر التتبع على الزمن المقاس
+        """
+        gc.collect()
+        tracemalloc.start()
+        try:
+            self.fetch(client, url)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        return round(peak / (1024 * 1024), 1)
+
+    def seed_employees(self, target, generator):
+        """إضافة موظفين حتى يصل العدد إلى الحجم المطلوب"""
+        missing = target - Employee.objects.count()
+        if missing > 0:
+            generator.generate(missing)
+
+    def print_table(self, results):
+        columns = [
+            ('view', 'View', 24),
+            ('employees', 'Employees', 10),
+            ('status', 'Status', 7),
+            ('wall_ms', 'Wall ms', 12),
+            ('queries', 'Queries', 9),
+            ('peak_mb', 'Peak MB', 10),
+            ('response_bytes', 'Bytes', 12),
+        ]
+        header = ' '.join(title.ljust(width) for _, title, width in columns)
+        self.stdout.write('')
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for row in results:
+            self.stdout.write(' '.join(str(row[key]).ljust(width) for key, _, width in columns))
@@ -0,0 +1,134 @@
+import json
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+# مكتبات Excel التي كانت تستورد في أعلى views.py و views_reports.py و utils.py
+SPREADSHEET_MODULES = ['openpyxl', 'openpyxl.styles', 'xlsxwriter']
+
+# بدء عملية خادم جديدة: إعداد Django وتطبيق WSGI وتحميل ملفات الروابط (ومعها جميع العروض)
+STARTUP_SCRIPT = '''
+import importlib, json, sys, time
+start = time.perf_counter()
+{eager_imports}
+from django.core.wsgi import get_wsgi_application
+get_wsgi_application()
+from django.conf import settings
+importlib.import_module(settings.ROOT_URLCONF)
+elapsed = time.perf_counter() - start
+try:
+    import resource
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+except ImportError:
+    rss = None
+print(json.dumps({{
+    'elapsed': elapsed,
+    'rss_mb': rss,
+    'spreadsheet_loaded': [name for name in {modules!r} if name in sys.modules],
+}}))
+'''
+
+
+def _parse_importtime(stderr):
+    """
+    مجموع زمن الاستيراد ووقت استيراد كل حزمة من الحزم العليا من مخرجات -X importtime:
+    import time: self [us] | cumulative | imported package
+    """
+    total = 0
+    top_level = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, cumulative_us, package = line[len('import time:'):].split('|')
+        total += int(self_us)
+        if not package.startswith('  '):
+            top_level[package.strip()] = int(cumulative_us)
+    return total, top_level
+
+
+class Command(BaseCommand):
+    help = 'قياس زمن بدء عملية الخادم وذاكرتها بـ -X importtime مع استيراد مكتبات Excel مسبقاً (قبل) وعند الحاجة (بعد)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--runs', type=int, default=5,
+            help='عدد العمليات الجديدة لكل وضع (يتم اعتماد الوسيط، افتراضي: 5)'
+        )
+        parser.add_argument(
+            '--top', type=int, default=10,
+            help='عدد الحزم الأبطأ استيراداً في التقرير (افتراضي: 10)'
+        )
+        parser.add_argument(
+            '--json', dest='json_path',
+            help='مسار ملف JSON لحفظ النتائج (استخدم - للطباعة على الشاشة)'
+        )
+
+    def _run(self, eager):
+        # import صريحة وليس importlib حتى تظهر الحزم في مخرجات -X importtime
+        eager_imports = '\n'.join(f'import {name}' for name in SPREADSHEET_MODULES) if eager else ''
+        script = STARTUP_SCRIPT.format(eager_imports=eager_imports, modules=SPREADSHEET_MODULES)
+        completed = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', script],
+            capture_output=True, text=True, check=True, cwd=settings.BASE_DIR,
+        )
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        result['import_us'], result['packages'] = _parse_importtime(completed.stderr)
+        return result
+
+    def _measure(self, eager, runs, top):
+        samples = [self._run(eager) for _ in range(runs)]
+        packages = samples[-1]['packages']
+        rss = [sample['rss_mb'] for sample in samples if sample['rss_mb'] is not None]
+        return {
+            'cold_start_ms': round(statistics.median(sample['elapsed'] for sample in samples) * 1000, 1),
+            'import_ms': round(statistics.median(sample['import_us'] for sample in samples) / 1000, 1),
+            'rss_mb': round(statistics.median(rss), 1) if rss else None,
+            'spreadsheet_import_ms': round(sum(
+                packages.get(name, 0) for name in SPREADSHEET_MODULES if '.' not in name
+            ) / 1000, 1),
+            'spreadsheet_loaded': samples[-1]['spreadsheet_loaded'],
+            'slowest_packages': [
+                {'package': package, 'ms': round(us / 1000, 1)}
+                for package, us in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+            ],
+        }
+
+    def handle(self, *args, **options):
+        results = {}
+        for label, eager in (('before', True), ('after', False)):
+            self.stdout.write(f'قياس {label} ({options["runs"]} عمليات)...')
+            results[label] = self._measure(eager, options['runs'], options['top'])
+
+        self.stdout.write('')
+        self.stdout.write(f'{"":<28}{"قبل (استيراد مسبق)":>22}{"بعد (عند الحاجة)":>22}')
+        for key, title in (
+            ('cold_start_ms', 'بدء العملية (ms)'),
+            ('import_ms', 'زمن الاستيراد الكلي (ms)'),
+            ('spreadsheet_import_ms', 'مكتبات Excel (ms)'),
+            ('rss_mb', 'الذاكرة المقيمة (MB)'),
+        ):
+            before, after = results['before'][key], results['after'][key]
+            self.stdout.write(f'{title:<28}{before!s:>22}{after!s:>22}')
+
+        loaded = results['after']['spreadsheet_loaded']
+        if loaded:
+            self.stdout.write(self.style.WARNING(f'مكتبات Excel ما زالت تحمل عند بدء التشغيل: {", ".join(loaded)}'))
+        else:
+            self.stdout.write(self.style.SUCCESS('مكتبات Excel لا تحمل عند بدء التشغيل'))
+
+        self.stdout.write('')
+        self.stdout.write('الحزم الأبطأ استيراداً (بعد):')
+        for package in results['after']['slowest_packages']:
+            self.stdout.write(f'  {package["ms"]:>8} ms  {package["package"]}')
+
+        if options['json_path']:
+            data = json.dumps(results, ensure_ascii=False, indent=2)
+            if options['json_path'] == '-':
+                self.stdout.write(data)
+            else:
+                with open(options['json_path'], 'w', encoding='utf-8') as f:
+                    f.write(data)
@@ -0,0 +1,45 @@
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from employees.rollups import build_month, month_start, months_to_build
+
+
+class Command(BaseCommand):
+    help = 'بناء ملخصات التكلفة الشهرية (الشهر الحالي والأشهر غير المحسوبة أو المتأثرة بسجلات بأثر رجعي)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild', action='store_true',
+            help='إعادة حساب جميع الأشهر بدلاً من الشهر الحالي فقط'
+        )
+        parser.add_argument(
+            '--since',
+            help='أول شهر بصيغة YYYY-MM (افتراضي: أول شهر في سجل الرواتب)، ومع --rebuild يعاد حساب الأشهر من هذا الشهر'
+        )
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            try:
+                since = month_start(datetime.strptime(options['since'], '%Y-%m').date())
+            except ValueError:
+                raise CommandError('صيغة الشهر غير صحيحة، استخدم YYYY-MM')
+
+        months = months_to_build(rebuild=options['rebuild'], since=since)
+        if not months:
+            self.stdout.write('لا توجد أشهر للحساب')
+            return
+
+        start = time.perf_counter()
+        rows = 0
+        for month in months:
+            count = build_month(month)
+            rows += count
+            self.stdout.write(f'{month:%Y-%m}: {count} صف')
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            self.style.SUCCESS(f'تم حساب {len(months)} شهر ({rows} صف) خلال {elapsed:.1f} ثانية')
+        )
@@ -0,0 +1,65 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from employees.bulk_exports import default_workers
+from employees.models import Employee
+from employees.thumbnails import render_thumbnails, save_thumbnails
+
+
+def _render(item):
+    """تعمل داخل عملية فرعية: إنشاء الصور المصغرة فقط دون قاعدة البيانات"""
+    pk, photo_name = item
+    try:
+        return pk, photo_name, render_thumbnails(photo_name), None
+    except Exception as e:
+        return pk, photo_name, None, str(e)
+
+
+class Command(BaseCommand):
+    help = 'إنشاء الصور المصغرة لصور الموظفين الموجودة باستخدام عدة عمليات'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=None,
+            help='عدد العمليات (افتراضي: عدد الأنوية)'
+        )
+        parser.add_argument(
+            '--force', action='store_true',
+            help='إعادة إنشاء الصور المصغرة حتى لو كانت موجودة'
+        )
+
+    def handle(self, *args, **options):
+        employees = Employee.objects.exclude(photo='').exclude(photo__isnull=True)
+        items = [
+            (pk, photo)
+            for pk, photo, thumbnails in employees.values_list('pk', 'photo', 'photo_thumbnails')
+            if options['force'] or (thumbnails or {}).get('source') != photo
+        ]
+        if not items:
+            self.stdout.write('لا توجد صور تحتاج إلى معالجة')
+            return
+
+        workers = options['workers'] or default_workers()
+        self.stdout.write(f'معالجة {len(items)} صورة باستخدام {workers} عملية...')
+
+        # العمليات الفرعية لا يجب أن ترث اتصالاً مفتوحاً بقاعدة البيانات
+        connections.close_all()
+
+        start = time.perf_counter()
+        done = failed = 0
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for pk, photo_name, thumbnails, error in executor.map(_render, items, chunksize=8):
+                if error:
+                    failed += 1
+                    self.stderr.write(f'{photo_name}: {error}')
+                    continue
+                save_thumbnails(pk, photo_name, thumbnails)
+                done += 1
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            self.style.SUCCESS(f'تمت معالجة {done} صورة ({failed} فشل) خلال {elapsed:.1f} ثانية')
+        )
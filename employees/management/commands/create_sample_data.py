@@ -1,94 +1,52 @@
-from django.core.management.base import BaseCommand
-from employees.models import Employee, AllowanceType, Allowance
-from employees.utils import create_default_allowance_types
-from decimal import Decimal
-import random
-from datetime import date, timedelta
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from employees.sample_data import SampleDataGenerator
+
 
 class Command(BaseCommand):
-    help = 'إنشاء بيانات تجريبية للاختبار'
+    help = 'إنشاء بيانات تجريبية للاختبار وقياس الأداء'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--employees', type=int, default=50,
+            help='عدد الموظفين المراد إنشاؤهم (افتراضي: 50)'
+        )
+        parser.add_argument(
+            '--seed', type=int, default=None,
+            help='بذرة التوليد العشوائي للحصول على نفس البيانات في كل مرة'
+        )
+        parser.add_argument(
+            '--batch', type=int, default=5000,
+            help='عدد الموظفين في كل دفعة bulk_create (افتراضي: 5000)'
+        )
+        parser.add_argument(
+            '--prefix', default='EMP',
+            help='بادئة أرقام الموظفين المولدة (افتراضي: EMP)'
+        )
 
     def handle(self, *args, **options):
-        # إنشاء أنواع البدلات أولاً
-        create_default_allowance_types()
-        
-        # بيانات تجريبية للموظفين
-        sample_employees = [
-            {
-                'employee_number': 'EMP001',
-                'name': 'أحمد محمد علي',
-                'nationality': 'سعودي',
-                'category': 'MANAGER',
-                'basic_salary': Decimal('8000.00'),
-                'insurance_type': 'COMPREHENSIVE'
-            },
-            {
-                'employee_number': 'EMP002',
-                'name': 'محمد أحمد السعد',
-                'nationality': 'مصري',
-                'category': 'ENGINEER',
-                'basic_salary': Decimal('6500.00'),
-                'insurance_type': 'BASIC'
-            },
-            {
-                'employee_number': 'EMP003',
-                'name': 'خالد عبدالله',
-                'nationality': 'أردني',
-                'category': 'TECHNICIAN',
-                'basic_salary': Decimal('4500.00'),
-                'insurance_type': 'BASIC'
-            },
-            {
-                'employee_number': 'EMP004',
-                'name': 'عبدالرحمن صالح',
-                'nationality': 'سعودي',
-                'category': 'STAFF',
-                'basic_salary': Decimal('5000.00'),
-                'insurance_type': 'COMPREHENSIVE'
-            },
-            {
-                'employee_number': 'EMP005',
-                'name': 'يوسف العمراني',
-                'nationality': 'مغربي',
-                'category': 'LABOR',
-                'basic_salary': Decimal('3200.00'),
-                'insurance_type': 'BASIC'
-            }
-        ]
-        
-        created_count = 0
-        for emp_data in sample_employees:
-            if not Employee.objects.filter(employee_number=emp_data['employee_number']).exists():
-                employee = Employee.objects.create(
-                    employee_number=emp_data['employee_number'],
-                    name=emp_data['name'],
-                    nationality=emp_data['nationality'],
-                    hire_date=date.today() - timedelta(days=random.randint(30, 365*3)),
-                    id_number=f"ID{random.randint(100000, 999999)}",
-                    category=emp_data['category'],
-                    basic_salary=emp_data['basic_salary'],
-                    insurance_type=emp_data['insurance_type'],
-                    num_wives=random.randint(0, 2),
-                    num_children=random.randint(0, 4),
-                    recruitment_cost=Decimal(str(random.randint(1000, 5000))),
-                    training_cost=Decimal(str(random.randint(500, 2000)))
-                )
-                
-                # إضافة بدلات عشوائية
-                allowance_types = list(AllowanceType.objects.filter(is_active=True))
-                for i in range(random.randint(1, 3)):
-                    allowance_type = random.choice(allowance_types)
-                    if not Allowance.objects.filter(employee=employee, allowance_type=allowance_type).exists():
-                        Allowance.objects.create(
-                            employee=employee,
-                            allowance_type=allowance_type,
-                            amount=Decimal(str(random.randint(200, 1000))),
-                            type=random.choice(['CASH', 'IN_KIND'])
-                        )
-                
-                created_count += 1
-                self.stdout.write(f'تم إنشاء الموظف: {employee.name}')
-        
+        total = options['employees']
+        if options['batch'] < 1:
+            raise CommandError('حجم الدفعة يجب أن يكون أكبر من صفر')
+
+        generator = SampleDataGenerator(
+            seed=options['seed'],
+            batch_size=options['batch'],
+            prefix=options['prefix'],
+        )
+
+        def progress(done):
+            self.stdout.write(f'{done}/{total}')
+
+        start = time.perf_counter()
+        result = generator.generate(total, progress=progress)
+        elapsed = time.perf_counter() - start
+
         self.stdout.write(
-            self.style.SUCCESS(f'تم إنشاء {created_count} موظف تجريبي بنجاح')
-        )
\ No newline at end of file
+            self.style.SUCCESS(
+                f'تم إنشاء {result["employees"]} موظف تجريبي و {result["allowances"]} بدل '
+                f'خلال {elapsed:.1f} ثانية'
+            )
+        )
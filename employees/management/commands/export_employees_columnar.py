@@ -0,0 +1,50 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from employees.models import Employee
+
+
+class Command(BaseCommand):
+    help = 'تصدير الموظفين مع أعمدة التكلفة بصيغة Parquet أو Arrow (Feather) لأدوات BI'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help='مسار الملف الناتج')
+        parser.add_argument(
+            '--format', choices=['parquet', 'arrow'], default='parquet',
+            help='صيغة الملف (افتراضي: parquet)'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=None,
+            help='عدد الصفوف في كل دفعة (افتراضي: 10000)'
+        )
+        parser.add_argument(
+            '--include-inactive', action='store_true',
+            help='تضمين الموظفين غير النشطين'
+        )
+
+    def handle(self, *args, **options):
+        from employees import columnar_export
+
+        if not columnar_export.available():
+            raise CommandError('التصدير العمودي يتطلب تثبيت pyarrow (pip install pyarrow)')
+
+        employees = Employee.objects.all() if options['include_inactive'] else Employee.active.all()
+        batch_size = options['batch_size'] or columnar_export.BATCH_SIZE
+
+        total = employees.count()
+        self.stdout.write(f'تصدير {total} موظف بصيغة {options["format"]}...')
+
+        def progress(done):
+            self.stdout.write(f'{done}/{total}')
+
+        start = time.perf_counter()
+        with open(options['output'], 'wb') as f:
+            count = columnar_export.write_employees(
+                employees, f, options['format'], batch_size=batch_size, progress=progress
+            )
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(
+            self.style.SUCCESS(f'تم تصدير {count} موظف إلى {options["output"]} خلال {elapsed:.1f} ثانية')
+        )
@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from employees.bulk_exports import default_workers, write_individual_reports_zip
+from employees.models import Employee
+
+
+class Command(BaseCommand):
+    help = 'تصدير التقارير الفردية لجميع الموظفين في ملف ZIP واحد'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help='مسار ملف ZIP الناتج')
+        parser.add_argument(
+            '--workers', type=int, default=None,
+            help='عدد العمليات المستخدمة لبناء ملفات Excel (افتراضي: عدد الأنوية)'
+        )
+        parser.add_argument(
+            '--include-inactive', action='store_true',
+            help='تضمين الموظفين غير النشطين'
+        )
+
+    def handle(self, *args, **options):
+        employees = Employee.objects.all() if options['include_inactive'] else Employee.active.all()
+
+        total = employees.count()
+        workers = options['workers'] or default_workers()
+        self.stdout.write(f'تصدير {total} تقرير باستخدام {workers} عملية...')
+
+        step = max(1, total // 20)
+
+        def progress(done):
+            if done % step == 0 or done == total:
+                self.stdout.write(f'{done}/{total}')
+
+        start = time.perf_counter()
+        with open(options['output'], 'wb') as f:
+            count = write_individual_reports_zip(employees, f, workers=workers, progress=progress)
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(
+            self.style.SUCCESS(f'تم تصدير {count} تقرير إلى {options["output"]} خلال {elapsed:.1f} ثانية')
+        )
@@ -0,0 +1,41 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+
+class Command(BaseCommand):
+    help = 'نسخ قاعدة بيانات SQLite الرئيسية إلى ملف النسخة (REPLICA_DB_NAME) لتجربة توجيه التقارير محلياً'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float,
+            help='تكرار النسخ كل عدد من الثواني لمحاكاة تأخر النسخ المتماثل (افتراضي: مرة واحدة)'
+        )
+
+    def handle(self, *args, **options):
+        alias = settings.REPORT_DATABASE_ALIAS
+        if not alias:
+            raise CommandError('لا توجد نسخة للقراءة، حدد REPLICA_DB_NAME')
+
+        source, target = settings.DATABASES[DEFAULT_DB_ALIAS], settings.DATABASES[alias]
+        if not (source['ENGINE'].endswith('sqlite3') and target['ENGINE'].endswith('sqlite3')):
+            raise CommandError('الأمر لقواعد SQLite فقط، نسخ PostgreSQL يتم عبر النسخ المتماثل (standby)')
+
+        while True:
+            start = time.perf_counter()
+            # واجهة النسخ الاحتياطي في sqlite3 تنسخ لقطة متسقة حتى أثناء الكتابة
+            src, dst = sqlite3.connect(source['NAME']), sqlite3.connect(target['NAME'])
+            try:
+                src.backup(dst)
+            finally:
+                dst.close()
+                src.close()
+            self.stdout.write(self.style.SUCCESS(
+                f'تم نسخ {source["NAME"]} إلى {target["NAME"]} خلال {time.perf_counter() - start:.2f} ثانية'
+            ))
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:04
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0004_alter_employee_insurance_type'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DataVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveBigIntegerField(default=0, verbose_name='رقم الإصدار')),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='آخر تعديل')),
+            ],
+            options={
+                'verbose_name': 'إصدار البيانات',
+                'verbose_name_plural': 'إصدارات البيانات',
+            },
+        ),
+    ]
@@ -0,0 +1,84 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_opening_history(apps, schema_editor):
+    """سجلات افتتاحية للموظفين النشطين الحاليين بالراتب والبدلات الحالية من تاريخ التوظيف"""
+    Employee = apps.get_model('employees', 'Employee')
+    Allowance = apps.get_model('employees', 'Allowance')
+    SalaryHistory = apps.get_model('employees', 'SalaryHistory')
+    AllowanceHistory = apps.get_model('employees', 'AllowanceHistory')
+
+    hire_dates = dict(Employee.objects.filter(is_active=True).values_list('pk', 'hire_date'))
+
+    SalaryHistory.objects.bulk_create(
+        (
+            SalaryHistory(employee_id=pk, basic_salary=basic_salary, effective_from=hire_date)
+            for pk, basic_salary, hire_date in Employee.objects.filter(is_active=True).values_list(
+                'pk', 'basic_salary', 'hire_date'
+            ).iterator()
+        ),
+        batch_size=1000,
+    )
+    AllowanceHistory.objects.bulk_create(
+        (
+            AllowanceHistory(
+                employee_id=employee_id,
+                allowance_type_id=allowance_type_id,
+                amount=amount,
+                effective_from=hire_dates[employee_id],
+            )
+            for employee_id, allowance_type_id, amount in Allowance.objects.filter(
+                employee__is_active=True
+            ).values_list('employee_id', 'allowance_type_id', 'amount').iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0005_dataversion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AllowanceHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='المبلغ')),
+                ('effective_from', models.DateField(verbose_name='ساري من')),
+                ('effective_to', models.DateField(blank=True, null=True, verbose_name='ساري حتى (غير شامل)')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='تاريخ الإنشاء')),
+                ('allowance_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='employees.allowancetype', verbose_name='نوع البدل')),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='allowance_history', to='employees.employee', verbose_name='الموظف')),
+            ],
+            options={
+                'verbose_name': 'سجل بدل',
+                'verbose_name_plural': 'سجل البدلات',
+                'ordering': ['employee', 'allowance_type', 'effective_from'],
+                'indexes': [models.Index(fields=['employee', 'effective_from'], name='allowance_hist_emp_from_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='SalaryHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('basic_salary', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='الراتب الأساسي')),
+                ('effective_from', models.DateField(verbose_name='ساري من')),
+                ('effective_to', models.DateField(blank=True, null=True, verbose_name='ساري حتى (غير شامل)')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='تاريخ الإنشاء')),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='salary_history', to='employees.employee', verbose_name='الموظف')),
+            ],
+            options={
+                'verbose_name': 'سجل راتب',
+                'verbose_name_plural': 'سجل الرواتب',
+                'ordering': ['employee', 'effective_from'],
+                'indexes': [models.Index(fields=['employee', 'effective_from'], name='salary_hist_emp_from_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_opening_history, migrations.RunPython.noop),
+    ]
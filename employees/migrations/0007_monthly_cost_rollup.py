@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0006_salary_allowance_history'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyCostRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(verbose_name='الشهر')),
+                ('nationality', models.CharField(max_length=100, verbose_name='الجنسية')),
+                ('headcount', models.PositiveIntegerField(default=0, verbose_name='عدد الموظفين')),
+                ('total_basic_salary', models.DecimalField(decimal_places=4, default=0, max_digits=20, verbose_name='إجمالي الرواتب الأساسية')),
+                ('total_monthly_allowances', models.DecimalField(decimal_places=4, default=0, max_digits=20, verbose_name='إجمالي البدلات الشهرية')),
+                ('total_monthly_gross', models.DecimalField(decimal_places=4, default=0, max_digits=20, verbose_name='إجمالي الرواتب الشهرية')),
+                ('total_annual_cost', models.DecimalField(decimal_places=4, default=0, max_digits=20, verbose_name='التكلفة السنوية المكافئة')),
+                ('computed_at', models.DateTimeField(auto_now=True, verbose_name='تاريخ الحساب')),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='employees.employeecategory', verbose_name='الفئة')),
+            ],
+            options={
+                'verbose_name': 'ملخص تكلفة شهري',
+                'verbose_name_plural': 'ملخصات التكلفة الشهرية',
+                'ordering': ['month', 'category', 'nationality'],
+                'indexes': [models.Index(fields=['month'], name='cost_rollup_month_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0007_monthly_cost_rollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employee',
+            name='photo_thumbnails',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='الصور المصغرة'),
+        ),
+    ]
@@ -0,0 +1,88 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:23
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0008_employee_photo_thumbnails'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedAllowance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='المبلغ')),
+                ('type', models.CharField(choices=[('CASH', 'نقدي'), ('IN_KIND', 'عيني')], default='CASH', max_length=10, verbose_name='طبيعة البدل')),
+                ('notes', models.TextField(blank=True, verbose_name='ملاحظات')),
+                ('is_active', models.BooleanField(default=True, verbose_name='نشط')),
+                ('created_at', models.DateTimeField(verbose_name='تاريخ الإنشاء')),
+            ],
+            options={
+                'verbose_name': 'بدل مؤرشف',
+                'verbose_name_plural': 'البدلات المؤرشفة',
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedEmployee',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('original_id', models.PositiveIntegerField(verbose_name='رقم السجل الأصلي')),
+                ('employee_number', models.CharField(max_length=20, verbose_name='رقم الموظف')),
+                ('name', models.CharField(max_length=200, verbose_name='الاسم')),
+                ('nationality', models.CharField(max_length=100, verbose_name='الجنسية')),
+                ('hire_date', models.DateField(verbose_name='تاريخ التوظيف')),
+                ('id_number', models.CharField(max_length=50, verbose_name='رقم الهوية/الإقامة')),
+                ('basic_salary', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='آخر راتب أساسي')),
+                ('insurance_type', models.CharField(max_length=20, verbose_name='نوع التأمين الطبي')),
+                ('num_wives', models.PositiveIntegerField(default=0, verbose_name='عدد الزوجات')),
+                ('num_children', models.PositiveIntegerField(default=0, verbose_name='عدد الأبناء')),
+                ('recruitment_cost', models.DecimalField(decimal_places=2, default=0, max_digits=10, verbose_name='تكلفة الاستقدام')),
+                ('training_cost', models.DecimalField(decimal_places=2, default=0, max_digits=10, verbose_name='تكلفة التدريب')),
+                ('ticket_type', models.CharField(max_length=20, verbose_name='نوع التذكرة')),
+                ('family_ticket_cost', models.DecimalField(decimal_places=2, default=0, max_digits=10, verbose_name='تكلفة التذاكر العائلية')),
+                ('photo', models.CharField(blank=True, max_length=255, verbose_name='الصورة')),
+                ('created_at', models.DateTimeField(verbose_name='تاريخ الإنشاء')),
+                ('deactivated_at', models.DateTimeField(verbose_name='تاريخ آخر تحديث (إلغاء التفعيل)')),
+                ('salary_history', models.JSONField(blank=True, default=list, verbose_name='سجل الرواتب')),
+                ('allowance_history', models.JSONField(blank=True, default=list, verbose_name='سجل البدلات')),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='تاريخ الأرشفة')),
+            ],
+            options={
+                'verbose_name': 'موظف مؤرشف',
+                'verbose_name_plural': 'الموظفون المؤرشفون',
+                'ordering': ['employee_number'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['category', 'nationality'], name='employee_active_cat_nat_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['hire_date'], name='employee_active_hire_idx'),
+        ),
+        migrations.AddField(
+            model_name='archivedallowance',
+            name='allowance_type',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='employees.allowancetype', verbose_name='نوع البدل'),
+        ),
+        migrations.AddField(
+            model_name='archivedemployee',
+            name='category',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='employees.employeecategory', verbose_name='الفئة'),
+        ),
+        migrations.AddField(
+            model_name='archivedallowance',
+            name='employee',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='allowances', to='employees.archivedemployee', verbose_name='الموظف'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedemployee',
+            index=models.Index(fields=['employee_number'], name='archived_employee_number_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:50
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0009_employee_active_indexes_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmployeeImport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_hash', models.CharField(db_index=True, max_length=64, verbose_name='بصمة الملف')),
+                ('file_name', models.CharField(blank=True, max_length=255, verbose_name='اسم الملف')),
+                ('data_version', models.PositiveBigIntegerField(verbose_name='إصدار البيانات بعد الاستيراد')),
+                ('created_count', models.PositiveIntegerField(default=0, verbose_name='موظفون جدد')),
+                ('updated_count', models.PositiveIntegerField(default=0, verbose_name='موظفون معدلون')),
+                ('unchanged_count', models.PositiveIntegerField(default=0, verbose_name='موظفون بدون تغيير')),
+                ('allowances_count', models.PositiveIntegerField(default=0, verbose_name='بدلات مكتوبة')),
+                ('error_count', models.PositiveIntegerField(default=0, verbose_name='عدد الأخطاء')),
+                ('imported_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='تاريخ الاستيراد')),
+            ],
+            options={
+                'verbose_name': 'عملية استيراد',
+                'verbose_name_plural': 'عمليات الاستيراد',
+                'ordering': ['-imported_at'],
+            },
+        ),
+    ]
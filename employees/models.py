@@ -1,5 +1,8 @@
 from django.db import models
+from django.db.models import Case, When, F, OuterRef, Q, Subquery, Value, Sum
+from django.db.models.functions import Cast, Coalesce
 from django.core.validators import MinValueValidator
+from django.utils import timezone
 from decimal import Decimal
 from datetime import datetime
 
@@ -10,6 +13,107 @@ class EmployeeCategory(models.Model):
     def __str__(self):
         return self.name
 
+# حقل الناتج للمبالغ المحسوبة في قاعدة البيانات
+COST_FIELD = models.DecimalField(max_digits=20, decimal_places=4)
+
+
+def _real(field):
+    """تحويل الحقل إلى عدد عشري لتفادي القسمة الصحيحة في SQLite عندما تخزن المبالغ كأعداد صحيحة"""
+    return Cast(field, output_field=models.FloatField())
+
+
+def allowance_monthly_amount_expression(prefix=''):
+    """تعبير SQL مطابق لـ Allowance.get_monthly_amount"""
+    amount = _real(f'{prefix}amount')
+    frequency = f'{prefix}allowance_type__frequency'
+    custom_months = f'{prefix}allowance_type__custom_months'
+    return Case(
+        When(**{frequency: 'MONTHLY'}, then=amount),
+        When(**{frequency: 'ANNUAL'}, then=amount / 12),
+        When(**{frequency: 'BIENNIAL'}, then=amount / 24),
+        When(Q(**{frequency: 'CUSTOM', f'{custom_months}__gt': 0}), then=amount / _real(custom_months)),
+        default=Value(0.0),
+        output_field=models.FloatField(),
+    )
+
+
+def allowance_annual_amount_expression(prefix=''):
+    """تعبير SQL مطابق لـ Allowance.get_annual_amount"""
+    amount = _real(f'{prefix}amount')
+    frequency = f'{prefix}allowance_type__frequency'
+    custom_months = f'{prefix}allowance_type__custom_months'
+    return Case(
+        When(**{frequency: 'ANNUAL'}, then=amount),
+        When(**{frequency: 'MONTHLY'}, then=amount * 12),
+        When(**{frequency: 'BIENNIAL'}, then=amount / 2),
+        When(Q(**{frequency: 'CUSTOM', f'{custom_months}__gt': 0}), then=amount * 12 / _real(custom_months)),
+        default=amount,
+        output_field=models.FloatField(),
+    )
+
+
+class EmployeeQuerySet(models.QuerySet):
+
+    def _annotate_costs(self, monthly_allowances, annual_allowances):
+        basic_salary = _real('basic_salary')
+        annual_cost = (basic_salary + monthly_allowances) * 12 + annual_allowances
+
+        return self.annotate(
+            monthly_allowances_total=Cast(monthly_allowances, output_field=COST_FIELD),
+            annual_allowances_total=Cast(annual_allowances, output_field=COST_FIELD),
+            monthly_gross=Cast(basic_salary + monthly_allowances, output_field=COST_FIELD),
+            annual_cost=Cast(annual_cost, output_field=COST_FIELD),
+            cost_factor=Cast(
+                Case(
+                    When(basic_salary__gt=0, then=annual_cost / (basic_salary * 12)),
+                    default=Value(0.0),
+                    output_field=models.FloatField(),
+                ),
+                output_field=COST_FIELD,
+            ),
+        )
+
+    def with_costs(self):
+        """
+        إضافة التكاليف المحسوبة كأعمدة من قاعدة البيانات في استعلام واحد بدلاً من استدعاء دوال النموذج لكل موظف:
+        monthly_allowances_total, annual_allowances_total, monthly_gross, annual_cost, cost_factor
+        """
+        return self._annotate_costs(
+            Coalesce(Sum(allowance_monthly_amount_expression('allowances__')), Value(0.0)),
+            Coalesce(Sum(allowance_annual_amount_expression('allowances__')), Value(0.0)),
+        )
+
+    def with_cost_columns(self):
+        """
+        نفس أعمدة with_costs لكن باستعلامات فرعية لكل موظف بدلاً من GROUP BY،
+        فيبقى COUNT(*) للقائمة بسيطاً (يستخدم في لوحة الإدارة مع الترقيم والفلاتر)
+        """
+        def allowances_sum(expression):
+            return Coalesce(
+                Subquery(
+                    Allowance.objects.filter(employee_id=OuterRef('pk'))
+                    .order_by()
+                    .values('employee_id')
+                    .annotate(total=Sum(expression))
+                    .values('total'),
+                    output_field=models.FloatField(),
+                ),
+                Value(0.0),
+            )
+
+        return self._annotate_costs(
+            allowances_sum(allowance_monthly_amount_expression()),
+            allowances_sum(allowance_annual_amount_expression()),
+        )
+
+
+class ActiveEmployeeManager(models.Manager.from_queryset(EmployeeQuerySet)):
+    """الموظفون النشطون فقط (الحذف من الواجهة إلغاء تفعيل)"""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(is_active=True)
+
+
 class Employee(models.Model):
     """نموذج بيانات الموظف"""
 
@@ -51,14 +155,28 @@ class Employee(models.Model):
 
     # معلومات إضافية
     photo = models.ImageField(upload_to='employee_photos/', blank=True, null=True, verbose_name='الصورة')
+    # أسماء الصور المصغرة (انظر employees.thumbnails)
+    photo_thumbnails = models.JSONField(default=dict, blank=True, editable=False, verbose_name='الصور المصغرة')
     is_active = models.BooleanField(default=True, verbose_name='نشط')
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='تاريخ الإنشاء')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='تاريخ التحديث')
 
+    # objects يبقى المدير الافتراضي (لوحة الإدارة والعلاقات تحتاج جميع الموظفين)
+    objects = EmployeeQuerySet.as_manager()
+    active = ActiveEmployeeManager()
+
     class Meta:
         verbose_name = 'موظف'
         verbose_name_plural = 'الموظفين'
         ordering = ['employee_number']
+        # فهارس جزئية للموظفين النشطين فقط، فيبقى حجمها بحجم القوى العاملة الحالية
+        # (رقم الموظف لا يحتاج فهرساً إضافياً لأن القيد unique ينشئ فهرسه)
+        indexes = [
+            models.Index(
+                fields=['category', 'nationality'], condition=Q(is_active=True), name='employee_active_cat_nat_idx'
+            ),
+            models.Index(fields=['hire_date'], condition=Q(is_active=True), name='employee_active_hire_idx'),
+        ]
 
     def __str__(self):
         return f"{self.employee_number} - {self.name}"
@@ -96,13 +214,16 @@ class Employee(models.Model):
             return self.get_annual_total_cost() / (self.basic_salary * 12)
         return 0
 
-    def calculate_training_cost_percentage(self):
-        """حساب تكلفة التدريب كنسبة مئوية من الراتب"""
-        monthly_gross = self.get_monthly_gross_salary()
+    def get_training_cost_rate(self):
+        """نسبة تكلفة التدريب من الراتب الإجمالي حسب الجنسية"""
         if self.nationality.lower() in ['سعودي', 'saudi', 'سعودية']:
-            return monthly_gross * Decimal('0.05')  # 5% للسعوديين
+            return Decimal('0.05')  # 5% للسعوديين
         else:
-            return monthly_gross * Decimal('0.02')  # 2% للأجانب
+            return Decimal('0.02')  # 2% للأجانب
+
+    def calculate_training_cost_percentage(self):
+        """حساب تكلفة التدريب كنسبة مئوية من الراتب"""
+        return self.get_monthly_gross_salary() * self.get_training_cost_rate()
 
     def get_years_of_service(self):
         """حساب عدد سنوات الخدمة"""
@@ -118,10 +239,11 @@ class Employee(models.Model):
         years_of_service = self.get_years_of_service()
         basic_salary = self.basic_salary
 
-        # البدلات النقدية فقط
+        # البدلات النقدية فقط (من allowances.all() لتستفيد من prefetch_related عند استخدامه)
         cash_allowances = sum(
-            allowance.get_monthly_amount() 
-            for allowance in self.allowances.filter(is_active=True, type='CASH')
+            allowance.get_monthly_amount()
+            for allowance in self.allowances.all()
+            if allowance.is_active and allowance.type == 'CASH'
         )
 
         monthly_salary = basic_salary + cash_allowances
@@ -256,4 +378,205 @@ class Allowance(models.Model):
         elif self.allowance_type.frequency == 'CUSTOM' and self.allowance_type.custom_months:
             return (self.amount * 12) / self.allowance_type.custom_months
         else:  # ONE_TIME
-            return self.amount
\ No newline at end of file
+            return self.amount
+
+
+class HistoryQuerySet(models.QuerySet):
+
+    def as_of(self, date):
+        """السجلات السارية في تاريخ معين (effective_from <= date < effective_to)"""
+        return self.filter(
+            Q(effective_to__isnull=True) | Q(effective_to__gt=date),
+            effective_from__lte=date,
+        )
+
+    def current(self):
+        """السجلات المفتوحة (السارية حالياً)"""
+        return self.filter(effective_to__isnull=True)
+
+
+class SalaryHistory(models.Model):
+    """سجل الراتب الأساسي للموظف خلال فترة زمنية"""
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='salary_history', verbose_name='الموظف')
+    basic_salary = models.DecimalField(max_digits=10, decimal_places=2, verbose_name='الراتب الأساسي')
+    effective_from = models.DateField(verbose_name='ساري من')
+    effective_to = models.DateField(null=True, blank=True, verbose_name='ساري حتى (غير شامل)')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='تاريخ الإنشاء')
+
+    objects = HistoryQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'سجل راتب'
+        verbose_name_plural = 'سجل الرواتب'
+        ordering = ['employee', 'effective_from']
+        indexes = [
+            models.Index(fields=['employee', 'effective_from'], name='salary_hist_emp_from_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.employee_id} - {self.basic_salary} ({self.effective_from})"
+
+
+class AllowanceHistory(models.Model):
+    """سجل مبلغ بدل الموظف خلال فترة زمنية"""
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='allowance_history', verbose_name='الموظف')
+    allowance_type = models.ForeignKey(AllowanceType, on_delete=models.CASCADE, verbose_name='نوع البدل')
+    amount = models.DecimalField(max_digits=10, decimal_places=2, verbose_name='المبلغ')
+    effective_from = models.DateField(verbose_name='ساري من')
+    effective_to = models.DateField(null=True, blank=True, verbose_name='ساري حتى (غير شامل)')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='تاريخ الإنشاء')
+
+    objects = HistoryQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'سجل بدل'
+        verbose_name_plural = 'سجل البدلات'
+        ordering = ['employee', 'allowance_type', 'effective_from']
+        indexes = [
+            models.Index(fields=['employee', 'effective_from'], name='allowance_hist_emp_from_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.employee_id} - {self.allowance_type_id} - {self.amount} ({self.effective_from})"
+
+
+class MonthlyCostRollup(models.Model):
+    """
+    ملخص التكاليف لكل شهر حسب الفئة والجنسية (يبنى بأمر build_cost_rollups)
+    القيم محسوبة من سجل الرواتب والبدلات كما كانت في آخر يوم من الشهر
+    """
+    month = models.DateField(verbose_name='الشهر')
+    category = models.ForeignKey(EmployeeCategory, on_delete=models.SET_NULL, null=True, blank=True, verbose_name='الفئة')
+    nationality = models.CharField(max_length=100, verbose_name='الجنسية')
+    headcount = models.PositiveIntegerField(default=0, verbose_name='عدد الموظفين')
+    total_basic_salary = models.DecimalField(max_digits=20, decimal_places=4, default=0, verbose_name='إجمالي الرواتب الأساسية')
+    total_monthly_allowances = models.DecimalField(max_digits=20, decimal_places=4, default=0, verbose_name='إجمالي البدلات الشهرية')
+    total_monthly_gross = models.DecimalField(max_digits=20, decimal_places=4, default=0, verbose_name='إجمالي الرواتب الشهرية')
+    total_annual_cost = models.DecimalField(max_digits=20, decimal_places=4, default=0, verbose_name='التكلفة السنوية المكافئة')
+    computed_at = models.DateTimeField(auto_now=True, verbose_name='تاريخ الحساب')
+
+    class Meta:
+        verbose_name = 'ملخص تكلفة شهري'
+        verbose_name_plural = 'ملخصات التكلفة الشهرية'
+        ordering = ['month', 'category', 'nationality']
+        indexes = [
+            models.Index(fields=['month'], name='cost_rollup_month_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.month:%Y-%m} - {self.category_id} - {self.nationality}"
+
+class DataVersion(models.Model):
+    """
+    رقم إصدار بيانات التقارير (سجل واحد)
+    يزداد مع كل تعديل على الموظفين أو البدلات أو الفئات، ويستخدم لبناء ETag للتقارير
+    """
+    version = models.PositiveBigIntegerField(default=0, verbose_name='رقم الإصدار')
+    updated_at = models.DateTimeField(default=timezone.now, verbose_name='آخر تعديل')
+
+    class Meta:
+        verbose_name = 'إصدار البيانات'
+        verbose_name_plural = 'إصدارات البيانات'
+
+    def __str__(self):
+        return f"{self.version} ({self.updated_at:%Y-%m-%d %H:%M:%S})"
+
+    @classmethod
+    def current(cls):
+        """
+        الإصدار الحالي للبيانات من قاعدة القراءة الحالية (نسخة التقارير داخل replica_reads)
+        حتى يطابق البيانات المعروضة، لأن get_or_create تقرأ من default دائماً
+        """
+        obj = cls.objects.filter(pk=1).first()
+        if obj is None:
+            obj, _ = cls.objects.get_or_create(pk=1)
+        return obj
+
+    @classmethod
+    def bump(cls):
+        """زيادة رقم الإصدار بعد أي تعديل يؤثر على التقارير"""
+        updated = cls.objects.filter(pk=1).update(version=F('version') + 1, updated_at=timezone.now())
+        if not updated:
+            cls.objects.get_or_create(pk=1, defaults={'version': 1})
+
+
+class ArchivedEmployee(models.Model):
+    """
+    موظف مؤرشف: نسخة من موظف غير نشط منذ مدة طويلة بعد حذفه من جدول الموظفين
+    (انظر أمر archive_inactive_employees). سجل الراتب والبدلات محفوظ كما هو في حقول JSON
+    """
+    original_id = models.PositiveIntegerField(verbose_name='رقم السجل الأصلي')
+    employee_number = models.CharField(max_length=20, verbose_name='رقم الموظف')
+    name = models.CharField(max_length=200, verbose_name='الاسم')
+    nationality = models.CharField(max_length=100, verbose_name='الجنسية')
+    hire_date = models.DateField(verbose_name='تاريخ التوظيف')
+    id_number = models.CharField(max_length=50, verbose_name='رقم الهوية/الإقامة')
+    category = models.ForeignKey(EmployeeCategory, on_delete=models.SET_NULL, null=True, blank=True, verbose_name='الفئة')
+    basic_salary = models.DecimalField(max_digits=10, decimal_places=2, verbose_name='آخر راتب أساسي')
+    insurance_type = models.CharField(max_length=20, verbose_name='نوع التأمين الطبي')
+    num_wives = models.PositiveIntegerField(default=0, verbose_name='عدد الزوجات')
+    num_children = models.PositiveIntegerField(default=0, verbose_name='عدد الأبناء')
+    recruitment_cost = models.DecimalField(max_digits=10, decimal_places=2, default=0, verbose_name='تكلفة الاستقدام')
+    training_cost = models.DecimalField(max_digits=10, decimal_places=2, default=0, verbose_name='تكلفة التدريب')
+    ticket_type = models.CharField(max_length=20, verbose_name='نوع التذكرة')
+    family_ticket_cost = models.DecimalField(max_digits=10, decimal_places=2, default=0, verbose_name='تكلفة التذاكر العائلية')
+    photo = models.CharField(max_length=255, blank=True, verbose_name='الصورة')
+    created_at = models.DateTimeField(verbose_name='تاريخ الإنشاء')
+    deactivated_at = models.DateTimeField(verbose_name='تاريخ آخر تحديث (إلغاء التفعيل)')
+    salary_history = models.JSONField(default=list, blank=True, verbose_name='سجل الرواتب')
+    allowance_history = models.JSONField(default=list, blank=True, verbose_name='سجل البدلات')
+    archived_at = models.DateTimeField(default=timezone.now, verbose_name='تاريخ الأرشفة')
+
+    class Meta:
+        verbose_name = 'موظف مؤرشف'
+        verbose_name_plural = 'الموظفون المؤرشفون'
+        ordering = ['employee_number']
+        indexes = [
+            models.Index(fields=['employee_number'], name='archived_employee_number_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.employee_number} - {self.name}"
+
+
+class ArchivedAllowance(models.Model):
+    """بدل موظف مؤرشف"""
+    employee = models.ForeignKey(ArchivedEmployee, on_delete=models.CASCADE, related_name='allowances', verbose_name='الموظف')
+    # الأرشيف لا يحذف ضمنياً: لا يمكن حذف نوع بدل ما زالت بدلات مؤرشفة تشير إليه
+    allowance_type = models.ForeignKey(AllowanceType, on_delete=models.PROTECT, verbose_name='نوع البدل')
+    amount = models.DecimalField(max_digits=10, decimal_places=2, verbose_name='المبلغ')
+    type = models.CharField(max_length=10, choices=Allowance.ALLOWANCE_TYPE_CHOICES, default='CASH', verbose_name='طبيعة البدل')
+    notes = models.TextField(blank=True, verbose_name='ملاحظات')
+    is_active = models.BooleanField(default=True, verbose_name='نشط')
+    created_at = models.DateTimeField(verbose_name='تاريخ الإنشاء')
+
+    class Meta:
+        verbose_name = 'بدل مؤرشف'
+        verbose_name_plural = 'البدلات المؤرشفة'
+
+    def __str__(self):
+        return f"{self.employee_id} - {self.allowance_type_id}"
+
+
+class EmployeeImport(models.Model):
+    """
+    سجل عمليات استيراد الموظفين مع بصمة الملف (SHA-256)، يستخدم لتخطي إعادة رفع نفس الملف
+    إذا لم تتغير البيانات بعده (رقم إصدار البيانات كما هو)
+    """
+    file_hash = models.CharField(max_length=64, db_index=True, verbose_name='بصمة الملف')
+    file_name = models.CharField(max_length=255, blank=True, verbose_name='اسم الملف')
+    data_version = models.PositiveBigIntegerField(verbose_name='إصدار البيانات بعد الاستيراد')
+    created_count = models.PositiveIntegerField(default=0, verbose_name='موظفون جدد')
+    updated_count = models.PositiveIntegerField(default=0, verbose_name='موظفون معدلون')
+    unchanged_count = models.PositiveIntegerField(default=0, verbose_name='موظفون بدون تغيير')
+    allowances_count = models.PositiveIntegerField(default=0, verbose_name='بدلات مكتوبة')
+    error_count = models.PositiveIntegerField(default=0, verbose_name='عدد الأخطاء')
+    imported_at = models.DateTimeField(default=timezone.now, verbose_name='تاريخ الاستيراد')
+
+    class Meta:
+        verbose_name = 'عملية استيراد'
+        verbose_name_plural = 'عمليات الاستيراد'
+        ordering = ['-imported_at']
+
+    def __str__(self):
+        return f"{self.file_name} ({self.imported_at:%Y-%m-%d %H:%M})"
@@ -0,0 +1,55 @@
+"""
+ترقيم صفحات للجداول الكبيرة دون تشغيل COUNT(*) كامل مع كل طلب
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+from .models import DataVersion
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    - بدون فلاتر على PostgreSQL: العدد التقريبي من إحصاءات الجدول (pg_class.reltuples)
+      إذا تجاوز ESTIMATED_COUNT_THRESHOLD
+    - غير ذلك: COUNT(*) مخزن مؤقتاً حسب نص الاستعلام ورقم إصدار البيانات،
+      فلا يعاد حسابه عند التنقل بين الصفحات أو تكرار نفس الفلتر
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not hasattr(queryset, 'query'):
+            return super().count
+
+        estimate = self._estimated_count(queryset)
+        if estimate is not None:
+            return estimate
+
+        try:
+            sql = str(queryset.query)
+        except EmptyResultSet:
+            return 0
+        key = 'paginator_count:{}:{}'.format(
+            hashlib.md5(sql.encode()).hexdigest(),
+            DataVersion.current().version,
+        )
+        return cache.get_or_set(key, queryset.count, getattr(settings, 'PAGINATOR_COUNT_CACHE_TIMEOUT', 300))
+
+    def _estimated_count(self, queryset):
+        connection = connections[queryset.db]
+        if queryset.query.where or connection.vendor != 'postgresql':
+            return None
+
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT reltuples FROM pg_class WHERE relname = %s', [queryset.model._meta.db_table])
+            row = cursor.fetchone()
+        threshold = getattr(settings, 'ESTIMATED_COUNT_THRESHOLD', 10000)
+        if row and row[0] >= threshold:
+            return int(row[0])
+        return None
@@ -0,0 +1,234 @@
+"""
+تحليل أداء الطلب للمستخدمين الإداريين (is_staff)
+
+يفعل لطلب واحد بالمعامل ?_profile=flame أو ?_profile=cprofile، أو بالترويسة X-Profile:
+- flame: عينات من مكدس الاستدعاءات كل PROFILING_SAMPLE_INTERVAL ثانية بصيغة folded stacks
+  (تفتح في speedscope.app أو flamegraph.pl أو inferno)
+- cprofile: تحليل حتمي بـ cProfile بصيغة pstats (يفتح في snakeviz)
+
+مع كل تحليل تسجل جميع استعلامات SQL بأزمنتها، مع الاستعلامات المكررة والمتشابهة (N+1).
+تسجل استعلامات خيط الطلب وعيناته فقط (ما ينفذ في خيوط gather_queries يظهر في العينات كانتظار دون SQL).
+يحفظ الملف والتقرير في PROFILING_DIR. مع المعامل يعاد التقرير بدلاً من الصفحة،
+ومع الترويسة تعاد الصفحة كما هي مع ترويسات Server-Timing و X-Profile-Id.
+عند عدم الطلب لا يضيف الوسيط سوى فحص المعامل والترويسة، و PROFILING_ENABLED = False يزيله تماماً
+(القيمة الافتراضية تتبع DEBUG، فلا يفعل في الإنتاج إلا بضبط المتغير صراحة)
+"""
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import ExitStack
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import HttpResponse
+
+PROFILE_PARAM = '_profile'
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+PROFILE_MODES = ('flame', 'cprofile')
+
+
+class QueryCounter:
+    """عداد استعلامات يعمل عبر execute_wrapper دون تخزين نصوص الاستعلامات"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class QueryRecorder:
+    """تسجيل استعلامات SQL بأزمنتها عبر connection.execute_wrapper"""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((context['connection'].alias, sql, params, time.perf_counter() - start))
+
+    @property
+    def total_time(self):
+        return sum(duration for *_, duration in self.queries)
+
+    def _grouped(self, key):
+        counts = Counter()
+        durations = Counter()
+        for alias, sql, params, duration in self.queries:
+            counts[key(sql, params)] += 1
+            durations[key(sql, params)] += duration
+        return [(counts[k], durations[k], k) for k in counts if counts[k] > 1]
+
+    def duplicates(self):
+        """نفس الاستعلام بنفس المعاملات أكثر من مرة"""
+        return sorted(self._grouped(lambda sql, params: (sql, repr(params))), reverse=True)
+
+    def similar(self):
+        """نفس نص الاستعلام بمعاملات مختلفة (مؤشر على N+1)"""
+        return sorted(self._grouped(lambda sql, params: (sql, '')), reverse=True)
+
+
+class StackSampler:
+    """عينات دورية من مكدس استدعاءات خيط واحد (خيط الطلب المحلل)"""
+
+    def __init__(self, interval, thread_id):
+        self.interval = interval
+        self.thread_id = thread_id
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='profiling-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        # خيوط الطلبات الأخرى المتزامنة لا تدخل في العينات
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})')
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def folded(self):
+        return '\n'.join(f'{stack} {count}' for stack, count in self.stacks.most_common()) + '\n'
+
+    def top_functions(self, limit=25):
+        """الدوال الأكثر ظهوراً في أعلى المكدس"""
+        leaves = Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack.rsplit(';', 1)[-1]] += count
+        return leaves.most_common(limit)
+
+
+def _short_path(filename):
+    for prefix in sorted({str(settings.BASE_DIR), *sys.path}, key=len, reverse=True):
+        if prefix and filename.startswith(prefix + os.sep):
+            return filename[len(prefix) + 1:]
+    return filename
+
+
+class ProfilingMiddleware:
+    """وسيط تحليل الأداء، يضاف بعد AuthenticationMiddleware"""
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'PROFILING_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        mode = request.GET.get(PROFILE_PARAM) or request.META.get(PROFILE_HEADER)
+        if not mode or not request.user.is_staff:
+            return self.get_response(request)
+        return self._profile(request, mode if mode in PROFILE_MODES else 'flame')
+
+    def _profile(self, request, mode):
+        recorder = QueryRecorder()
+        if mode == 'cprofile':
+            profiler = cProfile.Profile()
+            start_profiler, stop_profiler = profiler.enable, profiler.disable
+        else:
+            profiler = StackSampler(getattr(settings, 'PROFILING_SAMPLE_INTERVAL', 0.002), threading.get_ident())
+            start_profiler, stop_profiler = profiler.start, profiler.stop
+
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            start_profiler()
+            try:
+                response = self.get_response(request)
+                # الاستجابات المتدفقة تبنى أثناء القراءة، فتقرأ داخل التحليل
+                if response.streaming:
+                    response.streaming_content = [b''.join(response.streaming_content)]
+            finally:
+                stop_profiler()
+        elapsed = time.perf_counter() - start
+
+        profile_id = f'{time.strftime("%Y%m%d-%H%M%S")}-{uuid.uuid4().hex[:8]}'
+        directory = Path(getattr(settings, 'PROFILING_DIR', settings.BASE_DIR / 'profiles'))
+        directory.mkdir(parents=True, exist_ok=True)
+        if mode == 'cprofile':
+            profile_path = directory / f'{profile_id}.prof'
+            profiler.dump_stats(profile_path)
+        else:
+            profile_path = directory / f'{profile_id}.folded'
+            profile_path.write_text(profiler.folded(), encoding='utf-8')
+
+        report = _build_report(request, response, mode, profiler, recorder, elapsed, profile_path)
+        (directory / f'{profile_id}.txt').write_text(report, encoding='utf-8')
+
+        if request.GET.get(PROFILE_PARAM):
+            return HttpResponse(report, content_type='text/plain; charset=utf-8')
+
+        response['X-Profile-Id'] = profile_id
+        response['Server-Timing'] = (
+            f'total;dur={elapsed * 1000:.1f}, '
+            f'sql;dur={recorder.total_time * 1000:.1f};desc="{len(recorder.queries)} queries"'
+        )
+        return response
+
+
+def _ms(seconds):
+    return f'{seconds * 1000:.1f} ms'
+
+
+def _build_report(request, response, mode, profiler, recorder, elapsed, profile_path):
+    sql_time = recorder.total_time
+    lines = [
+        f'الطلب: {request.method} {request.get_full_path()}',
+        f'الحالة: {response.status_code}',
+        f'الوقت الكلي: {_ms(elapsed)}',
+        f'SQL: {_ms(sql_time)} في {len(recorder.queries)} استعلام ({sql_time / elapsed:.0%} من الوقت)' if elapsed else '',
+        f'ملف التحليل ({mode}): {profile_path}',
+        '',
+    ]
+
+    duplicates = recorder.duplicates()
+    lines.append(f'الاستعلامات المكررة (نفس النص والمعاملات): {len(duplicates)}')
+    for count, duration, (sql, params) in duplicates:
+        lines.append(f'  {count}× {_ms(duration)}  {sql}  {params}')
+
+    similar = recorder.similar()
+    lines.append('')
+    lines.append(f'الاستعلامات المتشابهة (N+1 محتمل): {len(similar)}')
+    for count, duration, (sql, _) in similar:
+        lines.append(f'  {count}× {_ms(duration)}  {sql}')
+
+    lines.append('')
+    lines.append('جميع الاستعلامات:')
+    for number, (alias, sql, params, duration) in enumerate(recorder.queries, 1):
+        lines.append(f'  {number}. [{alias}] {_ms(duration)}  {sql}  {params!r}')
+
+    lines.append('')
+    if mode == 'cprofile':
+        lines.append('الدوال حسب الوقت التراكمي:')
+        output = io.StringIO()
+        pstats.Stats(profiler, stream=output).sort_stats('cumulative').print_stats(40)
+        lines.append(output.getvalue())
+    else:
+        total = sum(profiler.stacks.values())
+        lines.append(f'الدوال الأكثر ظهوراً في العينات ({total} عينة):')
+        for function, count in profiler.top_functions():
+            lines.append(f'  {count / total:6.1%}  {function}')
+
+    return '\n'.join(lines) + '\n'
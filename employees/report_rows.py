@@ -0,0 +1,62 @@
+"""
+صفوف التقارير المحسوبة مسبقاً
+
+تبنى الصفوف في مرور واحد على استعلام محمل بالتكاليف (Employee.objects.with_costs)
+حتى لا تستدعي القوالب دوال النموذج التي تنفذ استعلامات لكل موظف
+"""
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+
+from .streaming import STREAM_BATCH_SIZE
+
+
+@dataclass(frozen=True, slots=True)
+class ReportRow:
+    """صف تقرير للقراءة فقط"""
+    pk: int
+    employee_number: str
+    name: str
+    nationality: str
+    category_name: str
+    hire_date: date
+    basic_salary: Decimal
+    recruitment_cost: Decimal
+    monthly_allowances: Decimal
+    monthly_gross: Decimal
+    annual_cost: Decimal
+    cost_factor: Decimal
+
+    @classmethod
+    def from_employee(cls, employee):
+        """إنشاء الصف من موظف محمل بـ with_costs و select_related('category')"""
+        return cls(
+            pk=employee.pk,
+            employee_number=employee.employee_number,
+            name=employee.name,
+            nationality=employee.nationality,
+            category_name=employee.category.name if employee.category else '',
+            hire_date=employee.hire_date,
+            basic_salary=employee.basic_salary,
+            recruitment_cost=employee.recruitment_cost,
+            monthly_allowances=employee.monthly_allowances_total,
+            monthly_gross=employee.monthly_gross,
+            annual_cost=employee.annual_cost,
+            cost_factor=employee.cost_factor,
+        )
+
+
+def report_rows_queryset(employees):
+    """إضافة التكاليف والفئة للاستعلام المطلوب عرضه"""
+    return employees.with_costs().select_related('category')
+
+
+def build_report_rows(employees):
+    """بناء جميع صفوف التقرير في استعلام واحد"""
+    return [ReportRow.from_employee(employee) for employee in report_rows_queryset(employees)]
+
+
+def iter_report_rows(employees, chunk_size=STREAM_BATCH_SIZE):
+    """بناء صفوف التقرير تدريجياً دون تحميل جميع الموظفين في الذاكرة"""
+    for employee in report_rows_queryset(employees).iterator(chunk_size=chunk_size):
+        yield ReportRow.from_employee(employee)
@@ -1,23 +1,41 @@
 """
 نظام تقارير متقدم مطابق لملف Excel
 """
-from django.db.models import Sum, Count, Avg, Q
+from django.db.models import Sum, Count, Avg, Q, Prefetch
 from django.utils import timezone
 from decimal import Decimal
 from collections import defaultdict, OrderedDict
+from datetime import date
 import json
 
 from .models import Employee, Allowance, AllowanceType
 from django.db.models import Count, Sum, Avg
 from employees.models import EmployeeCategory
+from .history import company_cost_as_of, first_recorded_salaries
+from .rollups import monthly_cost_trends
 
 
 class AdvancedReportsGenerator:
     """مولد التقارير المتقدمة"""
     
     def __init__(self, queryset=None):
-        self.employees = queryset or Employee.objects.filter(is_active=True)
-    
+        self.employees = queryset if queryset is not None else Employee.active.all()
+        self._first_salaries = None
+        self._cost_rows = None
+
+    def _employees_with_costs(self):
+        """
+        الموظفون مع التكاليف المحسوبة من قاعدة البيانات (with_costs) والفئة والبدلات بأنواعها،
+        تجلب مرة واحدة وتستخدم في جميع التقارير بدلاً من استدعاء دوال النموذج لكل موظف
+        """
+        if self._cost_rows is None:
+            self._cost_rows = list(
+                self.employees.with_costs()
+                .select_related('category')
+                .prefetch_related(Prefetch('allowances', queryset=Allowance.objects.select_related('allowance_type')))
+                .order_by('employee_number')
+            )
+        return self._cost_rows
 
     def generate_summary_by_category(self):
         """تقرير ملخص حسب الفئة - مطابق لورقة BY CATEGORY"""
@@ -55,6 +73,7 @@ class AdvancedReportsGenerator:
     def generate_summary_by_nationality(self):
         """تقرير ملخص حسب الجنسية - مطابق لتجميع البيانات بالجنسية"""
         nationalities = {}
+        total_employees = self.employees.count()
         nationality_totals = self.employees.values('nationality').annotate(
             total_count=Count('id'),
             total_basic_salary=Sum('basic_salary'),
@@ -67,7 +86,7 @@ class AdvancedReportsGenerator:
                 'total_employees': nat['total_count'],
                 'total_basic_salary': float(nat['total_basic_salary'] or 0),
                 'average_salary': float(nat['avg_salary'] or 0),
-                'percentage': round((nat['total_count'] / self.employees.count() * 100), 2) if self.employees.count() > 0 else 0
+                'percentage': round((nat['total_count'] / total_employees * 100), 2) if total_employees > 0 else 0
             }
         
         return nationalities
@@ -76,13 +95,7 @@ class AdvancedReportsGenerator:
         """تقرير مفصل للموظفين - مطابق للبيانات الأساسية في Excel"""
         detailed_report = []
         
-        for employee in self.employees.order_by('employee_number'):
-            # حساب البدلات
-            monthly_allowances = employee.get_total_monthly_allowances()
-            annual_allowances = employee.get_annual_allowances()
-            monthly_gross = employee.get_monthly_gross_salary()
-            annual_cost = employee.get_annual_total_cost()
-            
+        for employee in self._employees_with_costs():
             # حساب سنوات الخدمة
             years_of_service = employee.get_years_of_service()
             
@@ -90,7 +103,7 @@ class AdvancedReportsGenerator:
             eos_data = employee.calculate_end_of_service_benefit()
             
             # حساب تكلفة التدريب
-            training_cost_percentage = employee.calculate_training_cost_percentage()
+            training_cost_percentage = employee.monthly_gross * employee.get_training_cost_rate()
             
             # حساب تكلفة التذاكر العائلية
             family_ticket_data = employee.calculate_family_ticket_cost()
@@ -98,16 +111,17 @@ class AdvancedReportsGenerator:
             detailed_report.append({
                 'employee_number': employee.employee_number,
                 'name': employee.name,
-                'category': employee.category.name,
+                'category': employee.category.name if employee.category else '',
                 'nationality': employee.nationality,
                 'hire_date': employee.hire_date.strftime('%d/%m/%Y'),
                 'basic_salary': float(employee.basic_salary),
-                'monthly_allowances': float(monthly_allowances),
-                'monthly_gross': float(monthly_gross),
-                'annual_cost': float(annual_cost),
+                'monthly_allowances': float(employee.monthly_allowances_total),
+                'monthly_gross': float(employee.monthly_gross),
+                'annual_cost': float(employee.annual_cost),
                 'years_of_service': years_of_service,
+                'salary_increase_percentage': self._calculate_salary_increases(employee),
                 'insurance_type': employee.get_insurance_type_display(),
-                'cost_factor': float(employee.get_cost_factor()),
+                'cost_factor': float(employee.cost_factor),
                 'efficiency_ratio': self._calculate_efficiency_ratio(employee),
                 'eos_total': float(eos_data['total_amount']),
                 'training_cost_percentage': float(training_cost_percentage),
@@ -126,34 +140,38 @@ class AdvancedReportsGenerator:
             return {
                 'summary': {},
                 'cost_breakdown': {},
-                'trends': {}
+                'trends': monthly_cost_trends()
             }
         
+        employees = self._employees_with_costs()
+
         # الإجماليات العامة
-        total_basic_salary = sum(emp.basic_salary for emp in self.employees)
-        total_monthly_cost = sum(emp.get_monthly_gross_salary() for emp in self.employees)
-        total_annual_cost = sum(emp.get_annual_total_cost() for emp in self.employees)
-        average_cost_factor = sum(emp.get_cost_factor() for emp in self.employees) / total_employees
+        total_basic_salary = sum(emp.basic_salary for emp in employees)
+        total_monthly_cost = sum(emp.monthly_gross for emp in employees)
+        total_annual_cost = sum(emp.annual_cost for emp in employees)
+        average_cost_factor = sum(emp.cost_factor for emp in employees) / total_employees
         
         # تفصيل التكاليف
         cost_breakdown = {
             'basic_salaries': float(total_basic_salary),
             'monthly_allowances': float(total_monthly_cost - total_basic_salary),
-            'annual_allowances': float(sum(emp.get_annual_allowances() for emp in self.employees)),
-            'recruitment_costs': float(sum(emp.recruitment_cost for emp in self.employees)),
-            'training_costs': float(sum(emp.training_cost for emp in self.employees)),
+            'annual_allowances': float(sum(emp.annual_allowances_total for emp in employees)),
+            'recruitment_costs': float(sum(emp.recruitment_cost for emp in employees)),
+            'training_costs': float(sum(emp.training_cost for emp in employees)),
         }
         
         # تحليل حسب الفئات باستخدام جدول EmployeeCategory
-        category_analysis = {}
+        category_employees = defaultdict(list)
+        for emp in employees:
+            category_employees[emp.category_id].append(emp)
 
-        categories = EmployeeCategory.objects.all()
-        for category in categories:
-            cat_employees = self.employees.filter(category=category)
-            if cat_employees.exists():
-                count = cat_employees.count()
-                total_cost = sum(emp.get_annual_total_cost() for emp in cat_employees)
-                average_cost = total_cost / count if count else 0
+        category_analysis = {}
+        for category in EmployeeCategory.objects.all():
+            cat_employees = category_employees.get(category.pk)
+            if cat_employees:
+                count = len(cat_employees)
+                total_cost = sum(emp.annual_cost for emp in cat_employees)
+                average_cost = total_cost / count
 
                 category_analysis[category.name] = {
                     'count': count,
@@ -175,7 +193,9 @@ class AdvancedReportsGenerator:
             },
             'cost_breakdown': cost_breakdown,
             'category_analysis': category_analysis,
-            'efficiency_metrics': self._calculate_efficiency_metrics()
+            'efficiency_metrics': self._calculate_efficiency_metrics(),
+            # اتجاه التكلفة الشهرية للشركة من جدول الملخصات (build_cost_rollups)
+            'trends': monthly_cost_trends()
         }
     
     def generate_salary_distribution_report(self):
@@ -188,16 +208,26 @@ class AdvancedReportsGenerator:
             (10000, float('inf'), 'أكثر من 10,000')
         ]
         
-        distribution = {}
+        # عدد الموظفين في كل فئة رواتب باستعلام واحد
+        range_filters = {}
         for min_sal, max_sal, label in salary_ranges:
             if max_sal == float('inf'):
-                count = self.employees.filter(basic_salary__gte=min_sal).count()
+                range_filters[label] = Q(basic_salary__gte=min_sal)
             else:
-                count = self.employees.filter(basic_salary__gte=min_sal, basic_salary__lt=max_sal).count()
-            
+                range_filters[label] = Q(basic_salary__gte=min_sal, basic_salary__lt=max_sal)
+
+        counts = self.employees.aggregate(
+            total=Count('id'),
+            **{f'range_{idx}': Count('id', filter=range_filter) for idx, range_filter in enumerate(range_filters.values())}
+        )
+        total_employees = counts['total']
+
+        distribution = {}
+        for idx, label in enumerate(range_filters):
+            count = counts[f'range_{idx}']
             distribution[label] = {
                 'count': count,
-                'percentage': round((count / self.employees.count() * 100), 2) if self.employees.count() > 0 else 0
+                'percentage': round((count / total_employees * 100), 2) if total_employees > 0 else 0
             }
         
         return distribution
@@ -206,25 +236,29 @@ class AdvancedReportsGenerator:
         """تقرير ملخص البدلات"""
         allowances_summary = {}
         
-        # تجميع البدلات حسب النوع
-        for allowance_type in AllowanceType.objects.filter(is_active=True):
-            allowances = Allowance.objects.filter(
-                allowance_type=allowance_type,
-                employee__in=self.employees,
-                is_active=True
-            )
-            
-            total_amount = sum(a.amount for a in allowances)
-            employee_count = allowances.count()
-            
-            if employee_count > 0:
-                allowances_summary[allowance_type.name_arabic] = {
-                    'total_amount': float(total_amount),
-                    'employee_count': employee_count,
-                    'average_amount': float(total_amount / employee_count),
-                    'frequency': allowance_type.frequency,
-                    'percentage_of_employees': round((employee_count / self.employees.count() * 100), 2)
-                }
+        # تجميع البدلات حسب النوع في استعلام واحد
+        allowance_totals = Allowance.objects.filter(
+            allowance_type__is_active=True,
+            employee__in=self.employees,
+            is_active=True
+        ).values(
+            'allowance_type', 'allowance_type__name_arabic', 'allowance_type__frequency'
+        ).annotate(
+            total_amount=Sum('amount'),
+            employee_count=Count('id')
+        ).order_by('allowance_type__name_arabic')
+
+        total_employees = self.employees.count()
+        for totals in allowance_totals:
+            total_amount = totals['total_amount'] or 0
+            employee_count = totals['employee_count']
+            allowances_summary[totals['allowance_type__name_arabic']] = {
+                'total_amount': float(total_amount),
+                'employee_count': employee_count,
+                'average_amount': float(total_amount / employee_count),
+                'frequency': totals['allowance_type__frequency'],
+                'percentage_of_employees': round((employee_count / total_employees * 100), 2)
+            }
         
         return allowances_summary
     
@@ -237,22 +271,50 @@ class AdvancedReportsGenerator:
         return years
     
     def _calculate_salary_increases(self, employee):
-        """حساب زيادات الراتب (افتراضي - يمكن تطويره)"""
-        # هذا مجرد مثال - يمكن ربطه بنظام تتبع الزيادات
-        years_of_service = self._calculate_years_of_service(employee.hire_date)
-        estimated_increases = years_of_service * 0.05  # افتراض زيادة 5% سنوياً
-        return round(estimated_increases * 100, 2)
+        """نسبة الزيادة في الراتب الأساسي منذ أول راتب مسجل في سجل الرواتب"""
+        if self._first_salaries is None:
+            self._first_salaries = first_recorded_salaries(self.employees)
+
+        first_salary = self._first_salaries.get(employee.pk)
+        if not first_salary:
+            return 0
+        return round(float((employee.basic_salary - first_salary) / first_salary * 100), 2)
+
+    def generate_year_over_year_report(self, years=5):
+        """مقارنة التكلفة في نهاية كل سنة (والسنة الحالية حتى اليوم) من سجل الرواتب والبدلات"""
+        today = timezone.localdate()
+        dates = [date(year, 12, 31) for year in range(today.year - years + 1, today.year)] + [today]
+
+        report = []
+        previous = None
+        for as_of in dates:
+            totals = company_cost_as_of(as_of, self.employees)
+            annual_cost = float(totals['total_annual_cost'])
+            change = None
+            if previous:
+                change = round((annual_cost - previous) / previous * 100, 2)
+            report.append({
+                'date': as_of.strftime('%Y-%m-%d'),
+                'total_employees': totals['total_employees'],
+                'total_basic_salary': float(totals['total_basic_salary']),
+                'total_monthly_cost': float(totals['total_monthly_cost']),
+                'total_annual_cost': annual_cost,
+                'change_percentage': change,
+            })
+            previous = annual_cost
+
+        return report
     
     def _calculate_efficiency_ratio(self, employee):
-        """حساب نسبة الكفاءة"""
-        annual_cost = employee.get_annual_total_cost()
+        """حساب نسبة الكفاءة لموظف محمل بالتكاليف المحسوبة (with_costs)"""
+        annual_cost = employee.annual_cost
         if annual_cost > 0:
             return float(employee.basic_salary * 12 / annual_cost)
         return 0
     
     def _calculate_efficiency_metrics(self):
         """حساب مقاييس الكفاءة العامة"""
-        efficiency_ratios = [self._calculate_efficiency_ratio(emp) for emp in self.employees]
+        efficiency_ratios = [self._calculate_efficiency_ratio(emp) for emp in self._employees_with_costs()]
         
         if not efficiency_ratios:
             return {}
@@ -274,6 +336,7 @@ class AdvancedReportsGenerator:
             'cost_analysis': self.generate_cost_analysis_report(),
             'salary_distribution': self.generate_salary_distribution_report(),
             'allowances_summary': self.generate_allowances_summary(),
+            'year_over_year': self.generate_year_over_year_report(),
             'generated_at': timezone.now().strftime('%Y-%m-%d %H:%M:%S')
         }
 
@@ -0,0 +1,153 @@
+"""
+بناء ملخصات التكلفة الشهرية (MonthlyCostRollup) من سجل الرواتب والبدلات
+
+تعديلات الواجهة تسجل من تاريخ اليوم فلا تغير الأشهر المنتهية، لذا يكفي عادة حساب
+الشهر الحالي والأشهر التي لم تحسب بعد. أما السجلات المضافة بأثر رجعي (موظف جديد بتاريخ
+توظيف سابق من الاستيراد أو البيانات التجريبية) فيعاد حساب الأشهر من أول شهر تأثر بها،
+ويعرف ذلك بمقارنة created_at للسجل مع computed_at لملخصات الشهر.
+إعادة حساب شهر بعد الأرشفة تسقط منه الموظفين المؤرشفين كما في --rebuild
+"""
+import calendar
+from datetime import date
+
+from django.db import transaction
+from django.db.models import Count, Min, Q, Sum
+from django.utils import timezone
+
+from .history import cost_rows_as_of
+from .models import AllowanceHistory, MonthlyCostRollup, SalaryHistory
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def month_end(month):
+    return month.replace(day=calendar.monthrange(month.year, month.month)[1])
+
+
+def previous_month(month):
+    if month.month == 1:
+        return date(month.year - 1, 12, 1)
+    return date(month.year, month.month - 1, 1)
+
+
+def next_month(month):
+    if month.month == 12:
+        return date(month.year + 1, 1, 1)
+    return date(month.year, month.month + 1, 1)
+
+
+def iter_months(first, last):
+    month = month_start(first)
+    while month <= last:
+        yield month
+        month = next_month(month)
+
+
+def first_history_month():
+    """أول شهر يوجد له سجل رواتب"""
+    first = SalaryHistory.objects.aggregate(first=Min('effective_from'))['first']
+    return month_start(first) if first else None
+
+
+def build_month(month):
+    """إعادة حساب ملخصات شهر واحد (حتى اليوم للشهر الحالي) وإرجاع عدد الصفوف"""
+    as_of = min(month_end(month), timezone.localdate())
+
+    groups = cost_rows_as_of(as_of).values('employee__category', 'employee__nationality').annotate(
+        headcount=Count('id'),
+        basic=Sum('basic_salary'),
+        allowances=Sum('monthly_allowances_total'),
+        gross=Sum('monthly_gross'),
+        annual=Sum('annual_cost'),
+    ).order_by()
+
+    rollups = [
+        MonthlyCostRollup(
+            month=month,
+            category_id=group['employee__category'],
+            nationality=group['employee__nationality'],
+            headcount=group['headcount'],
+            total_basic_salary=group['basic'] or 0,
+            total_monthly_allowances=group['allowances'] or 0,
+            total_monthly_gross=group['gross'] or 0,
+            total_annual_cost=group['annual'] or 0,
+        )
+        for group in groups
+    ]
+
+    with transaction.atomic():
+        MonthlyCostRollup.objects.filter(month=month).delete()
+        MonthlyCostRollup.objects.bulk_create(rollups)
+    return len(rollups)
+
+
+def first_stale_month(current):
+    """
+    أول شهر منته يتأثر بسجلات رواتب أو بدلات أضيفت بعد حساب ملخصاته، أو None
+    (استعلام لكل جدول سجل مهما كان عدد الأشهر)
+    """
+    built = (
+        MonthlyCostRollup.objects.filter(month__lt=current)
+        .values('month').annotate(built_at=Min('computed_at')).order_by()
+    )
+    added_later = Q()
+    for row in built:
+        added_later |= Q(
+            Q(effective_to__isnull=True) | Q(effective_to__gt=row['month']),
+            created_at__gt=row['built_at'],
+            effective_from__lte=month_end(row['month']),
+        )
+    if not added_later:
+        return None
+
+    earliest = [
+        model.objects.filter(added_later).aggregate(first=Min('effective_from'))['first']
+        for model in (SalaryHistory, AllowanceHistory)
+    ]
+    earliest = [day for day in earliest if day is not None]
+    return month_start(min(earliest)) if earliest else None
+
+
+def months_to_build(rebuild=False, since=None):
+    """
+    الأشهر المطلوب حسابها: الشهر الحالي والأشهر غير المحسوبة والأشهر من أول شهر تأثر
+    بسجلات بأثر رجعي (أو جميعها عند rebuild)
+    """
+    current = month_start(timezone.localdate())
+    first = since or first_history_month()
+    if first is None:
+        return []
+
+    months = list(iter_months(first, current))
+    if rebuild:
+        return months
+
+    built = set(MonthlyCostRollup.objects.filter(month__lt=current).values_list('month', flat=True).distinct())
+    stale = first_stale_month(current) or current
+    return [month for month in months if month not in built or month >= stale]
+
+
+def monthly_cost_trends(months=24):
+    """إجماليات آخر عدد من الأشهر من جدول الملخصات {'YYYY-MM': {...}}"""
+    since = month_start(timezone.localdate())
+    for _ in range(months - 1):
+        since = previous_month(since)
+
+    totals = MonthlyCostRollup.objects.filter(month__gte=since).values('month').annotate(
+        headcount=Sum('headcount'),
+        basic=Sum('total_basic_salary'),
+        gross=Sum('total_monthly_gross'),
+        annual=Sum('total_annual_cost'),
+    ).order_by('month')
+
+    return {
+        row['month'].strftime('%Y-%m'): {
+            'headcount': row['headcount'],
+            'total_basic_salary': float(row['basic']),
+            'total_monthly_cost': float(row['gross']),
+            'total_annual_cost': float(row['annual']),
+        }
+        for row in totals
+    }
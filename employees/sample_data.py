@@ -0,0 +1,167 @@
+"""
+توليد بيانات تجريبية بكميات كبيرة لاختبارات الأداء والتحميل
+"""
+import random
+from itertools import accumulate
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+
+from .history import opening_history_rows
+from .models import (
+    Allowance, AllowanceHistory, AllowanceType, DataVersion, Employee, EmployeeCategory, SalaryHistory,
+)
+from .utils import create_default_allowance_types
+
+
+# الفئات: (الرمز، الاسم، الوزن، نطاق الراتب الأساسي)
+CATEGORY_PROFILES = [
+    ('LABOR', 'عمالة', 40, (1500, 3500)),
+    ('STAFF', 'موظفين', 25, (4000, 9000)),
+    ('TECHNICIAN', 'فني', 18, (3500, 8000)),
+    ('ENGINEER', 'مهندس', 12, (8000, 18000)),
+    ('MANAGER', 'إداري', 5, (15000, 35000)),
+]
+
+# الجنسيات وأوزانها التقريبية
+NATIONALITY_WEIGHTS = [
+    ('سعودي', 30),
+    ('هندي', 18),
+    ('باكستاني', 12),
+    ('مصري', 12),
+    ('بنغلاديشي', 8),
+    ('فلبيني', 8),
+    ('يمني', 5),
+    ('سوداني', 4),
+    ('أردني', 3),
+]
+
+FIRST_NAMES = ['أحمد', 'محمد', 'خالد', 'عبدالله', 'فهد', 'سعد', 'يوسف', 'عمر', 'علي', 'ماجد', 'سلمان', 'راشد']
+FAMILY_NAMES = ['العتيبي', 'القحطاني', 'الشمري', 'الحربي', 'الغامدي', 'الزهراني', 'المطيري', 'الدوسري', 'السبيعي']
+
+# البدلات: (اسم نوع البدل، نسبة الموظفين الحاصلين عليه، نسبة المبلغ من الراتب الأساسي، طبيعة البدل)
+ALLOWANCE_MIX = [
+    ('housing_allowance', 0.90, (0.20, 0.30), 'CASH'),
+    ('transportation_allowance', 0.85, (0.08, 0.12), 'CASH'),
+    ('food_allowance', 0.35, (0.05, 0.10), 'IN_KIND'),
+    ('phone_allowance', 0.20, (0.02, 0.05), 'CASH'),
+    ('risk_allowance', 0.10, (0.05, 0.15), 'CASH'),
+    ('tickets', 0.55, (0.40, 0.80), 'CASH'),
+    ('medical_insurance', 0.80, (0.15, 0.60), 'IN_KIND'),
+    ('work_permit_fees', 0.60, (0.10, 0.40), 'IN_KIND'),
+    ('vacation_allowance', 0.30, (0.50, 1.00), 'CASH'),
+]
+
+SAUDI_NATIONALITY = 'سعودي'
+
+
+class SampleDataGenerator:
+    """مولد بيانات موظفين تجريبية قابل للتكرار باستخدام bulk_create على دفعات"""
+
+    def __init__(self, seed=None, batch_size=5000, prefix='EMP'):
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.prefix = prefix
+        # أوزان تراكمية محسوبة مرة واحدة لتسريع rng.choices
+        self.category_weights = list(accumulate(weight for _, _, weight, _ in CATEGORY_PROFILES))
+        self.nationalities = [nationality for nationality, _ in NATIONALITY_WEIGHTS]
+        self.nationality_weights = list(accumulate(weight for _, weight in NATIONALITY_WEIGHTS))
+
+    def prepare_reference_data(self):
+        """إنشاء الفئات وأنواع البدلات المطلوبة إن لم تكن موجودة"""
+        create_default_allowance_types()
+        categories = []
+        for code, name, _, salary_range in CATEGORY_PROFILES:
+            category, _ = EmployeeCategory.objects.get_or_create(code=code, defaults={'name': name})
+            categories.append((category.pk, salary_range))
+        allowance_types = {t.name: t for t in AllowanceType.objects.filter(is_active=True)}
+        return categories, allowance_types
+
+    def generate(self, count, progress=None):
+        """
+        توليد عدد من الموظفين مع بدلاتهم
+        progress: دالة اختيارية تستدعى بعد كل دفعة بعدد الموظفين المنشئين حتى الآن
+        """
+        categories, allowance_types = self.prepare_reference_data()
+        start = self._last_number() + 1
+
+        employees_created = 0
+        allowances_created = 0
+        for offset in range(0, count, self.batch_size):
+            numbers = range(start + offset, start + min(offset + self.batch_size, count))
+            with transaction.atomic():
+                employees = Employee.objects.bulk_create(
+                    [self._build_employee(number, categories) for number in numbers]
+                )
+                allowances = Allowance.objects.bulk_create(
+                    self._build_allowances(employees, allowance_types)
+                )
+                salary_rows, allowance_rows = opening_history_rows(employees, allowances)
+                SalaryHistory.objects.bulk_create(salary_rows)
+                AllowanceHistory.objects.bulk_create(allowance_rows)
+            employees_created += len(employees)
+            allowances_created += len(allowances)
+            if progress:
+                progress(employees_created)
+
+        # bulk_create لا يرسل إشارات الحفظ لذا يحدث إصدار البيانات يدوياً
+        DataVersion.bump()
+
+        return {
+            'employees': employees_created,
+            'allowances': allowances_created,
+        }
+
+    def _last_number(self):
+        """
+        أعلى رقم مستخدم بعد البادئة، وليس عدد الموظفين، حتى لا تتكرر الأرقام
+        إذا حذف أو أرشف بعض الموظفين
+        """
+        numbers = Employee.objects.filter(employee_number__startswith=self.prefix).values_list(
+            'employee_number', flat=True
+        )
+        suffixes = (number[len(self.prefix):] for number in numbers.iterator())
+        return max((int(suffix) for suffix in suffixes if suffix.isdigit()), default=0)
+
+    def _build_employee(self, number, categories):
+        rng = self.rng
+        category_id, (low, high) = rng.choices(categories, cum_weights=self.category_weights)[0]
+        nationality = rng.choices(self.nationalities, cum_weights=self.nationality_weights)[0]
+        # توزيع مثلثي يميل إلى الحد الأدنى من نطاق الفئة
+        salary = round(rng.triangular(low, high, low + (high - low) * 0.3) / 50) * 50
+        is_saudi = nationality == SAUDI_NATIONALITY
+        married = rng.random() < 0.6
+
+        return Employee(
+            employee_number=f'{self.prefix}{number:06d}',
+            name=f'{rng.choice(FIRST_NAMES)} {rng.choice(FIRST_NAMES)} {rng.choice(FAMILY_NAMES)}',
+            nationality=nationality,
+            hire_date=date.today() - timedelta(days=int(rng.expovariate(1 / (365 * 4))) + 1),
+            id_number=f'{1 if is_saudi else 2}{rng.randint(0, 999999999):09d}',
+            category_id=category_id,
+            basic_salary=Decimal(salary),
+            insurance_type=rng.choices(['VIP', 'A+', 'A', 'B', 'C'], weights=[2, 8, 20, 40, 30])[0],
+            num_wives=1 if married else 0,
+            num_children=rng.randint(0, 5) if married else 0,
+            recruitment_cost=Decimal(0) if is_saudi else Decimal(rng.randint(20, 120) * 100),
+            training_cost=Decimal(rng.randint(0, 30) * 100),
+            ticket_type=rng.choices(['ANNUAL', 'BIENNIAL'], weights=[35, 65])[0],
+        )
+
+    def _build_allowances(self, employees, allowance_types):
+        rng = self.rng
+        allowances = []
+        for employee in employees:
+            for type_name, share, (low, high), nature in ALLOWANCE_MIX:
+                allowance_type = allowance_types.get(type_name)
+                if allowance_type is None or rng.random() >= share:
+                    continue
+                amount = round(float(employee.basic_salary) * rng.uniform(low, high))
+                allowances.append(Allowance(
+                    employee_id=employee.pk,
+                    allowance_type_id=allowance_type.pk,
+                    amount=Decimal(amount),
+                    type=nature,
+                ))
+        return allowances
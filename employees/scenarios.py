@@ -0,0 +1,303 @@
+"""
+محرك سيناريوهات "ماذا لو" للرواتب والبدلات في الذاكرة
+
+يتم تحميل الموظفين النشطين وبدلاتهم مرة واحدة في أعمدة مضغوطة (array)،
+ثم تطبق التعديلات على نسخ من الأعمدة وتعاد حسابات التكلفة دون الكتابة في قاعدة البيانات.
+الحسابات مطابقة لدوال نموذج Employee (البدلات الشهرية والسنوية، المعامل، نهاية الخدمة)
+"""
+from array import array
+from dataclasses import dataclass
+
+from django.utils import timezone
+
+from .cost_math import annual_factor, eos_months, monthly_factor, years_of_service
+from .db_routing import current_read_alias
+from .models import Allowance, DataVersion, Employee
+
+TARGET_CHOICES = ('basic_salary', 'allowance')
+MODE_CHOICES = ('percent', 'fixed')
+
+
+@dataclass(frozen=True, slots=True)
+class Adjustment:
+    """
+    تعديل واحد في السيناريو
+    target: basic_salary أو allowance
+    mode: percent (نسبة مئوية) أو fixed (مبلغ يضاف، ويمكن أن يكون سالباً)
+    category: رمز الفئة، nationality: الجنسية، allowance_type: اسم نوع البدل (للبدلات فقط)
+    """
+    target: str
+    mode: str
+    value: float
+    category: str = None
+    nationality: str = None
+    allowance_type: str = None
+
+    def __post_init__(self):
+        if self.target not in TARGET_CHOICES:
+            raise ValueError(f'نوع التعديل غير معروف: {self.target}')
+        if self.mode not in MODE_CHOICES:
+            raise ValueError(f'طريقة التعديل غير معروفة: {self.mode}')
+        if self.allowance_type and self.target != 'allowance':
+            raise ValueError('لا يمكن تحديد نوع البدل عند تعديل الراتب الأساسي')
+
+    @classmethod
+    def from_dict(cls, data):
+        try:
+            return cls(
+                target=data['target'],
+                mode=data.get('mode', 'percent'),
+                value=float(data['value']),
+                category=data.get('category') or None,
+                nationality=data.get('nationality') or None,
+                allowance_type=data.get('allowance_type') or None,
+            )
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f'تعديل غير صالح: {data!r} ({e})') from e
+
+    def apply(self, amount):
+        if self.mode == 'percent':
+            return amount * (1 + self.value / 100)
+        return amount + self.value
+
+
+class ScenarioSnapshot:
+    """لقطة عمودية للموظفين النشطين وبدلاتهم"""
+
+    def __init__(self):
+        self.version = None
+        self.categories = []
+        self.nationalities = []
+        self.allowance_types = []
+
+        # أعمدة الموظفين
+        self.employee_ids = array('q')
+        self.category_index = array('i')
+        self.nationality_index = array('i')
+        self.basic_salary = array('d')
+        self.eos_months = array('d')
+
+        # أعمدة البدلات
+        self.allowance_employee = array('i')
+        self.allowance_type_index = array('i')
+        self.allowance_amount = array('d')
+        self.monthly_factor = array('d')
+        self.annual_factor = array('d')
+        self.eos_eligible = array('b')
+
+        self._baseline = None
+
+    @classmethod
+    def load(cls):
+        """تحميل اللقطة باستعلامين"""
+        snapshot = cls()
+        snapshot.version = snapshot_version()
+        today = snapshot.version[1]
+
+        categories = {}
+        nationalities = {}
+        rows = {}
+        employees = Employee.active.order_by().values_list(
+            'pk', 'category__code', 'nationality', 'basic_salary', 'hire_date'
+        )
+        for pk, category, nationality, basic_salary, hire_date in employees.iterator(chunk_size=5000):
+            rows[pk] = len(snapshot.employee_ids)
+            snapshot.employee_ids.append(pk)
+            snapshot.category_index.append(categories.setdefault(category, len(categories)))
+            snapshot.nationality_index.append(nationalities.setdefault(nationality, len(nationalities)))
+            snapshot.basic_salary.append(float(basic_salary))
+            snapshot.eos_months.append(eos_months(years_of_service(hire_date, today)))
+
+        allowance_types = {}
+        allowances = Allowance.objects.filter(employee__is_active=True).order_by().values_list(
+            'employee_id', 'allowance_type__name', 'allowance_type__frequency',
+            'allowance_type__custom_months', 'amount', 'type', 'is_active',
+        )
+        for employee_id, type_name, frequency, custom_months, amount, kind, is_active in allowances.iterator(chunk_size=5000):
+            if employee_id not in rows:  # موظف أضيف أو فعل بين الاستعلامين
+                continue
+            snapshot.allowance_employee.append(rows[employee_id])
+            snapshot.allowance_type_index.append(allowance_types.setdefault(type_name, len(allowance_types)))
+            snapshot.allowance_amount.append(float(amount))
+            snapshot.monthly_factor.append(monthly_factor(frequency, custom_months))
+            snapshot.annual_factor.append(annual_factor(frequency, custom_months))
+            # مكافأة نهاية الخدمة تحسب على البدلات النقدية النشطة فقط
+            snapshot.eos_eligible.append(1 if kind == 'CASH' and is_active else 0)
+
+        snapshot.categories = list(categories)
+        snapshot.nationalities = list(nationalities)
+        snapshot.allowance_types = list(allowance_types)
+        return snapshot
+
+    def __len__(self):
+        return len(self.employee_ids)
+
+    def _employee_mask(self, adjustment):
+        """دالة تحدد الموظفين الذين يشملهم التعديل حسب الفئة والجنسية"""
+        category = self.categories.index(adjustment.category) if adjustment.category in self.categories else None
+        nationality = (
+            self.nationalities.index(adjustment.nationality)
+            if adjustment.nationality in self.nationalities else None
+        )
+        if (adjustment.category and category is None) or (adjustment.nationality and nationality is None):
+            return lambda row: False
+
+        category_index = self.category_index
+        nationality_index = self.nationality_index
+        return lambda row: (
+            (category is None or category_index[row] == category)
+            and (nationality is None or nationality_index[row] == nationality)
+        )
+
+    def _apply(self, adjustments):
+        """تطبيق التعديلات على نسخ من أعمدة الراتب ومبالغ البدلات"""
+        basic_salary = array('d', self.basic_salary)
+        amounts = array('d', self.allowance_amount)
+
+        for adjustment in adjustments:
+            matches = self._employee_mask(adjustment)
+            if adjustment.target == 'basic_salary':
+                for row in range(len(basic_salary)):
+                    if matches(row):
+                        basic_salary[row] = adjustment.apply(basic_salary[row])
+                continue
+
+            type_index = None
+            if adjustment.allowance_type:
+                if adjustment.allowance_type not in self.allowance_types:
+                    continue
+                type_index = self.allowance_types.index(adjustment.allowance_type)
+            for i, row in enumerate(self.allowance_employee):
+                if (type_index is None or self.allowance_type_index[i] == type_index) and matches(row):
+                    amounts[i] = adjustment.apply(amounts[i])
+
+        return basic_salary, amounts
+
+    def compute(self, basic_salary, amounts):
+        """حساب أعمدة التكلفة لكل موظف: الراتب الإجمالي، التكلفة السنوية، المعامل، نهاية الخدمة"""
+        count = len(basic_salary)
+        monthly_allowances = [0.0] * count
+        annual_allowances = [0.0] * count
+        eos_allowances = [0.0] * count
+
+        for row, amount, monthly, annual, eligible in zip(
+            self.allowance_employee, amounts, self.monthly_factor, self.annual_factor, self.eos_eligible
+        ):
+            monthly_amount = amount * monthly
+            monthly_allowances[row] += monthly_amount
+            annual_allowances[row] += amount * annual
+            if eligible:
+                eos_allowances[row] += monthly_amount
+
+        gross = [basic + allowances for basic, allowances in zip(basic_salary, monthly_allowances)]
+        annual_cost = [g * 12 + annual for g, annual in zip(gross, annual_allowances)]
+        cost_factor = [
+            cost / (basic * 12) if basic > 0 else 0.0
+            for cost, basic in zip(annual_cost, basic_salary)
+        ]
+        eos = [
+            months * (basic + allowances)
+            for months, basic, allowances in zip(self.eos_months, basic_salary, eos_allowances)
+        ]
+        return {
+            'basic_salary': basic_salary,
+            'monthly_gross': gross,
+            'annual_cost': annual_cost,
+            'cost_factor': cost_factor,
+            'eos_liability': eos,
+        }
+
+    def baseline(self):
+        """التكاليف الحالية دون تعديلات (تحسب مرة واحدة لكل لقطة)"""
+        if self._baseline is None:
+            self._baseline = self.compute(self.basic_salary, self.allowance_amount)
+        return self._baseline
+
+    def run(self, adjustments):
+        """تشغيل سيناريو وإرجاع الإجماليات قبل وبعد والفروقات حسب الفئة والجنسية"""
+        adjustments = [
+            adjustment if isinstance(adjustment, Adjustment) else Adjustment.from_dict(adjustment)
+            for adjustment in adjustments
+        ]
+        before = self.baseline()
+        after = self.compute(*self._apply(adjustments))
+
+        return {
+            'employees': len(self),
+            'data_version': self.version[0],
+            'as_of': self.version[1].isoformat(),
+            'totals': _compare(_group_totals(before)[0], _group_totals(after)[0]),
+            'by_category': _compare_groups(before, after, self.category_index, self.categories),
+            'by_nationality': _compare_groups(before, after, self.nationality_index, self.nationalities),
+        }
+
+
+TOTAL_COLUMNS = ('basic_salary', 'monthly_gross', 'annual_cost', 'eos_liability')
+
+
+def _group_totals(columns, group_index=None, group_count=1):
+    """مجموع أعمدة التكلفة لكل مجموعة في مرور واحد (مجموعة واحدة عند عدم تحديد group_index)"""
+    sums = [dict.fromkeys(TOTAL_COLUMNS + ('cost_factor',), 0.0) for _ in range(group_count)]
+    counts = [0] * group_count
+    rows = zip(*(columns[key] for key in TOTAL_COLUMNS + ('cost_factor',)))
+
+    for row, values in enumerate(rows):
+        group = group_index[row] if group_index is not None else 0
+        counts[group] += 1
+        totals = sums[group]
+        for key, value in zip(TOTAL_COLUMNS + ('cost_factor',), values):
+            totals[key] += value
+
+    for totals, count in zip(sums, counts):
+        cost_factor = totals.pop('cost_factor')
+        totals['average_cost_factor'] = cost_factor / count if count else 0.0
+    return sums
+
+
+def _compare(before, after):
+    return {
+        key: {
+            'before': round(before[key], 2),
+            'after': round(after[key], 2),
+            'delta': round(after[key] - before[key], 2),
+        }
+        for key in before
+    }
+
+
+def _compare_groups(before, after, group_index, names):
+    before = _group_totals(before, group_index, len(names))
+    after = _group_totals(after, group_index, len(names))
+    return {
+        name or '': _compare(group_before, group_after)
+        for name, group_before, group_after in zip(names, before, after)
+    }
+
+
+_snapshot_cache = {}
+
+
+def snapshot_version():
+    """
+    إصدار اللقطة: رقم إصدار البيانات وتاريخ اليوم، لأن أشهر مكافأة نهاية الخدمة
+    تحسب من سنوات الخدمة عند التحميل. الإصدار يقرأ من نفس قاعدة قراءة الموظفين
+    """
+    return DataVersion.current().version, timezone.localdate()
+
+
+def get_snapshot():
+    """
+    اللقطة الحالية، ويعاد تحميلها فقط عند تغير إصدار البيانات أو اليوم
+    لكل قاعدة قراءة لقطتها، لأن النسخة قد تتأخر عن default بإصدار أو أكثر
+    """
+    alias = current_read_alias()
+    version = snapshot_version()
+    snapshot = _snapshot_cache.get(alias)
+    if snapshot is None or snapshot.version != version:
+        snapshot = ScenarioSnapshot.load()
+        _snapshot_cache[alias] = snapshot
+    return snapshot
+
+
+def run_scenario(adjustments):
+    return get_snapshot().run(adjustments)
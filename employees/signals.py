@@ -0,0 +1,53 @@
+"""
+تحديث رقم إصدار البيانات وسجل الرواتب والبدلات والصور المصغرة عند تعديل النماذج
+"""
+from django.db.models.signals import post_delete, post_save
+
+from .history import sync_allowance_history, sync_salary_history
+from .models import Allowance, AllowanceType, DataVersion, Employee, EmployeeCategory
+from .thumbnails import schedule_thumbnails
+from .utils import invalidate_import_template
+
+VERSIONED_MODELS = (Employee, Allowance, AllowanceType, EmployeeCategory)
+
+
+def bump_data_version(sender, **kwargs):
+    DataVersion.bump()
+
+
+def clear_import_template(sender, **kwargs):
+    # أعمدة البدلات في قالب الاستيراد تتغير مع أنواع البدلات
+    invalidate_import_template()
+
+
+def record_salary_history(sender, instance, raw=False, **kwargs):
+    # raw: تحميل بيانات من fixtures
+    if not raw:
+        sync_salary_history(instance)
+
+
+def update_photo_thumbnails(sender, instance, raw=False, **kwargs):
+    if not raw:
+        schedule_thumbnails(instance)
+
+
+def record_allowance_history(sender, instance, raw=False, origin=None, **kwargs):
+    # عند حذف الموظف نفسه تحذف سجلاته معه
+    if raw or isinstance(origin, Employee):
+        return
+    # نوع البدل المعدل فقط، وليس جميع بدلات الموظف مع كل بدل
+    sync_allowance_history(instance.employee, instance.allowance_type_id)
+
+
+def connect_signals():
+    for model in VERSIONED_MODELS:
+        post_save.connect(bump_data_version, sender=model, dispatch_uid=f'data_version_save_{model.__name__}')
+        post_delete.connect(bump_data_version, sender=model, dispatch_uid=f'data_version_delete_{model.__name__}')
+
+    post_save.connect(clear_import_template, sender=AllowanceType, dispatch_uid='import_template_save')
+    post_delete.connect(clear_import_template, sender=AllowanceType, dispatch_uid='import_template_delete')
+
+    post_save.connect(record_salary_history, sender=Employee, dispatch_uid='salary_history_save')
+    post_save.connect(update_photo_thumbnails, sender=Employee, dispatch_uid='photo_thumbnails_save')
+    post_save.connect(record_allowance_history, sender=Allowance, dispatch_uid='allowance_history_save')
+    post_delete.connect(record_allowance_history, sender=Allowance, dispatch_uid='allowance_history_delete')
@@ -0,0 +1,290 @@
+"""
+خدمة ملفات Excel: إنشاء الملفات بـ xlsxwriter وقراءتها بـ openpyxl
+
+المكتبتان ثقيلتان في وقت التحميل والذاكرة ولا تحتاجهما إلا صفحات التصدير والاستيراد،
+لذا لا تستورد هذه الوحدة في أعلى أي وحدة أخرى، بل داخل الدالة التي تحتاجها:
+
+    from . import spreadsheets
+    content = spreadsheets.employees_workbook(employees)
+
+فلا تحملها عمليات الخادم وأوامر الإدارة إلا عند أول تصدير أو استيراد
+(للقياس: python manage.py bench_startup)
+"""
+from io import BytesIO
+
+import openpyxl
+import xlsxwriter
+
+from .forecast import workforce_forecast, write_forecast_sheet
+from .reports_advanced import AdvancedReportsGenerator
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+def read_rows(excel_file):
+    """قيم الصف الأول (العناوين) ومكرر على قيم بقية صفوف الورقة النشطة"""
+    ws = openpyxl.load_workbook(excel_file).active
+    header_row = [cell.value for cell in ws[1]]
+    return header_row, ws.iter_rows(min_row=2, values_only=True)
+
+
+def employees_workbook(employees):
+    """ملف التقرير المفصل للموظفين (صفحة تصدير التقارير)"""
+    # إنشاء ملف Excel
+    output = BytesIO()
+    workbook = xlsxwriter.Workbook(output, {'in_memory': True})
+    
+    # تنسيق الخلايا
+    header_format = workbook.add_format({
+        'bold': True,
+        'bg_color': '#4472C4',
+        'font_color': 'white',
+        'align': 'center',
+        'valign': 'vcenter',
+        'border': 1
+    })
+    
+    data_format = workbook.add_format({
+        'align': 'center',
+        'valign': 'vcenter',
+        'border': 1
+    })
+    
+    number_format = workbook.add_format({
+        'num_format': '#,##0.00',
+        'align': 'center',
+        'border': 1
+    })
+    
+    # ورقة التقرير المفصل
+    worksheet = workbook.add_worksheet('التقرير المفصل')
+    
+    # عناوين الأعمدة
+    headers = [
+        'رقم الموظف', 'الاسم', 'الجنسية', 'الفئة', 'تاريخ التوظيف',
+        'الراتب الأساسي', 'البدلات الشهرية', 'الراتب الإجمالي الشهري',
+        'التكلفة السنوية', 'المعامل', 'عدد الزوجات', 'عدد الأبناء',
+        'تكلفة الاستقدام', 'تكلفة التدريب'
+    ]
+    
+    # كتابة العناوين
+    for col, header in enumerate(headers):
+        worksheet.write(0, col, header, header_format)
+    
+    # كتابة البيانات (التكاليف محسوبة في قاعدة البيانات)
+    employees = employees.with_costs().select_related('category')
+    for row, employee in enumerate(employees, start=1):
+        worksheet.write(row, 0, employee.employee_number, data_format)
+        worksheet.write(row, 1, employee.name, data_format)
+        worksheet.write(row, 2, employee.nationality, data_format)
+        worksheet.write(row, 3, employee.category.name if employee.category else '', data_format)
+        worksheet.write(row, 4, employee.hire_date.strftime('%Y-%m-%d'), data_format)
+        worksheet.write(row, 5, float(employee.basic_salary), number_format)
+        worksheet.write(row, 6, float(employee.monthly_allowances_total), number_format)
+        worksheet.write(row, 7, float(employee.monthly_gross), number_format)
+        worksheet.write(row, 8, float(employee.annual_cost), number_format)
+        worksheet.write(row, 9, float(employee.cost_factor), number_format)
+        worksheet.write(row, 10, employee.num_wives, data_format)
+        worksheet.write(row, 11, employee.num_children, data_format)
+        worksheet.write(row, 12, float(employee.recruitment_cost), number_format)
+        worksheet.write(row, 13, float(employee.training_cost), number_format)
+    
+    # تنسيق عرض الأعمدة
+    worksheet.set_column('A:A', 15)  # رقم الموظف
+    worksheet.set_column('B:B', 25)  # الاسم
+    worksheet.set_column('C:C', 15)  # الجنسية
+    worksheet.set_column('D:D', 15)  # الفئة
+    worksheet.set_column('E:E', 15)  # تاريخ التوظيف
+    worksheet.set_column('F:N', 18)  # باقي الأعمدة
+
+    workbook.close()
+    return output.getvalue()
+
+
+def advanced_reports_workbook(employees):
+    """ملف التقارير المتقدمة بنفس تنسيق ملف Excel الأصلي مع ورقة التوقع"""
+    # إنشاء ملف Excel متقدم
+    output = BytesIO()
+    workbook = xlsxwriter.Workbook(output, {'in_memory': True})
+
+    # تنسيقات Excel
+    header_format = workbook.add_format({
+        'bold': True,
+        'bg_color': '#4472C4',
+        'font_color': 'white',
+        'align': 'center',
+        'valign': 'vcenter',
+        'border': 1
+    })
+
+    title_format = workbook.add_format({
+        'bold': True,
+        'font_size': 14,
+        'align': 'center',
+        'valign': 'vcenter',
+        'bg_color': '#D9E2F3',
+        'border': 1
+    })
+
+    data_format = workbook.add_format({
+        'align': 'center',
+        'valign': 'vcenter',
+        'border': 1
+    })
+
+    number_format = workbook.add_format({
+        'num_format': '#,##0.00',
+        'align': 'center',
+        'border': 1
+    })
+
+    # إنتاج التقارير
+    generator = AdvancedReportsGenerator(employees)
+    reports_data = generator.export_to_excel_format()
+
+    # ورقة 1: ملخص حسب الفئة (BY CATEGORY)
+    ws_category = workbook.add_worksheet('BY CATEGORY')
+    ws_category.write('A1', 'SUMMARY - CATEGORY', title_format)
+    ws_category.write('B1', '', title_format)
+    ws_category.write('C1', '', title_format)
+
+    ws_category.write('A2', 'No.', header_format)
+    ws_category.write('B2', 'CATEGORY', header_format)
+    ws_category.write('C2', 'TOTAL', header_format)
+
+    row = 3
+    for idx, data in reports_data['summary_by_category'].items():
+        ws_category.write(f'A{row}', idx, data_format)
+        ws_category.write(f'B{row}', data['category'], data_format)
+        ws_category.write(f'C{row}', data['total_employees'], data_format)
+        row += 1
+
+    # ورقة 2: ملخص حسب الجنسية  
+    ws_nationality = workbook.add_worksheet('BY NATIONALITY')
+    ws_nationality.write('A1', 'SUMMARY - NATIONALITY', title_format)
+    ws_nationality.write('B1', '', title_format)
+    ws_nationality.write('C1', '', title_format)
+
+    ws_nationality.write('A2', 'No.', header_format)
+    ws_nationality.write('B2', 'NATIONALITY', header_format)
+    ws_nationality.write('C2', 'TOTAL', header_format)
+
+    row = 3
+    for idx, data in reports_data['summary_by_nationality'].items():
+        ws_nationality.write(f'A{row}', idx, data_format)
+        ws_nationality.write(f'B{row}', data['nationality'], data_format)
+        ws_nationality.write(f'C{row}', data['total_employees'], data_format)
+        row += 1
+
+    # ورقة 3: التقرير المفصل (DETAILED)
+    ws_detailed = workbook.add_worksheet('DETAILED REPORT')
+
+    headers = [
+        'Employee Number', 'Name', 'Category', 'Nationality', 'Hire Date',
+        'Basic Salary', 'Monthly Allowances', 'Monthly Gross', 'Annual Cost',
+        'Years of Service', 'Cost Factor', 'Efficiency Ratio'
+    ]
+
+    for col, header in enumerate(headers):
+        ws_detailed.write(0, col, header, header_format)
+
+    row = 1
+    for emp_data in reports_data['detailed_employee_report']:
+        ws_detailed.write(row, 0, emp_data['employee_number'], data_format)
+        ws_detailed.write(row, 1, emp_data['name'], data_format)
+        ws_detailed.write(row, 2, emp_data['category'], data_format)
+        ws_detailed.write(row, 3, emp_data['nationality'], data_format)
+        ws_detailed.write(row, 4, emp_data['hire_date'], data_format)
+        ws_detailed.write(row, 5, emp_data['basic_salary'], number_format)
+        ws_detailed.write(row, 6, emp_data['monthly_allowances'], number_format)
+        ws_detailed.write(row, 7, emp_data['monthly_gross'], number_format)
+        ws_detailed.write(row, 8, emp_data['annual_cost'], number_format)
+        ws_detailed.write(row, 9, emp_data['years_of_service'], data_format)
+        ws_detailed.write(row, 10, emp_data['cost_factor'], number_format)
+        ws_detailed.write(row, 11, emp_data['efficiency_ratio'], number_format)
+        row += 1
+
+    # ورقة 4: تحليل التكاليف
+    ws_cost = workbook.add_worksheet('COST ANALYSIS')
+    cost_data = reports_data['cost_analysis']
+
+    ws_cost.write('A1', 'تحليل التكاليف الشامل', title_format)
+
+    row = 3
+    ws_cost.write(f'A{row}', 'البند', header_format)
+    ws_cost.write(f'B{row}', 'القيمة', header_format)
+    row += 1
+
+    for key, value in cost_data['summary'].items():
+        ws_cost.write(f'A{row}', key.replace('_', ' ').title(), data_format)
+        if isinstance(value, (int, float)):
+            ws_cost.write(f'B{row}', value, number_format)
+        else:
+            ws_cost.write(f'B{row}', value, data_format)
+        row += 1
+
+    # ورقة توقع التكلفة للسنوات القادمة بالإعدادات الافتراضية
+    write_forecast_sheet(workbook, workforce_forecast(employees))
+
+    # تنسيق عرض الأعمدة
+    for worksheet in [ws_category, ws_nationality, ws_detailed, ws_cost]:
+        worksheet.set_column('A:A', 15)
+        worksheet.set_column('B:Z', 20)
+
+    workbook.close()
+    return output.getvalue()
+
+
+def forecast_workbook(forecast):
+    """ملف توقع التكلفة للسنوات القادمة"""
+    output = BytesIO()
+    workbook = xlsxwriter.Workbook(output, {'in_memory': True})
+    write_forecast_sheet(workbook, forecast)
+    workbook.close()
+    return output.getvalue()
+
+
+def import_template_workbook(allowance_columns):
+    """إنشاء محتوى قالب Excel للاستيراد"""
+    output = BytesIO()
+    workbook = xlsxwriter.Workbook(output, {'in_memory': True})
+
+    # تنسيق العناوين
+    header_format = workbook.add_format({
+        'bold': True,
+        'bg_color': '#4472C4',
+        'font_color': 'white',
+        'align': 'center',
+        'valign': 'vcenter',
+        'border': 1
+    })
+
+    # إنشاء ورقة العمل
+    worksheet = workbook.add_worksheet('قالب الموظفين')
+
+    # العناوين المطلوبة
+    headers = [
+        'رقم الموظف (مطلوب)', 'الاسم (مطلوب)', 'الجنسية (مطلوب)', 'الراتب الأساسي (مطلوب)',
+        'تاريخ التوظيف', 'رقم الهوية', 'الفئة', 'نوع التأمين',
+        'عدد الزوجات', 'عدد الأبناء', 'تكلفة الاستقدام', 'تكلفة التدريب'
+    ] + list(allowance_columns)
+
+    # كتابة العناوين في الصف الأول
+    for col, header in enumerate(headers):
+        worksheet.write(0, col, header, header_format)
+
+    # إضافة صف مثال — يمكنك تخصيص القيم حسب الحاجة
+    example_data = [
+        'EMP001', 'أحمد محمد علي', 'سعودي', '8000',
+        '2024-01-15', '1234567890', 'موظفين', 'أساسي',
+        '1', '2', '5000', '2000'
+    ] + ['1000' for _ in allowance_columns]  # قيمة افتراضية للبدلات
+
+    for col, data in enumerate(example_data):
+        worksheet.write(1, col, data)
+
+    # تنسيق عرض الأعمدة
+    worksheet.set_column(0, len(headers) - 1, 20)
+
+    workbook.close()
+    return output.getvalue()
@@ -0,0 +1,58 @@
+"""
+عرض التقارير الطويلة على دفعات عبر StreamingHttpResponse
+"""
+from django.http import StreamingHttpResponse
+from django.template.loader import get_template
+
+# عدد الصفوف في كل دفعة يتم إرسالها للمتصفح
+STREAM_BATCH_SIZE = 500
+
+
+def render_rows_in_batches(template_name, rows, context, rows_name, batch_size=STREAM_BATCH_SIZE):
+    """
+    عرض قالب الصفوف لكل دفعة من rows مع تمرير offset لترقيم الصفوف بشكل متصل
+    """
+    template = get_template(template_name)
+    batch = []
+    offset = 0
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield template.render({**context, rows_name: batch, 'offset': offset})
+            offset += len(batch)
+            batch = []
+    if batch:
+        yield template.render({**context, rows_name: batch, 'offset': offset})
+
+
+def render_template(template_name, context):
+    return get_template(template_name).render(context)
+
+
+class ChunkBuffer:
+    """ملف كتابة فقط يجمع البيانات حتى يتم سحبها وإرسالها للمتصفح"""
+
+    # pyarrow يتحقق من أن الملف مفتوح قبل الكتابة فيه
+    closed = False
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def streaming_html_response(chunks):
+    response = StreamingHttpResponse(chunks, content_type='text/html; charset=utf-8')
+    # منع nginx من تجميع الاستجابة قبل إرسالها
+    response['X-Accel-Buffering'] = 'no'
+    return response
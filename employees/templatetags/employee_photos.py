@@ -0,0 +1,31 @@
+from django import template
+from django.core.files.storage import default_storage
+from django.utils.html import format_html
+
+from employees.thumbnails import THUMBNAIL_SIZES
+
+register = template.Library()
+
+
+@register.simple_tag
+def employee_photo(employee, size='medium', css_class=''):
+    """صورة الموظف بالحجم المطلوب (WebP مع بديل JPEG) وتحميل كسول، أو الأصلية إذا لم تجهز المصغرات بعد"""
+    if not employee.photo:
+        return ''
+
+    max_side = THUMBNAIL_SIZES[size]
+    thumbnails = employee.photo_thumbnails or {}
+    if thumbnails.get('source') != employee.photo.name or size not in thumbnails:
+        return format_html(
+            '<img src="{}" alt="{}" class="{}" loading="lazy" decoding="async" style="max-width: {}px; max-height: {}px;">',
+            employee.photo.url, employee.name, css_class, max_side, max_side,
+        )
+
+    return format_html(
+        '<picture><source srcset="{}" type="image/webp">'
+        '<img src="{}" alt="{}" class="{}" loading="lazy" decoding="async" style="max-width: {}px; max-height: {}px;">'
+        '</picture>',
+        default_storage.url(thumbnails[size]['webp']),
+        default_storage.url(thumbnails[size]['jpeg']),
+        employee.name, css_class, max_side, max_side,
+    )
@@ -0,0 +1,1436 @@
+import csv
+import io
+from datetime import date, timedelta
+from decimal import Decimal
+from importlib.util import find_spec
+from unittest import skipUnless
+
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, router
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from accounts import urls as accounts_urls
+from accounts.models import User
+
+from . import urls as employees_urls
+from .db_routing import PIN_COOKIE, ReplicaPinningMiddleware, replica_reads
+from .models import Allowance, AllowanceHistory, AllowanceType, Employee, EmployeeCategory, SalaryHistory
+from .sample_data import SampleDataGenerator
+
+# الحد الأقصى لعدد الاستعلامات في كل صفحة (مستخدم مسجل وتخزين مؤقت فارغ وجلسات في قاعدة البيانات)،
+# وأي صفحة جديدة في employees.urls أو accounts.urls يجب أن تضاف هنا
+QUERY_BUDGETS = {
+    'employees:dashboard': 7,
+    'employees:employee_list': 9,
+    'employees:employee_create': 7,
+    'employees:employee_detail': 4,
+    'employees:employee_edit': 14,
+    'employees:employee_delete': 4,
+    'employees:bulk_operations': 5,
+    'employees:reports': 6,
+    'employees:print_report': 5,
+    'employees:print_comparison_report': 5,
+    'employees:employee_individual_report': 5,
+    'employees:comparison_report': 6,
+    'employees:advanced_excel_reports': 24,
+    'employees:export_excel': 5,
+    'employees:employee_cost_breakdown': 5,
+    'employees:export_individual_report': 5,
+    'employees:export_all_individual_reports': 6,
+    'employees:export_advanced_excel': 25,
+    'employees:export_columnar': 5,
+    'employees:scenario_analysis': 6,
+    'employees:workforce_forecast': 7,
+    'employees:import_excel': 2,
+    'employees:export_template': 2,
+    'accounts:login': 2,
+    'accounts:logout': 4,
+    'accounts:profile': 2,
+}
+
+# صفحات تعتمد على حزم اختيارية، تستثنى من القياس إذا لم تكن مثبتة
+OPTIONAL_VIEWS = {
+    'employees:export_columnar': 'pyarrow',
+}
+
+
+# عدد الاستعلامات يقاس على default (نسخة الاختبار المتماثلة لا ترى بيانات معاملة TestCase)
+@override_settings(REPORT_DATABASE_ALIAS=None)
+class ReportQueryCountTests(TestCase):
+    """عدد الاستعلامات في صفحات التقارير ثابت ولا يزيد مع عدد الموظفين"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='reports', password='reports')
+        cls.generator = SampleDataGenerator(seed=1, prefix='TEST')
+        cls.generator.prepare_reference_data()
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def _count_queries(self, url):
+        # نفس حالة التخزين المؤقت للجلسة والمستخدم في كل قياس
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+            if response.streaming:
+                b''.join(response.streaming_content)
+            else:
+                response.content
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def _assert_constant_queries(self, url):
+        self.generator.generate(5)
+        small = self._count_queries(url)
+        self.generator.generate(45)
+        large = self._count_queries(url)
+        self.assertEqual(small, large)
+
+    def test_reports_page(self):
+        self._assert_constant_queries(reverse('employees:reports'))
+
+    def test_print_report_streaming(self):
+        self._assert_constant_queries(reverse('employees:print_report'))
+
+    def test_print_report_full_page(self):
+        self._assert_constant_queries(reverse('employees:print_report') + '?stream=0')
+
+
+@override_settings(REPORT_DATABASE_ALIAS=None)
+class ViewQueryBudgetTests(TestCase):
+    """
+    عدد الاستعلامات في كل صفحة لا يتجاوز حده في QUERY_BUDGETS ولا يتغير بين 20 و 200 موظف،
+    فتكشف أي حلقة تستعلم لكل موظف (N+1) في التعديلات اللاحقة
+    """
+
+    SMALL = 20
+    LARGE = 200
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='budgets', password='budgets')
+        cls.generator = SampleDataGenerator(seed=1, prefix='BUDGET')
+        cls.generator.prepare_reference_data()
+
+    def _urls(self):
+        """جميع صفحات employees.urls و accounts.urls بدون تكرار الأسماء"""
+        employee = Employee.objects.order_by('pk').first()
+        urls = {}
+        for namespace, module in (('employees', employees_urls), ('accounts', accounts_urls)):
+            for pattern in module.urlpatterns:
+                name = f'{namespace}:{pattern.name}'
+                kwargs = {key: employee.pk for key in pattern.pattern.converters}
+                urls[name] = reverse(name, kwargs=kwargs)
+        return urls
+
+    def _count_queries(self, url):
+        # تسجيل الدخول قبل كل صفحة (صفحة الخروج تنهي الجلسة) وتخزين مؤقت فارغ
+        cache.clear()
+        self.client.force_login(self.user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+            if response.streaming:
+                b''.join(response.streaming_content)
+            else:
+                response.content
+        self.assertLess(response.status_code, 400, url)
+        return len(queries)
+
+    def _measure(self, total):
+        self.generator.generate(total - Employee.objects.count())
+        return {
+            name: self._count_queries(url)
+            for name, url in self._urls().items()
+            if name not in OPTIONAL_VIEWS or find_spec(OPTIONAL_VIEWS[name])
+        }
+
+    def test_every_view_has_budget(self):
+        self.generator.generate(1)
+        self.assertEqual(set(self._urls()), set(QUERY_BUDGETS))
+
+    def test_query_budgets(self):
+        small = self._measure(self.SMALL)
+        large = self._measure(self.LARGE)
+        for name, budget in QUERY_BUDGETS.items():
+            if name not in large:
+                continue
+            with self.subTest(view=name):
+                self.assertEqual(small[name], large[name], f'{name}: {small[name]} -> {large[name]}')
+                self.assertLessEqual(large[name], budget)
+
+
+@skipUnless(find_spec('PIL'), 'Pillow غير مثبتة')
+class ThumbnailTests(TestCase):
+    """الصور المصغرة تبنى من صورة الموظف والوسم يعرض الأصلية حتى تجهز"""
+
+    def setUp(self):
+        import tempfile
+
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def _photo(self):
+        from PIL import Image
+
+        buffer = io.BytesIO()
+        Image.new('RGB', (800, 600), 'navy').save(buffer, format='PNG')
+        return SimpleUploadedFile('photo.png', buffer.getvalue(), content_type='image/png')
+
+    def test_thumbnails_built_and_used_by_template_tag(self):
+        from django.core.files.storage import default_storage
+        from PIL import Image
+
+        from .templatetags.employee_photos import employee_photo
+        from .thumbnails import THUMBNAIL_FORMATS, THUMBNAIL_SIZES, build_employee_thumbnails
+
+        # الحفظ يجدول البناء بعد اكتمال المعاملة، فلم تجهز المصغرات بعد
+        employee = Employee.objects.create(
+            employee_number='PHOTO1', name='صورة', nationality='سعودي', hire_date=date(2020, 1, 1),
+            id_number='1', basic_salary=Decimal('4000'), insurance_type='A', photo=self._photo(),
+        )
+        self.assertEqual(employee.photo_thumbnails, {})
+        html = employee_photo(employee, 'small')
+        self.assertIn(employee.photo.url, html)
+        self.assertNotIn('<picture>', html)
+
+        build_employee_thumbnails(employee.pk, employee.photo.name)
+        employee.refresh_from_db()
+        thumbnails = employee.photo_thumbnails
+        self.assertEqual(thumbnails['source'], employee.photo.name)
+        for size, max_side in THUMBNAIL_SIZES.items():
+            self.assertEqual(set(thumbnails[size]), set(THUMBNAIL_FORMATS))
+            for name in thumbnails[size].values():
+                with default_storage.open(name, 'rb') as f:
+                    self.assertEqual(max(Image.open(f).size), max_side, name)
+        html = employee_photo(employee, 'small')
+        self.assertIn('<picture>', html)
+        self.assertIn(default_storage.url(thumbnails['small']['webp']), html)
+
+
+@override_settings(REPORT_DATABASE_ALIAS=None)
+class BulkOperationTests(TestCase):
+    """العمليات الجماعية تعدل الموظفين المحددين فقط وتحدث السجل وإصدار البيانات"""
+
+    @classmethod
+    def setUpTestData(cls):
+        from django.utils import timezone
+
+        from .utils import create_default_allowance_types
+
+        create_default_allowance_types()
+        cls.housing = AllowanceType.objects.get(name='housing_allowance')
+        cls.drivers = EmployeeCategory.objects.create(code='DRV', name='سائقون')
+        cls.clerks = EmployeeCategory.objects.create(code='CLK', name='إداريون')
+        for number, category in (('B1', cls.drivers), ('B2', cls.drivers), ('B3', cls.clerks)):
+            employee = Employee.objects.create(
+                employee_number=number, name=number, nationality='سعودي', hire_date=date(2020, 1, 1),
+                id_number=number, category=category, basic_salary=Decimal('4000'), insurance_type='A',
+            )
+            Allowance.objects.create(employee=employee, allowance_type=cls.housing, amount=1000)
+        # موظفون قدامى: التعديلات سارية من اليوم
+        Employee.objects.update(created_at=timezone.now() - timedelta(days=60))
+        cls.today = timezone.localdate()
+
+    def setUp(self):
+        from .bulk_operations import select_employees
+
+        self.drivers_qs = select_employees(category=self.drivers)
+        self.version = self._version()
+
+    def _version(self):
+        from .models import DataVersion
+
+        return DataVersion.current().version
+
+    def _salaries(self):
+        return dict(Employee.objects.values_list('employee_number', 'basic_salary'))
+
+    def test_salary_raise_changes_filtered_employees_only(self):
+        from .bulk_operations import apply_salary_raise
+
+        self.assertEqual(apply_salary_raise(self.drivers_qs, 'percent', 10), 2)
+        self.assertEqual(
+            self._salaries(), {'B1': Decimal('4400'), 'B2': Decimal('4400'), 'B3': Decimal('4000')}
+        )
+        self.assertEqual(
+            set(SalaryHistory.objects.filter(effective_from=self.today).values_list('employee__employee_number', 'basic_salary')),
+            {('B1', Decimal('4400')), ('B2', Decimal('4400'))},
+        )
+        self.assertEqual(SalaryHistory.objects.filter(effective_to=self.today).count(), 2)
+        self.assertGreater(self._version(), self.version)
+
+    def test_update_employees_writes_history_and_version(self):
+        from .bulk_operations import update_employees
+
+        self.assertEqual(update_employees(Employee.objects.filter(employee_number='B3'), basic_salary=5000), 1)
+        self.assertEqual(
+            list(SalaryHistory.objects.current().filter(employee__employee_number='B3').values_list('basic_salary', flat=True)),
+            [Decimal('5000')],
+        )
+        self.assertGreater(self._version(), self.version)
+
+    def test_apply_allowance(self):
+        from .bulk_operations import apply_allowance
+
+        transport = AllowanceType.objects.get(name='transportation_allowance')
+        self.assertEqual(apply_allowance(self.drivers_qs, transport, 300), 2)
+        self.assertEqual(
+            set(Allowance.objects.filter(allowance_type=transport).values_list('employee__employee_number', flat=True)),
+            {'B1', 'B2'},
+        )
+        self.assertEqual(
+            AllowanceHistory.objects.filter(allowance_type=transport, effective_from=self.today, amount=300).count(), 2
+        )
+        self.assertGreater(self._version(), self.version)
+
+    def test_apply_allowance_keeps_existing_amounts(self):
+        from .bulk_operations import apply_allowance
+
+        self.assertEqual(apply_allowance(self.drivers_qs, self.housing, 1500, update_existing=False), 0)
+        self.assertEqual(set(Allowance.objects.values_list('amount', flat=True)), {Decimal('1000')})
+
+        apply_allowance(self.drivers_qs, self.housing, 1500)
+        self.assertEqual(
+            dict(Allowance.objects.values_list('employee__employee_number', 'amount')),
+            {'B1': Decimal('1500'), 'B2': Decimal('1500'), 'B3': Decimal('1000')},
+        )
+        self.assertEqual(
+            AllowanceHistory.objects.current().filter(allowance_type=self.housing, amount=1500).count(), 2
+        )
+
+    def test_apply_deactivate(self):
+        from .bulk_operations import apply_deactivate
+
+        self.assertEqual(apply_deactivate(self.drivers_qs), 2)
+        self.assertEqual(list(Employee.active.values_list('employee_number', flat=True)), ['B3'])
+        self.assertEqual(
+            set(SalaryHistory.objects.current().values_list('employee__employee_number', flat=True)), {'B3'}
+        )
+        self.assertEqual(
+            set(AllowanceHistory.objects.current().values_list('employee__employee_number', flat=True)), {'B3'}
+        )
+        self.assertGreater(self._version(), self.version)
+
+
+@override_settings(REPORT_DATABASE_ALIAS=None)
+class ArchiveTests(TestCase):
+    """أرشفة غير النشطين منذ مدة طويلة فقط مع بدلاتهم وسجلهم"""
+
+    @classmethod
+    def setUpTestData(cls):
+        from django.utils import timezone
+
+        from .utils import create_default_allowance_types
+
+        create_default_allowance_types()
+        housing = AllowanceType.objects.get(name='housing_allowance')
+        for number in ('OLD', 'RECENT', 'ACTIVE'):
+            employee = Employee.objects.create(
+                employee_number=number, name=number, nationality='سعودي', hire_date=date(2020, 1, 1),
+                id_number=number, basic_salary=Decimal('4000'), insurance_type='A',
+            )
+            Allowance.objects.create(employee=employee, allowance_type=housing, amount=1000, notes=number)
+        for employee in Employee.objects.exclude(employee_number='ACTIVE'):
+            employee.is_active = False
+            employee.save()
+        now = timezone.now()
+        Employee.objects.filter(employee_number__in=['OLD', 'ACTIVE']).update(updated_at=now - timedelta(days=400))
+        Employee.objects.filter(employee_number='RECENT').update(updated_at=now - timedelta(days=30))
+
+    def test_archives_long_inactive_employees(self):
+        from django.core.management import call_command
+
+        from .models import ArchivedAllowance, ArchivedEmployee, DataVersion, MonthlyCostRollup
+
+        version = DataVersion.current().version
+        old = Employee.objects.get(employee_number='OLD')
+        call_command('archive_inactive_employees', days=365, stdout=io.StringIO())
+
+        self.assertEqual(
+            set(Employee.objects.values_list('employee_number', flat=True)), {'RECENT', 'ACTIVE'}
+        )
+        self.assertFalse(SalaryHistory.objects.filter(employee_id=old.pk).exists())
+
+        archived = ArchivedEmployee.objects.get()
+        self.assertEqual((archived.original_id, archived.employee_number), (old.pk, 'OLD'))
+        self.assertEqual(archived.deactivated_at, old.updated_at)
+        self.assertEqual(len(archived.salary_history), 1)
+        self.assertEqual(archived.salary_history[0]['basic_salary'], '4000.00')
+        self.assertEqual(archived.salary_history[0]['effective_from'], '2020-01-01')
+        self.assertIsNotNone(archived.salary_history[0]['effective_to'])
+        self.assertEqual([row['amount'] for row in archived.allowance_history], ['1000.00'])
+        self.assertEqual(
+            list(ArchivedAllowance.objects.values_list('employee', 'amount', 'notes')),
+            [(archived.pk, Decimal('1000'), 'OLD')],
+        )
+        self.assertGreater(DataVersion.current().version, version)
+
+        # ملخصات الأشهر السابقة حسبت قبل الأرشفة فتبقى شاملة للمؤرشف
+        self.assertEqual(MonthlyCostRollup.objects.get(month=date(2020, 1, 1)).headcount, 3)
+
+    def test_allowance_type_of_archived_allowance_is_protected(self):
+        from django.core.management import call_command
+        from django.db.models import ProtectedError
+
+        from .models import ArchivedAllowance
+
+        call_command('archive_inactive_employees', days=365, stdout=io.StringIO())
+        with self.assertRaises(ProtectedError):
+            AllowanceType.objects.get(name='housing_allowance').delete()
+        self.assertEqual(ArchivedAllowance.objects.count(), 1)
+
+
+@skipUnless(find_spec('pyarrow'), 'pyarrow غير مثبتة')
+@override_settings(REPORT_DATABASE_ALIAS=None)
+class ColumnarExportTests(TestCase):
+    """تصدير Parquet و Arrow بأعمدة مكتوبة الأنواع وبنفس قيم with_costs"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='columnar', password='columnar')
+        generator = SampleDataGenerator(seed=1, prefix='COL')
+        generator.prepare_reference_data()
+        generator.generate(25)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def _export(self, fmt):
+        import pyarrow.feather
+        import pyarrow.parquet
+
+        response = self.client.get(reverse('employees:export_columnar'), {'format': fmt})
+        self.assertEqual(response.status_code, 200)
+        data = io.BytesIO(b''.join(response.streaming_content))
+        if fmt == 'parquet':
+            return pyarrow.parquet.read_table(data)
+        return pyarrow.feather.read_table(data)
+
+    def test_typed_columns_match_costs(self):
+        import pyarrow
+
+        from .columnar_export import write_employees
+
+        expected = {
+            employee.employee_number: employee.annual_cost.quantize(Decimal('0.0001'))
+            for employee in Employee.objects.with_costs()
+        }
+        for fmt in ('parquet', 'arrow'):
+            with self.subTest(format=fmt):
+                table = self._export(fmt)
+                self.assertEqual(table.num_rows, len(expected))
+                self.assertEqual(table.schema.field('hire_date').type, pyarrow.date32())
+                self.assertEqual(table.schema.field('basic_salary').type, pyarrow.decimal128(10, 2))
+                self.assertEqual(table.schema.field('annual_cost').type, pyarrow.decimal128(20, 4))
+                self.assertEqual(
+                    dict(zip(table['employee_number'].to_pylist(), table['annual_cost'].to_pylist())),
+                    expected,
+                )
+
+        # الكتابة في ملف على دفعات صغيرة تعطي مجموعة صفوف لكل دفعة
+        output = io.BytesIO()
+        self.assertEqual(write_employees(Employee.objects.all(), output, batch_size=10), 25)
+        output.seek(0)
+        self.assertEqual(pyarrow.parquet.ParquetFile(output).metadata.num_row_groups, 3)
+
+    def test_unknown_format(self):
+        response = self.client.get(reverse('employees:export_columnar'), {'format': 'csv'})
+        self.assertEqual(response.status_code, 400)
+
+
+class CsvImportTests(TestCase):
+    """استيراد CSV بالترميزين يعطي نفس نتيجة استيراد Excel"""
+
+    HEADERS = ['رقم الموظف (مطلوب)', 'الاسم', 'الجنسية', 'الراتب الأساسي', 'تاريخ التوظيف', 'الفئة',
+               'نوع التأمين', 'عدد الأبناء', 'بدل السكن', 'بدل النقل']
+    ROWS = [
+        ['CSV001', 'أحمد محمد', 'سعودي', '8,000', '2024-01-15', 'موظفين', 'شامل', '2', '2000', ''],
+        ['CSV002', 'خالد علي', 'مصري', '5500.50', '15/03/2023', '', 'أساسي', '', '', '400'],
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        EmployeeCategory.objects.create(code='STAFF', name='موظفين')
+
+    def _import(self, name, content):
+        from .utils import import_employees_from_excel
+
+        result = import_employees_from_excel(SimpleUploadedFile(name, content))
+        self.assertEqual(result['errors'], [])
+        employees = Employee.objects.order_by('employee_number')
+        imported = [
+            (
+                employee.employee_number, employee.name, employee.nationality, employee.basic_salary,
+                employee.hire_date, employee.category_id, employee.insurance_type, employee.num_children,
+                sorted((a.allowance_type.name_arabic, a.amount) for a in employee.allowances.all()),
+            )
+            for employee in employees
+        ]
+        employees.delete()
+        return imported
+
+    def _csv(self, encoding, delimiter=','):
+        output = io.StringIO(newline='')
+        writer = csv.writer(output, delimiter=delimiter)
+        writer.writerow(self.HEADERS)
+        writer.writerows(self.ROWS)
+        return output.getvalue().encode(encoding)
+
+    def _xlsx(self):
+        import xlsxwriter
+
+        output = io.BytesIO()
+        workbook = xlsxwriter.Workbook(output, {'in_memory': True})
+        worksheet = workbook.add_worksheet()
+        for row_num, row in enumerate([self.HEADERS] + self.ROWS):
+            for col, value in enumerate(row):
+                if value != '':
+                    worksheet.write_string(row_num, col, value)
+        workbook.close()
+        return output.getvalue()
+
+    def test_csv_matches_excel(self):
+        expected = self._import('employees.xlsx', self._xlsx())
+        self.assertEqual(expected[0][3], Decimal('8000'))
+        self.assertEqual(expected[1][4], date(2023, 3, 15))
+        self.assertEqual(expected[1][8], [('بدل النقل', Decimal('400.00'))])
+
+        for encoding, delimiter in (('utf-8-sig', ','), ('utf-8', ';'), ('cp1256', ',')):
+            with self.subTest(encoding=encoding, delimiter=delimiter):
+                self.assertEqual(self._import('employees.CSV', self._csv(encoding, delimiter)), expected)
+
+
+class DeltaImportTests(TestCase):
+    """إعادة الاستيراد تكتب الحقول المتغيرة فقط وتتخطى الملف المطابق"""
+
+    HEADERS = ['رقم الموظف', 'الاسم', 'الجنسية', 'الراتب الأساسي', 'تاريخ التوظيف', 'بدل السكن']
+    ROWS = [
+        ['DLT001', 'أحمد محمد', 'سعودي', '8000', '2024-01-15', '2000'],
+        ['DLT002', 'خالد علي', 'مصري', '5500.50', '2023-03-15', '1000'],
+    ]
+
+    def _file(self, rows):
+        output = io.StringIO(newline='')
+        writer = csv.writer(output)
+        writer.writerow(self.HEADERS)
+        writer.writerows(rows)
+        return SimpleUploadedFile('employees.csv', output.getvalue().encode('utf-8-sig'))
+
+    def _import(self, rows):
+        from .utils import import_employees_from_excel
+
+        with CaptureQueriesContext(connection) as queries:
+            result = import_employees_from_excel(self._file(rows))
+        self.assertEqual(result['errors'], [])
+        return result, [query['sql'] for query in queries if query['sql'].startswith('UPDATE "employees_employee"')]
+
+    def test_reimport_writes_changes_only(self):
+        result, _ = self._import(self.ROWS)
+        self.assertEqual((result['imported_count'], result['allowances_count']), (2, 2))
+        self.assertEqual(Employee.objects.get(employee_number='DLT002').salary_history.count(), 1)
+
+        # نفس الملف بدون تغيير في البيانات
+        result, updates = self._import(self.ROWS)
+        self.assertTrue(result['skipped_file'])
+        self.assertEqual((result['unchanged_count'], updates), (2, []))
+
+        # تعديل من الواجهة يلغي تخطي الملف، ويعاد الموظف المعدل فقط لقيم الملف
+        employee = Employee.objects.get(employee_number='DLT001')
+        employee.name = 'اسم معدل'
+        employee.save()
+        untouched = Employee.objects.get(employee_number='DLT002').updated_at
+        result, updates = self._import(self.ROWS)
+        self.assertFalse(result['skipped_file'])
+        self.assertEqual((result['updated_count'], result['unchanged_count']), (1, 1))
+        self.assertEqual(Employee.objects.get(employee_number='DLT001').name, 'أحمد محمد')
+        self.assertEqual(Employee.objects.get(employee_number='DLT002').updated_at, untouched)
+
+        # تغيير الراتب والبدل لموظف واحد: تحديث الراتب فقط مع سجل الرواتب والبدلات
+        rows = [self.ROWS[0], ['DLT002', 'خالد علي', 'مصري', '6000', '2023-03-15', '1200']]
+        result, updates = self._import(rows)
+        self.assertEqual((result['updated_count'], result['unchanged_count'], result['allowances_count']), (1, 1, 1))
+        self.assertEqual(len(updates), 1)
+        self.assertIn('"basic_salary"', updates[0])
+        self.assertNotIn('"name"', updates[0])
+        employee = Employee.objects.get(employee_number='DLT002')
+        self.assertEqual(employee.basic_salary, Decimal('6000.00'))
+        self.assertEqual(employee.allowances.get().amount, Decimal('1200.00'))
+        self.assertEqual(employee.salary_history.current().get().basic_salary, Decimal('6000.00'))
+        self.assertEqual(employee.allowance_history.current().get().amount, Decimal('1200.00'))
+
+    def _rows_with_bad_row(self, bad_salary, bad_wives):
+        return self.HEADERS + ['عدد الزوجات'], [
+            self.ROWS[0] + ['1'],
+            ['DLT003', 'سعد', 'سعودي', bad_salary, '2024-01-01', '500', bad_wives],
+            self.ROWS[1] + ['0'],
+        ]
+
+    def test_invalid_row_does_not_roll_back_batch(self):
+        from .delta_import import import_rows
+
+        result = import_rows(*self._rows_with_bad_row('-100', '0'))
+        self.assertEqual((result['imported_count'], result['allowances_count']), (2, 2))
+        self.assertEqual(len(result['errors']), 1)
+        self.assertTrue(result['errors'][0].startswith('الصف 3:'), result['errors'][0])
+        self.assertFalse(Employee.objects.filter(employee_number='DLT003').exists())
+
+    def test_database_error_retries_rows_one_by_one(self):
+        from unittest import mock
+
+        from .delta_import import import_rows
+
+        # قيمة يرفضها قيد قاعدة البيانات دون أن يكشفها التحقق المسبق
+        with mock.patch('employees.delta_import._validation_message', return_value=None):
+            result = import_rows(*self._rows_with_bad_row('4000', '-1'))
+        self.assertEqual(result['imported_count'], 2)
+        self.assertEqual(len(result['errors']), 1)
+        self.assertTrue(result['errors'][0].startswith('الصف 3:'), result['errors'][0])
+        self.assertEqual(
+            set(Employee.objects.values_list('employee_number', flat=True)), {'DLT001', 'DLT002'}
+        )
+        self.assertEqual(SalaryHistory.objects.count(), 2)
+
+
+@override_settings(REPORT_DATABASE_ALIAS='replica', REPLICA_PIN_SECONDS=5)
+class ReplicaRoutingTests(SimpleTestCase):
+    """توجيه قراءات صفحات التقارير إلى النسخة وتثبيت المستخدم على default بعد الكتابة"""
+
+    factory = RequestFactory()
+
+    @staticmethod
+    @replica_reads
+    def read_alias_view(request):
+        return HttpResponse(router.db_for_read(Employee))
+
+    def test_report_reads_use_replica(self):
+        response = self.read_alias_view(self.factory.get('/'))
+        self.assertEqual(response.content, b'replica')
+        # خارج العرض تعود القراءات إلى default
+        self.assertEqual(router.db_for_read(Employee), 'default')
+
+    def test_writes_use_default(self):
+        @replica_reads
+        def view(request):
+            return HttpResponse(router.db_for_write(Employee, instance=Employee()))
+
+        self.assertEqual(view(self.factory.get('/')).content, b'default')
+
+    def test_pinned_user_reads_from_default(self):
+        request = self.factory.get('/')
+        request.COOKIES[PIN_COOKIE] = '1'
+        self.assertEqual(self.read_alias_view(request).content, b'default')
+
+    def test_streaming_content_reads_from_replica(self):
+        @replica_reads
+        def view(request):
+            return StreamingHttpResponse(router.db_for_read(Employee) for _ in range(2))
+
+        response = view(self.factory.get('/'))
+        self.assertEqual(b''.join(response.streaming_content), b'replicareplica')
+
+    def test_async_view_reads_from_replica(self):
+        @replica_reads
+        async def view(request):
+            return HttpResponse(router.db_for_read(Employee))
+
+        self.assertEqual(async_to_sync(view)(self.factory.get('/')).content, b'replica')
+
+    def test_write_request_pins_reads(self):
+        middleware = ReplicaPinningMiddleware(lambda request: HttpResponse())
+        response = middleware(self.factory.post('/'))
+        self.assertEqual(response.cookies[PIN_COOKIE]['max-age'], 5)
+        self.assertNotIn(PIN_COOKIE, middleware(self.factory.get('/')).cookies)
+
+    def test_read_only_post_does_not_pin(self):
+        middleware = ReplicaPinningMiddleware(replica_reads(lambda request: HttpResponse()))
+        self.assertNotIn(PIN_COOKIE, middleware(self.factory.post('/')).cookies)
+
+    @override_settings(REPORT_DATABASE_ALIAS=None)
+    def test_without_replica_reads_use_default(self):
+        self.assertEqual(self.read_alias_view(self.factory.get('/')).content, b'default')
+        middleware = ReplicaPinningMiddleware(lambda request: HttpResponse())
+        self.assertNotIn(PIN_COOKIE, middleware(self.factory.post('/')).cookies)
+
+
+@override_settings(REPORT_DATABASE_ALIAS='replica')
+class ReplicaDataVersionTests(TestCase):
+    """رقم إصدار البيانات (ETag ولقطة السيناريوهات) يقرأ من نفس قاعدة بيانات الصفحة"""
+
+    def test_version_read_from_report_alias(self):
+        from unittest import mock
+
+        from .db_routing import ReplicaRouter
+        from .models import DataVersion
+        from .scenarios import _snapshot_cache, get_snapshot
+
+        self.addCleanup(_snapshot_cache.clear)
+        DataVersion.bump()
+
+        @replica_reads
+        def view(request):
+            return HttpResponse(get_snapshot().version[0])
+
+        # لا توجد نسخة في الاختبارات، فتوجه القراءات إلى default ويسجل ما يطلب من موجه القراءة
+        with mock.patch.object(ReplicaRouter, 'db_for_read', return_value='default') as db_for_read:
+            response = view(RequestFactory().get('/'))
+        self.assertEqual(response.content, str(DataVersion.current().version).encode())
+        self.assertIn(DataVersion, [call.args[0] for call in db_for_read.call_args_list])
+        self.assertEqual(list(_snapshot_cache), ['replica'])
+
+
+class SampleDataTests(TestCase):
+    """توليد البيانات التجريبية لا يكرر أرقام الموظفين بعد الحذف ويرفض حجم دفعة غير صالح"""
+
+    def test_numbers_continue_after_gaps(self):
+        generator = SampleDataGenerator(seed=1, prefix='GAP')
+        generator.generate(3)
+        Employee.objects.filter(employee_number='GAP000001').delete()
+        generator.generate(2)
+        self.assertEqual(
+            list(Employee.objects.order_by('employee_number').values_list('employee_number', flat=True)),
+            ['GAP000002', 'GAP000003', 'GAP000004', 'GAP000005'],
+        )
+
+    def test_batch_must_be_positive(self):
+        from django.core.management import CommandError, call_command
+
+        with self.assertRaises(CommandError):
+            call_command('create_sample_data', employees=1, batch=0, stdout=io.StringIO())
+        self.assertFalse(Employee.objects.exists())
+
+
+@override_settings(REPORT_DATABASE_ALIAS=None)
+class IndividualReportsZipTests(TestCase):
+    """أرشيف التقارير الفردية يشمل النشطين فقط ما لم تختر الحالة صراحة"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='zip', password='zip')
+        SampleDataGenerator(seed=1, prefix='ZIP').generate(3)
+        Employee.objects.filter(employee_number='ZIP000001').update(is_active=False)
+
+    def _entries(self, **params):
+        import zipfile
+
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('employees:export_all_individual_reports'), params)
+        self.assertEqual(response.status_code, 200)
+        return len(zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content))).namelist())
+
+    def test_active_by_default(self):
+        self.assertEqual(self._entries(), 2)
+        self.assertEqual(self._entries(is_active='false'), 1)
+
+
+@override_settings(REPORT_DATABASE_ALIAS=None)
+class ConditionalReportTests(TestCase):
+    """ETag صفحات التقارير: 304 عند عدم التغيير، ويتغير مع البيانات ومع اليوم"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='etag', password='etag')
+        SampleDataGenerator(seed=1, prefix='ETAG').generate(3)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        self.url = reverse('employees:reports')
+
+    def test_unchanged_data_returns_not_modified(self):
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        employee = Employee.objects.first()
+        employee.basic_salary += 100
+        employee.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_etag_changes_next_day(self):
+        from unittest import mock
+
+        from django.utils import timezone
+
+        etag = self.client.get(self.url)['ETag']
+        tomorrow = timezone.localdate() + timedelta(days=1)
+        with mock.patch.object(timezone, 'localdate', return_value=tomorrow):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+class LocMemWorkersCheckTests(SimpleTestCase):
+    """فحص النشر يحذر من LocMemCache مع أكثر من عملية Gunicorn"""
+
+    def _warnings(self, workers):
+        from unittest import mock
+
+        from accounts.checks import check_locmem_with_workers
+
+        with mock.patch.dict('os.environ', {'GUNICORN_WORKERS': str(workers)}):
+            return [message.id for message in check_locmem_with_workers(None)]
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_locmem_warns_with_several_workers(self):
+        self.assertEqual(self._warnings(4), ['accounts.W001'])
+        self.assertEqual(self._warnings(1), [])
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache'}})
+    def test_shared_cache_does_not_warn(self):
+        self.assertEqual(self._warnings(4), [])
+
+
+@override_settings(REPORT_DATABASE_ALIAS=None)
+class SalaryAllowanceHistoryTests(TestCase):
+    """سجل الرواتب والبدلات والتكلفة في تاريخ معين قبل التعديل وبعده"""
+
+    @classmethod
+    def setUpTestData(cls):
+        from django.utils import timezone
+
+        from .utils import create_default_allowance_types
+
+        create_default_allowance_types()
+        cls.employee = Employee.objects.create(
+            employee_number='HIST1', name='سجل', nationality='سعودي', hire_date=date(2020, 1, 1),
+            id_number='1', basic_salary=Decimal('5000'), insurance_type='A',
+        )
+        cls.housing = Allowance.objects.create(
+            employee=cls.employee, allowance_type=AllowanceType.objects.get(name='housing_allowance'), amount=1000
+        )
+        cls.transport = Allowance.objects.create(
+            employee=cls.employee, allowance_type=AllowanceType.objects.get(name='transportation_allowance'), amount=500
+        )
+        # موظف قديم: التعديلات اللاحقة سارية من اليوم وليس من تاريخ التوظيف
+        Employee.objects.update(created_at=timezone.now() - timedelta(days=60))
+        cls.today = timezone.localdate()
+        cls.yesterday = cls.today - timedelta(days=1)
+
+    def setUp(self):
+        self.employee.refresh_from_db()
+
+    def test_opening_rows_start_at_hire_date(self):
+        self.assertEqual(
+            list(SalaryHistory.objects.values_list('basic_salary', 'effective_from', 'effective_to')),
+            [(Decimal('5000'), date(2020, 1, 1), None)],
+        )
+        self.assertEqual(AllowanceHistory.objects.filter(effective_from=date(2020, 1, 1)).count(), 2)
+
+    def test_salary_change_is_effective_from_today(self):
+        from .history import company_cost_as_of, cost_rows_as_of
+
+        before = company_cost_as_of(self.today)
+        self.employee.basic_salary = Decimal('6000')
+        self.employee.save()
+
+        self.assertEqual(SalaryHistory.objects.as_of(self.yesterday).get().basic_salary, Decimal('5000'))
+        self.assertEqual(SalaryHistory.objects.as_of(self.today).get().basic_salary, Decimal('6000'))
+        self.assertEqual(cost_rows_as_of(self.yesterday).get().monthly_gross, Decimal('6500'))
+        self.assertEqual(cost_rows_as_of(self.today).get().monthly_gross, Decimal('7500'))
+        self.assertEqual(company_cost_as_of(self.yesterday), before)
+        after = company_cost_as_of(self.today)
+        self.assertEqual(after['total_employees'], 1)
+        self.assertEqual(after['total_monthly_cost'] - before['total_monthly_cost'], 1000)
+
+    def test_allowance_save_and_delete_sync_only_its_type(self):
+        transport_row = AllowanceHistory.objects.get(allowance_type=self.transport.allowance_type)
+
+        self.housing.amount = 1200
+        self.housing.save()
+        housing_rows = AllowanceHistory.objects.filter(allowance_type=self.housing.allowance_type)
+        self.assertEqual(
+            list(housing_rows.values_list('amount', 'effective_to')),
+            [(Decimal('1000'), self.today), (Decimal('1200'), None)],
+        )
+        self.assertEqual(AllowanceHistory.objects.get(allowance_type=self.transport.allowance_type), transport_row)
+
+        self.transport.delete()
+        transport_row.refresh_from_db()
+        self.assertEqual(transport_row.effective_to, self.today)
+        self.assertEqual(
+            list(AllowanceHistory.objects.as_of(self.today).values_list('amount', flat=True)), [Decimal('1200')]
+        )
+
+    def test_backfill_migration_opens_rows_for_active_employees(self):
+        from importlib import import_module
+
+        from django.apps import apps
+
+        backfill = import_module('employees.migrations.0006_salary_allowance_history').backfill_opening_history
+        SampleDataGenerator(seed=1, prefix='FILL').generate(3)
+        Employee.objects.filter(employee_number='FILL000001').update(is_active=False)
+        SalaryHistory.objects.all().delete()
+        AllowanceHistory.objects.all().delete()
+
+        backfill(apps, None)
+        self.assertEqual(
+            set(SalaryHistory.objects.values_list('employee_id', 'basic_salary', 'effective_from')),
+            set(Employee.active.values_list('pk', 'basic_salary', 'hire_date')),
+        )
+        self.assertEqual(
+            set(AllowanceHistory.objects.values_list('employee_id', 'allowance_type_id', 'amount', 'effective_from')),
+            set(Allowance.objects.filter(employee__is_active=True).values_list(
+                'employee_id', 'allowance_type_id', 'amount', 'employee__hire_date'
+            )),
+        )
+
+
+@override_settings(REPORT_DATABASE_ALIAS=None)
+class CostRollupTests(TestCase):
+    """الأشهر المنتهية يعاد حسابها عند إضافة سجلات بأثر رجعي فقط"""
+
+    def _hire(self, number, hire_date):
+        return Employee.objects.create(
+            employee_number=number, name=number, nationality='سعودي', hire_date=hire_date,
+            id_number=number, basic_salary=Decimal('4000'), insurance_type='A',
+        )
+
+    def _build(self):
+        from .rollups import build_month, months_to_build
+
+        months = months_to_build()
+        for month in months:
+            build_month(month)
+        return months
+
+    def test_back_dated_history_rebuilds_earlier_months(self):
+        from django.utils import timezone
+
+        from .models import MonthlyCostRollup
+        from .rollups import month_start, previous_month
+
+        current = month_start(timezone.localdate())
+        earlier = previous_month(previous_month(current))
+        self._hire('R1', earlier)
+        self.assertEqual(self._build(), [earlier, previous_month(current), current])
+        self.assertEqual(self._build(), [current])
+
+        # موظف مستورد بتاريخ توظيف قبل الأشهر المحسوبة
+        self._hire('R2', previous_month(earlier))
+        self.assertEqual(self._build(), [previous_month(earlier), earlier, previous_month(current), current])
+        self.assertEqual(MonthlyCostRollup.objects.get(month=earlier).headcount, 2)
+        self.assertEqual(self._build(), [current])
+
+
+@override_settings(REPORT_DATABASE_ALIAS=None)
+class DashboardGatherTests(TransactionTestCase):
+    """استعلامات لوحة التحكم المتوازية تعطي نفس نتائج التنفيذ المتزامن وتعيد استخدام اتصالاتها"""
+
+    def setUp(self):
+        generator = SampleDataGenerator(seed=1, prefix='DSH')
+        generator.prepare_reference_data()
+        generator.generate(30)
+        Employee.objects.filter(employee_number__in=['DSH000001', 'DSH000002']).update(is_active=False)
+
+    def test_concurrent_totals_match_sync(self):
+        from django.db.backends.signals import connection_created
+
+        from .async_queries import gather_queries
+        from .views import (
+            _dashboard_category_counts, _dashboard_recent_employees, _dashboard_top_nationalities,
+            _dashboard_totals,
+        )
+
+        queries = {
+            'totals': _dashboard_totals,
+            'categories': _dashboard_category_counts,
+            'nationalities': _dashboard_top_nationalities,
+            'recent_employees': _dashboard_recent_employees,
+        }
+        expected = {name: func() for name, func in queries.items()}
+        self.assertEqual(expected['totals']['total_employees'], 28)
+
+        opened = []
+
+        def on_connect(sender, connection, **kwargs):
+            opened.append(connection.alias)
+
+        connection_created.connect(on_connect)
+        self.addCleanup(connection_created.disconnect, on_connect)
+
+        for _ in range(3):
+            self.assertEqual(async_to_sync(gather_queries)(**queries), expected)
+        # خيوط المجموعة تفتح اتصالها مرة واحدة ثم تعيد استخدامه في كل طلب
+        self.assertLessEqual(len(opened), 4)
+
+
+@override_settings(REPORT_DATABASE_ALIAS=None)
+class ScenarioTests(TestCase):
+    """محرك السيناريوهات يطابق دوال نموذج Employee ولا يكتب في قاعدة البيانات"""
+
+    @classmethod
+    def setUpTestData(cls):
+        from .utils import create_default_allowance_types
+
+        create_default_allowance_types()
+        types = {t.name: t for t in AllowanceType.objects.all()}
+        drivers = EmployeeCategory.objects.create(code='DRV', name='سائقون')
+        clerks = EmployeeCategory.objects.create(code='CLK', name='إداريون')
+        rows = [
+            # الرقم، الفئة، الجنسية، تاريخ التوظيف، الراتب، البدلات (النوع، المبلغ، الطبيعة، نشط)
+            ('SC1', drivers, 'سعودي', date(2012, 3, 1), '5000', [
+                ('housing_allowance', '1000', 'CASH', True), ('tickets', '2400', 'CASH', True),
+            ]),
+            ('SC2', drivers, 'مصري', date(2021, 6, 15), '4000', [
+                ('housing_allowance', '800', 'CASH', True), ('transportation_allowance', '300', 'IN_KIND', True),
+            ]),
+            ('SC3', clerks, 'مصري', date(2018, 1, 1), '6000', [
+                ('transportation_allowance', '500', 'CASH', True), ('food_allowance', '400', 'CASH', False),
+            ]),
+        ]
+        for number, category, nationality, hire_date, salary, allowances in rows:
+            employee = Employee.objects.create(
+                employee_number=number, name=number, nationality=nationality, hire_date=hire_date,
+                id_number=number, category=category, basic_salary=Decimal(salary), insurance_type='A',
+            )
+            for type_name, amount, kind, is_active in allowances:
+                Allowance.objects.create(
+                    employee=employee, allowance_type=types[type_name], amount=Decimal(amount),
+                    type=kind, is_active=is_active,
+                )
+        inactive = Employee.objects.create(
+            employee_number='SC4', name='SC4', nationality='سعودي', hire_date=date(2015, 1, 1),
+            id_number='SC4', category=drivers, basic_salary=Decimal('9000'), insurance_type='A', is_active=False,
+        )
+        Allowance.objects.create(employee=inactive, allowance_type=types['housing_allowance'], amount=Decimal('2000'))
+
+    def setUp(self):
+        from . import scenarios
+
+        scenarios._snapshot_cache.clear()
+        self.snapshot = scenarios.ScenarioSnapshot.load()
+
+    def _model_totals(self, salary=None, allowance=None):
+        """الإجماليات من دوال النموذج بعد تعديل نسخ الموظفين في الذاكرة دون حفظها"""
+        totals = dict.fromkeys(('basic_salary', 'annual_cost', 'eos_liability'), Decimal('0'))
+        employees = Employee.active.select_related('category').prefetch_related('allowances__allowance_type')
+        for employee in employees:
+            if salary:
+                employee.basic_salary = salary(employee)
+            if allowance:
+                for item in employee.allowances.all():
+                    item.amount = allowance(employee, item)
+            totals['basic_salary'] += employee.basic_salary
+            totals['annual_cost'] += employee.get_annual_total_cost()
+            totals['eos_liability'] += employee.calculate_end_of_service_benefit()['total_amount']
+        return {key: float(value) for key, value in totals.items()}
+
+    def _assert_totals(self, result, expected, side='after'):
+        for key, value in expected.items():
+            self.assertAlmostEqual(result['totals'][key][side], value, delta=0.01, msg=key)
+
+    def test_baseline_matches_model_methods(self):
+        result = self.snapshot.run([])
+        self.assertEqual(result['employees'], 3)
+        self._assert_totals(result, self._model_totals(), side='before')
+        self.assertEqual({row['delta'] for row in result['totals'].values()}, {0})
+
+    def test_percent_and_fixed_salary_adjustments(self):
+        result = self.snapshot.run([{'target': 'basic_salary', 'mode': 'percent', 'value': 10}])
+        self._assert_totals(result, self._model_totals(salary=lambda e: e.basic_salary * Decimal('1.1')))
+        self.assertAlmostEqual(result['totals']['basic_salary']['delta'], 1500, delta=0.01)
+
+        result = self.snapshot.run([{'target': 'basic_salary', 'mode': 'fixed', 'value': 500}])
+        self._assert_totals(result, self._model_totals(salary=lambda e: e.basic_salary + 500))
+        self.assertAlmostEqual(result['totals']['basic_salary']['delta'], 1500, delta=0.01)
+
+    def test_adjustments_match_category_nationality_and_allowance_type(self):
+        result = self.snapshot.run([{'target': 'basic_salary', 'value': 10, 'category': 'DRV'}])
+        self.assertAlmostEqual(result['by_category']['DRV']['basic_salary']['delta'], 900, delta=0.01)
+        self.assertEqual(result['by_category']['CLK']['annual_cost']['delta'], 0)
+        self._assert_totals(result, self._model_totals(
+            salary=lambda e: e.basic_salary * Decimal('1.1') if e.category.code == 'DRV' else e.basic_salary
+        ))
+
+        result = self.snapshot.run([{'target': 'basic_salary', 'mode': 'fixed', 'value': 1000, 'nationality': 'مصري'}])
+        self.assertAlmostEqual(result['by_nationality']['مصري']['basic_salary']['delta'], 2000, delta=0.01)
+        self.assertEqual(result['by_nationality']['سعودي']['annual_cost']['delta'], 0)
+
+        adjustment = {'target': 'allowance', 'value': 50, 'allowance_type': 'housing_allowance', 'category': 'DRV'}
+        result = self.snapshot.run([adjustment])
+        self.assertEqual(result['totals']['basic_salary']['delta'], 0)
+        self._assert_totals(result, self._model_totals(
+            allowance=lambda e, item: item.amount * Decimal('1.5')
+            if item.allowance_type.name == 'housing_allowance' and e.category.code == 'DRV' else item.amount
+        ))
+        # بدل النقل العيني (SC2) يغير التكلفة دون نهاية الخدمة، والنقدي (SC3) يغير الاثنين
+        result = self.snapshot.run([
+            {'target': 'allowance', 'value': 100, 'allowance_type': 'transportation_allowance', 'nationality': 'مصري'},
+        ])
+        self._assert_totals(result, self._model_totals(
+            allowance=lambda e, item: item.amount * 2
+            if item.allowance_type.name == 'transportation_allowance' and e.nationality == 'مصري' else item.amount
+        ))
+
+        # فلتر لا يطابق أحداً لا يغير شيئاً
+        result = self.snapshot.run([{'target': 'basic_salary', 'value': 10, 'category': 'NONE'}])
+        self.assertEqual({row['delta'] for row in result['totals'].values()}, {0})
+
+        with self.assertRaises(ValueError):
+            self.snapshot.run([{'target': 'basic_salary', 'value': 10, 'allowance_type': 'housing_allowance'}])
+
+    def test_scenario_never_writes(self):
+        from .scenarios import run_scenario
+
+        salaries = list(Employee.objects.order_by('pk').values_list('basic_salary', flat=True))
+        amounts = list(Allowance.objects.order_by('pk').values_list('amount', flat=True))
+        with CaptureQueriesContext(connection) as queries:
+            run_scenario([{'target': 'basic_salary', 'value': 25}, {'target': 'allowance', 'mode': 'fixed', 'value': 100}])
+            run_scenario([{'target': 'basic_salary', 'value': 5}])
+        self.assertTrue(all(query['sql'].lstrip().upper().startswith('SELECT') for query in queries.captured_queries))
+        self.assertEqual(list(Employee.objects.order_by('pk').values_list('basic_salary', flat=True)), salaries)
+        self.assertEqual(list(Allowance.objects.order_by('pk').values_list('amount', flat=True)), amounts)
+
+        # اللقطة المحملة لا تستعلم عند تشغيل السيناريو
+        with self.assertNumQueries(0):
+            self.snapshot.run([{'target': 'basic_salary', 'value': 25}])
+
+    def test_load_skips_allowances_of_employees_added_during_load(self):
+        from unittest import mock
+
+        from .scenarios import ScenarioSnapshot
+
+        housing = AllowanceType.objects.get(name='housing_allowance')
+        real_filter = Allowance.objects.filter
+
+        def hire_then_filter(*args, **kwargs):
+            # موظف يضاف بين استعلام الموظفين واستعلام البدلات
+            if not Employee.objects.filter(employee_number='SC5').exists():
+                late = Employee.objects.create(
+                    employee_number='SC5', name='SC5', nationality='سعودي', hire_date=date(2024, 1, 1),
+                    id_number='SC5', basic_salary=Decimal('3000'), insurance_type='A',
+                )
+                Allowance.objects.create(employee=late, allowance_type=housing, amount=Decimal('500'))
+            return real_filter(*args, **kwargs)
+
+        with mock.patch.object(Allowance.objects, 'filter', side_effect=hire_then_filter):
+            snapshot = ScenarioSnapshot.load()
+        self.assertEqual(len(snapshot), 3)
+        self.assertEqual(len(snapshot.allowance_employee), 6)
+
+
+class ForecastTests(TestCase):
+    """توقع تكلفة القوى العاملة: دورات الصرف كل سنتين وحد الخمس سنوات والتوظيف المستقبلي"""
+
+    START = date(2025, 1, 1)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.biennial = AllowanceType.objects.create(name='biennial_bonus', name_arabic='مكافأة كل سنتين', frequency='BIENNIAL')
+        cls.monthly = AllowanceType.objects.create(name='housing_allowance', name_arabic='بدل السكن', frequency='MONTHLY')
+
+    def _employee(self, number, hire_date, salary='4000', **kwargs):
+        return Employee.objects.create(
+            employee_number=number, name=number, nationality='سعودي', hire_date=hire_date,
+            id_number=number, basic_salary=Decimal(salary), insurance_type='A', **kwargs,
+        )
+
+    def _project(self, years=3, **kwargs):
+        from .forecast import ForecastSnapshot
+
+        return ForecastSnapshot.load().project(years, raise_rate=0.0, start=self.START, **kwargs)
+
+    def test_biennial_allowances_and_tickets_in_cycle_years(self):
+        # خمس سنوات خدمة في بداية التوقع: السنة الأولى (6) والثالثة (8) سنوات صرف
+        employee = self._employee('F1', date(2020, 1, 1), num_wives=1, num_children=2, ticket_type='BIENNIAL')
+        Allowance.objects.create(employee=employee, allowance_type=self.biennial, amount=Decimal('6000'))
+        Allowance.objects.create(employee=employee, allowance_type=self.monthly, amount=Decimal('1000'))
+
+        forecast = self._project()
+        self.assertEqual([year.allowances for year in forecast], [18000, 12000, 18000])
+        self.assertEqual([year.family_tickets for year in forecast], [12000, 0, 12000])
+        self.assertEqual([year.basic_salaries for year in forecast], [48000] * 3)
+
+        # التذاكر السنوية تصرف كل سنة
+        Employee.objects.filter(pk=employee.pk).update(ticket_type='ANNUAL')
+        self.assertEqual([year.family_tickets for year in self._project()], [12000] * 3)
+
+    def test_eos_accrual_jumps_after_five_years(self):
+        # أربع سنوات خدمة: نصف شهر للسنة الخامسة ثم شهر كامل لكل سنة بعدها
+        employee = self._employee('F2', date(2021, 1, 1))
+        Allowance.objects.create(employee=employee, allowance_type=self.monthly, amount=Decimal('1000'))
+        in_kind = AllowanceType.objects.create(name='food_allowance', name_arabic='بدل الإعاشة', frequency='MONTHLY')
+        # البدل العيني يدخل في التكلفة دون نهاية الخدمة
+        Allowance.objects.create(employee=employee, allowance_type=in_kind, amount=Decimal('500'), type='IN_KIND')
+
+        forecast = self._project()
+        self.assertEqual([year.eos_accrual for year in forecast], [2500, 5000, 5000])
+        self.assertEqual([year.eos_liability for year in forecast], [12500, 17500, 22500])
+        self.assertEqual(forecast[0].total_cost, 48000 + 18000 + 2500)
+
+    def test_future_hires_join_after_their_hire_date(self):
+        self._employee('F3', date(2010, 1, 1))
+        self._employee('F4', date(2026, 6, 1), salary='3000')
+
+        forecast = self._project()
+        self.assertEqual([year.headcount for year in forecast], [1, 2, 2])
+        self.assertEqual([year.basic_salaries for year in forecast], [48000, 84000, 84000])
+        # سنوات الخدمة تبدأ من تاريخ التوظيف: لا التزام في السنة الأولى من الخدمة
+        self.assertEqual(forecast[1].eos_liability, forecast[0].eos_liability + 4000)
+
+    def test_years_out_of_range(self):
+        from .forecast import MAX_FORECAST_YEARS
+
+        self._employee('F5', date(2020, 1, 1))
+        for years in (0, MAX_FORECAST_YEARS + 1):
+            with self.subTest(years=years), self.assertRaises(ValueError):
+                self._project(years)
+        self.assertEqual(len(self._project(MAX_FORECAST_YEARS)), MAX_FORECAST_YEARS)
+
+    def test_load_skips_allowances_of_employees_added_during_load(self):
+        from unittest import mock
+
+        from .forecast import ForecastSnapshot
+
+        self._employee('F6', date(2020, 1, 1))
+        real_filter = Allowance.objects.filter
+
+        def hire_then_filter(*args, **kwargs):
+            # موظف يضاف بين استعلام الموظفين واستعلام البدلات
+            if not Employee.objects.filter(employee_number='F7').exists():
+                late = self._employee('F7', date(2024, 1, 1))
+                Allowance.objects.create(employee=late, allowance_type=self.monthly, amount=Decimal('500'))
+            return real_filter(*args, **kwargs)
+
+        with mock.patch.object(Allowance.objects, 'filter', side_effect=hire_then_filter):
+            snapshot = ForecastSnapshot.load()
+        self.assertEqual(len(snapshot), 1)
+        self.assertEqual(list(snapshot.recurring_allowances), [0.0])
+
+
+@override_settings(PROFILING_ENABLED=True, PROFILING_SAMPLE_INTERVAL=0.001)
+class ProfilingTests(TestCase):
+    """تحليل الطلب للإداريين فقط، مع أزمنة SQL والاستعلامات المكررة وعينات خيط الطلب وحده"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user(username='profiler', password='profiler', is_staff=True)
+        cls.user = User.objects.create_user(username='viewer', password='viewer')
+
+    def setUp(self):
+        import tempfile
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        settings_override = override_settings(PROFILING_DIR=self.directory)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def _files(self):
+        import os
+
+        return sorted(os.listdir(self.directory))
+
+    def test_non_staff_profile_param_is_ignored(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('accounts:profile'), {'_profile': 'flame'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/html'))
+        self.assertEqual(self._files(), [])
+
+    def test_staff_report_has_sql_timings_duplicates_and_request_thread_samples(self):
+        import threading
+        import time
+
+        from .profiling import ProfilingMiddleware
+
+        stop = threading.Event()
+
+        def other_request_thread():
+            while not stop.is_set():
+                sum(range(1000))
+
+        def profiled_view(request):
+            User.objects.filter(username='viewer').exists()
+            User.objects.filter(username='viewer').exists()
+            User.objects.filter(username='profiler').exists()
+            time.sleep(0.05)
+            return HttpResponse('ok')
+
+        other = threading.Thread(target=other_request_thread)
+        other.start()
+        self.addCleanup(other.join)
+        self.addCleanup(stop.set)
+
+        request = RequestFactory().get('/', {'_profile': 'flame'})
+        request.user = self.staff
+        response = ProfilingMiddleware(profiled_view)(request)
+        stop.set()
+
+        report = response.content.decode()
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        self.assertIn('SQL:', report)
+        self.assertIn('في 3 استعلام', report)
+        self.assertIn('الاستعلامات المكررة (نفس النص والمعاملات): 1', report)
+        self.assertIn('الاستعلامات المتشابهة (N+1 محتمل): 1', report)
+        self.assertRegex(report, r'\n  2× [\d.]+ ms  SELECT')
+
+        files = self._files()
+        self.assertEqual([name.rsplit('.', 1)[1] for name in files], ['folded', 'txt'])
+        with open(f'{self.directory}/{files[0]}', encoding='utf-8') as f:
+            folded = f.read()
+        self.assertIn('profiled_view', folded)
+        self.assertNotIn('other_request_thread', folded)
+
+    def test_staff_header_keeps_page_and_adds_server_timing(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse('accounts:profile'), HTTP_X_PROFILE='cprofile')
+        self.assertTrue(response['Content-Type'].startswith('text/html'))
+        self.assertIn('sql;dur=', response['Server-Timing'])
+        self.assertEqual(
+            [name.rsplit('.', 1)[1] for name in self._files()], ['prof', 'txt']
+        )
+        self.assertTrue(self._files()[0].startswith(response['X-Profile-Id']))
+
+    @override_settings(PROFILING_ENABLED=False)
+    def test_disabled_middleware_is_not_used(self):
+        from unittest import mock
+
+        from django.core.exceptions import MiddlewareNotUsed
+        from django.db.backends.base.base import BaseDatabaseWrapper
+
+        from .profiling import ProfilingMiddleware
+
+        with self.assertRaises(MiddlewareNotUsed):
+            ProfilingMiddleware(lambda request: HttpResponse())
+
+        # لا يلتف حول الاتصالات ولا يحلل حتى مع طلب التحليل من إداري
+        self.client.force_login(self.staff)
+        original = BaseDatabaseWrapper.execute_wrapper
+        with mock.patch.object(BaseDatabaseWrapper, 'execute_wrapper', autospec=True, side_effect=original) as wrapper:
+            response = self.client.get(reverse('accounts:profile'), {'_profile': 'flame'})
+        self.assertTrue(response['Content-Type'].startswith('text/html'))
+        self.assertFalse(wrapper.called)
+        self.assertEqual(self._files(), [])
+
+
+@override_settings(REPORT_DATABASE_ALIAS=None)
+class EmployeeAdminTests(TestCase):
+    """صفحة الموظفين في لوحة الإدارة: ترقيم بعدد مخزن وعدد استعلامات ثابت وإجراءات جماعية مع السجل"""
+
+    @classmethod
+    def setUpTestData(cls):
+        from django.utils import timezone
+
+        from .utils import create_default_allowance_types
+
+        cls.admin = User.objects.create_superuser(username='admin', password='admin')
+        create_default_allowance_types()
+        housing = AllowanceType.objects.get(name='housing_allowance')
+        for number in ('A1', 'A2', 'A3'):
+            employee = Employee.objects.create(
+                employee_number=number, name=number, nationality='سعودي', hire_date=date(2020, 1, 1),
+                id_number=number, basic_salary=Decimal('4000'), insurance_type='A',
+            )
+            Allowance.objects.create(employee=employee, allowance_type=housing, amount=1000)
+        # موظفون قدامى: التعديلات سارية من اليوم
+        Employee.objects.update(created_at=timezone.now() - timedelta(days=60))
+        cls.today = timezone.localdate()
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.admin)
+        self.url = reverse('admin:employees_employee_changelist')
+
+    def _version(self):
+        from .models import DataVersion
+
+        return DataVersion.current().version
+
+    def _action(self, action, numbers, **data):
+        """تنفيذ إجراء على الموظفين المحددين وإرجاع رسائل الصفحة بعد التحويل"""
+        ids = Employee.objects.filter(employee_number__in=numbers).values_list('pk', flat=True)
+        response = self.client.post(self.url, {'action': action, '_selected_action': list(ids), **data}, follow=True)
+        self.assertEqual(response.status_code, 200)
+        return [str(message) for message in response.context['messages']]
+
+    def test_paginator_caches_count_per_data_version(self):
+        from .paginators import EstimatedCountPaginator
+
+        queryset = Employee.objects.filter(is_active=True)
+        self.assertEqual(EstimatedCountPaginator(queryset, 2).count, 3)
+
+        # نفس الاستعلام ونفس الإصدار: لا COUNT جديد (استعلام إصدار البيانات فقط)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(EstimatedCountPaginator(queryset, 2).count, 3)
+        self.assertFalse([query for query in queries if 'COUNT' in query['sql']])
+
+        Employee.objects.filter(employee_number='A3').delete()
+        self.assertEqual(EstimatedCountPaginator(queryset, 2).count, 2)
+
+        # قائمة عادية واستعلام فارغ دون نتائج
+        self.assertEqual(EstimatedCountPaginator([1, 2, 3], 2).count, 3)
+        self.assertEqual(EstimatedCountPaginator(Employee.objects.filter(pk__in=[]), 2).count, 0)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        def count_queries():
+            cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(self.url, {'o': '7'})
+            self.assertEqual(response.status_code, 200)
+            return len(queries)
+
+        generator = SampleDataGenerator(seed=1, prefix='ADM')
+        generator.prepare_reference_data()
+        small = count_queries()
+        generator.generate(40)
+        self.assertEqual(count_queries(), small)
+
+    def test_raise_basic_salary_action(self):
+        version = self._version()
+        self.assertEqual(
+            self._action('raise_basic_salary', ['A1', 'A2'], percentage='10'),
+            ['تمت زيادة الراتب الأساسي 10% لـ 2 موظف'],
+        )
+        self.assertEqual(
+            dict(Employee.objects.values_list('employee_number', 'basic_salary')),
+            {'A1': Decimal('4400'), 'A2': Decimal('4400'), 'A3': Decimal('4000')},
+        )
+        self.assertEqual(
+            set(SalaryHistory.objects.current().values_list('employee__employee_number', 'basic_salary', 'effective_from')),
+            {('A1', Decimal('4400'), self.today), ('A2', Decimal('4400'), self.today), ('A3', Decimal('4000'), date(2020, 1, 1))},
+        )
+        self.assertEqual(SalaryHistory.objects.filter(effective_to=self.today).count(), 2)
+        self.assertGreater(self._version(), version)
+
+    def test_raise_without_percentage_changes_nothing(self):
+        version = self._version()
+        self.assertEqual(
+            self._action('raise_basic_salary', ['A1'], percentage=''),
+            ['يرجى إدخال نسبة زيادة صحيحة بين 0.01 و 100'],
+        )
+        self.assertEqual(set(Employee.objects.values_list('basic_salary', flat=True)), {Decimal('4000')})
+        self.assertEqual(SalaryHistory.objects.count(), 3)
+        self.assertEqual(self._version(), version)
+
+    def test_deactivate_and_activate_actions(self):
+        self.assertEqual(self._action('deactivate_employees', ['A1', 'A2']), ['تم إلغاء تفعيل 2 موظف'])
+        self.assertEqual(list(Employee.active.values_list('employee_number', flat=True)), ['A3'])
+        for model in (SalaryHistory, AllowanceHistory):
+            self.assertEqual(
+                list(model.objects.current().values_list('employee__employee_number', flat=True)), ['A3']
+            )
+            self.assertEqual(model.objects.filter(effective_to=self.today).count(), 2)
+
+        version = self._version()
+        # المفعل مسبقاً لا يحسب
+        self.assertEqual(self._action('activate_employees', ['A1', 'A3']), ['تم تفعيل 1 موظف'])
+        self.assertEqual(
+            sorted(Employee.active.values_list('employee_number', flat=True)), ['A1', 'A3']
+        )
+        for model in (SalaryHistory, AllowanceHistory):
+            self.assertEqual(
+                set(model.objects.current().values_list('employee__employee_number', 'effective_from')),
+                {('A1', self.today), ('A3', date(2020, 1, 1))},
+            )
+        self.assertGreater(self._version(), version)
@@ -0,0 +1,130 @@
+"""
+صور مصغرة لصور الموظفين بأحجام ثابتة وبصيغتي WebP و JPEG
+
+تبنى الصور المصغرة في الخلفية بعد حفظ الموظف (خيط منفصل بعد اكتمال المعاملة)،
+وأمر build_photo_thumbnails يعالج الصور الموجودة باستخدام عدة عمليات
+"""
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, connections, transaction
+
+from .models import Employee
+
+logger = logging.getLogger(__name__)
+
+# الأحجام: الاسم -> أقصى طول للضلع بالبكسل
+THUMBNAIL_SIZES = {
+    'small': 64,
+    'medium': 320,
+}
+
+# الصيغة -> (امتداد الملف، إعدادات الحفظ في Pillow)
+THUMBNAIL_FORMATS = {
+    'webp': ('webp', {'format': 'WEBP', 'quality': 80, 'method': 4}),
+    'jpeg': ('jpg', {'format': 'JPEG', 'quality': 85, 'optimize': True, 'progressive': True}),
+}
+
+THUMBNAILS_DIR = 'employee_photos/thumbs'
+
+# خيط واحد يكفي لمعالجة الصور المرفوعة من الواجهة
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='thumbnails')
+
+
+def thumbnail_name(photo_name, size, fmt):
+    base = os.path.splitext(os.path.basename(photo_name))[0]
+    extension = THUMBNAIL_FORMATS[fmt][0]
+    return f'{THUMBNAILS_DIR}/{base}_{size}.{extension}'
+
+
+def delete_thumbnails(thumbnails):
+    """حذف ملفات الصور المصغرة المسجلة"""
+    for size, formats in thumbnails.items():
+        if size == 'source':
+            continue
+        for name in formats.values():
+            if default_storage.exists(name):
+                default_storage.delete(name)
+
+
+def render_thumbnails(photo_name):
+    """
+    إنشاء الصور المصغرة لصورة واحدة وحفظها وإرجاع قاموس الأسماء:
+    {'source': photo_name, 'small': {'webp': ..., 'jpeg': ...}, ...}
+    لا تستخدم قاعدة البيانات حتى يمكن تشغيلها في عملية منفصلة
+    """
+    from PIL import Image, ImageOps
+
+    with default_storage.open(photo_name, 'rb') as f:
+        image = Image.open(f)
+        image = ImageOps.exif_transpose(image)
+        image = image.convert('RGB')
+
+    thumbnails = {'source': photo_name}
+    for size, max_side in THUMBNAIL_SIZES.items():
+        resized = image.copy()
+        resized.thumbnail((max_side, max_side), Image.LANCZOS)
+        thumbnails[size] = {}
+        for fmt, (_, options) in THUMBNAIL_FORMATS.items():
+            buffer = BytesIO()
+            resized.save(buffer, **options)
+            name = thumbnail_name(photo_name, size, fmt)
+            if default_storage.exists(name):
+                default_storage.delete(name)
+            thumbnails[size][fmt] = default_storage.save(name, ContentFile(buffer.getvalue()))
+
+    return thumbnails
+
+
+def save_thumbnails(employee_pk, photo_name, thumbnails):
+    """تسجيل الصور المصغرة إذا لم تتغير صورة الموظف أثناء المعالجة"""
+    previous = Employee.objects.filter(pk=employee_pk).values_list('photo_thumbnails', flat=True).first()
+
+    # update لتفادي إشارات الحفظ (سجل الرواتب وإصدار البيانات)
+    updated = Employee.objects.filter(pk=employee_pk, photo=photo_name).update(photo_thumbnails=thumbnails)
+    if not updated:
+        delete_thumbnails(thumbnails)
+    elif previous and previous.get('source') != photo_name:
+        delete_thumbnails(previous)
+    return bool(updated)
+
+
+def build_employee_thumbnails(employee_pk, photo_name):
+    try:
+        save_thumbnails(employee_pk, photo_name, render_thumbnails(photo_name))
+    except Exception:
+        logger.exception('تعذر إنشاء الصور المصغرة للموظف %s', employee_pk)
+
+
+def _build_in_background(employee_pk, photo_name):
+    close_old_connections()
+    try:
+        build_employee_thumbnails(employee_pk, photo_name)
+    finally:
+        connections.close_all()
+
+
+def schedule_thumbnails(employee):
+    """
+    جدولة إنشاء الصور المصغرة بعد حفظ الموظف إذا تغيرت صورته
+    EMPLOYEE_THUMBNAILS_ASYNC = False ينفذها مباشرة (للاختبارات والأوامر)
+    """
+    photo_name = employee.photo.name if employee.photo else ''
+    thumbnails = employee.photo_thumbnails or {}
+    if thumbnails.get('source', '') == photo_name:
+        return
+
+    if not photo_name:
+        delete_thumbnails(thumbnails)
+        Employee.objects.filter(pk=employee.pk).update(photo_thumbnails={})
+        return
+
+    if getattr(settings, 'EMPLOYEE_THUMBNAILS_ASYNC', True):
+        transaction.on_commit(lambda: _executor.submit(_build_in_background, employee.pk, photo_name))
+    else:
+        build_employee_thumbnails(employee.pk, photo_name)
@@ -14,6 +14,7 @@ urlpatterns = [
     path('employees/<int:pk>/', views.employee_detail, name='employee_detail'),
     path('employees/<int:pk>/edit/', views.employee_edit, name='employee_edit'),
     path('employees/<int:pk>/delete/', views.employee_delete, name='employee_delete'),
+    path('employees/bulk/', views.bulk_operations, name='bulk_operations'),
 
     # التقارير
     path('reports/', views.reports_view, name='reports'),
@@ -29,6 +30,7 @@ urlpatterns = [
     path('employees/<int:employee_id>/report/', views_reports.employee_individual_report, name='employee_individual_report'),
     path('employees/<int:employee_id>/cost-breakdown/', views_reports.employee_cost_breakdown, name='employee_cost_breakdown'),
     path('employees/<int:employee_id>/export-report/', views_reports.export_individual_report, name='export_individual_report'),
+    path('reports/individual/export-all/', views_reports.export_all_individual_reports, name='export_all_individual_reports'),
 
     # تقارير المقارنة
     path('reports/comparison/', views_reports.comparison_report, name='comparison_report'),
@@ -36,6 +38,13 @@ urlpatterns = [
     # تقارير Excel المتقدمة
     path('reports/excel-advanced/', views_reports.advanced_excel_reports, name='advanced_excel_reports'),
     path('reports/export-advanced/', views_reports.export_advanced_excel, name='export_advanced_excel'),
+    path('reports/export-columnar/', views_reports.export_columnar, name='export_columnar'),
+
+    # سيناريوهات ماذا لو
+    path('reports/scenarios/', views_reports.scenario_analysis, name='scenario_analysis'),
+
+    # توقع التكلفة للسنوات القادمة
+    path('reports/forecast/', views_reports.workforce_forecast_report, name='workforce_forecast'),
 
     # الاستيراد والتصدير
     path('import/', views.import_excel, name='import_excel'),
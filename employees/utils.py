@@ -1,102 +1,73 @@
-import openpyxl
 from datetime import datetime, date
 from decimal import Decimal, InvalidOperation
 from django.core.exceptions import ValidationError
 from .models import Employee, Allowance, AllowanceType, EmployeeCategory
+import csv
+import io
 import re
 
+# ترميزات ملفات CSV بالترتيب: UTF-8 (مع BOM أو بدونه) ثم ترميز Windows العربي
+CSV_ENCODINGS = ('utf-8-sig', 'cp1256')
+
+
 def import_employees_from_excel(excel_file):
     """
-    استيراد الموظفين والبدلات من ملف Excel
+    استيراد الموظفين والبدلات من ملف Excel أو CSV بالتغييرات فقط (انظر delta_import)
     """
-    wb = openpyxl.load_workbook(excel_file)
-    ws = wb.active
+    from .delta_import import import_file
+    return import_file(excel_file)
 
-    # قراءة العناوين من الصف الأول
-    headers = []
-    for cell in ws[1]:
-        if cell.value:
-            # إزالة (مطلوب) أو أي محتوى داخل أقواس
-            clean_header = re.sub(r'\s*\(.*?\)', '', str(cell.value)).strip()
-            headers.append(clean_header)
 
-    imported_count = 0
-    allowances_count = 0
-    errors = []
+def read_import_rows(uploaded_file):
+    """قراءة صفوف ملف الاستيراد حسب امتداده: CSV بالمكتبة القياسية وغيره بـ openpyxl"""
+    if uploaded_file.name.lower().endswith('.csv'):
+        return read_csv_rows(uploaded_file)
+    from . import spreadsheets
+    return spreadsheets.read_rows(uploaded_file)
+
 
-    for row_num, row in enumerate(ws.iter_rows(min_row=2, values_only=True), start=2):
+def read_csv_rows(csv_file):
+    """
+    قيم الصف الأول (العناوين) ومكرر على بقية صفوف ملف CSV بنفس شكل spreadsheets.read_rows،
+    والخلايا الفارغة None كما في openpyxl
+    """
+    raw = csv_file.read()
+    for encoding in CSV_ENCODINGS:
         try:
-            # تخطي الصفوف الفارغة
-            if not any(row):
-                continue
-
-            employee_data, allowances_data = extract_employee_and_allowances_data(row, headers)
-
-            # التحقق من وجود الموظف
-            employee, created = Employee.objects.get_or_create(
-                employee_number=employee_data['employee_number'],
-                defaults=employee_data
-            )
-
-            if created:
-                imported_count += 1
-            else:
-                # تحديث البيانات الموجودة
-                for key, value in employee_data.items():
-                    setattr(employee, key, value)
-                employee.save()
-
-            # إضافة البدلات
-            if allowances_data:
-                for allowance_data in allowances_data:
-                    try:
-                        # البحث عن نوع البدل أو إنشاؤه
-                        allowance_type, _ = AllowanceType.objects.get_or_create(
-                            name_arabic=allowance_data['name'],
-                            defaults={
-                                'name': allowance_data['name'],
-                                'frequency': allowance_data.get('frequency', 'MONTHLY')
-                            }
-                        )
-
-                        # إضافة أو تحديث البدل
-                        allowance, allowance_created = Allowance.objects.get_or_create(
-                            employee=employee,
-                            allowance_type=allowance_type,
-                            defaults={
-                                'amount': allowance_data['amount'],
-                                'type': allowance_data.get('type', 'CASH'),
-                                'notes': allowance_data.get('notes', ''),
-                                'is_active': True
-                            }
-                        )
-
-                        if not allowance_created:
-                            # تحديث البدل الموجود
-                            allowance.amount = allowance_data['amount']
-                            allowance.type = allowance_data.get('type', 'CASH')
-                            allowance.notes = allowance_data.get('notes', '')
-                            allowance.is_active = True
-                            allowance.save()
-
-                        allowances_count += 1
-
-                    except Exception as allowance_error:
-                        errors.append(f"الصف {row_num} - خطأ في البدل: {str(allowance_error)}")
-
-        except Exception as e:
-            errors.append(f"الصف {row_num}: {str(e)}")
-
-    return {
-        'imported_count': imported_count,
-        'allowances_count': allowances_count,
-        'errors': errors
-    }
+            text = raw.decode(encoding)
+            break
+        except UnicodeDecodeError:
+            continue
+    else:
+        raise ValidationError('ترميز ملف CSV غير مدعوم، استخدم UTF-8 أو Windows-1256')
+
+    # الفاصل من أول الملف: فاصلة أو فاصلة منقوطة أو Tab
+    try:
+        dialect = csv.Sniffer().sniff(text[:4096], delimiters=',;\t')
+    except csv.Error:
+        dialect = csv.excel
+
+    reader = csv.reader(io.StringIO(text, newline=''), dialect)
+    header_row = next(reader, [])
+    rows = ([cell if cell != '' else None for cell in row] for row in reader)
+    return header_row, rows
 
 
-def extract_employee_and_allowances_data(row, headers):
+def clean_headers(header_row):
+    """عناوين الأعمدة بدون (مطلوب) أو أي محتوى داخل أقواس"""
+    headers = []
+    for value in header_row:
+        if value:
+            # إزالة (مطلوب) أو أي محتوى داخل أقواس
+            clean_header = re.sub(r'\s*\(.*?\)', '', str(value)).strip()
+            headers.append(clean_header)
+    return headers
+
+
+def extract_employee_and_allowances_data(row, headers, categories=None):
     """
     استخراج بيانات الموظف والبدلات من صف Excel
+    categories: قاموس اختياري للفئات حسب الاسم بدلاً من استعلام لكل صف
     """
     employee_data = {}
     allowances_data = []
@@ -165,6 +136,9 @@ def extract_employee_and_allowances_data(row, headers):
                     employee_data[field_name] = safe_int(value)
 
                 # تحويل الفئة
+                elif field_name == 'category' and categories is not None:
+                    employee_data[field_name] = categories.get(str(value))
+
                 elif field_name == 'category':
                     try:
                         category = EmployeeCategory.objects.get(name=str(value))
@@ -366,65 +340,56 @@ def create_default_allowance_types():
             created_count += 1
 
     return created_count
-def export_template_excel(request):
-    """إنشاء قالب Excel للاستيراد"""
-    from io import BytesIO
-    import xlsxwriter
-    from django.http import HttpResponse
-    from .models import AllowanceType  # تأكد من الاستيراد الصحيح
+IMPORT_TEMPLATE_CACHE_KEY = 'employees:import_template'
+
+
+def _import_template_allowance_columns():
+    return list(AllowanceType.objects.filter(is_active=True).values_list('name_arabic', flat=True))
+
+
+def _import_template_etag(allowance_columns):
+    """بصمة قالب الاستيراد حسب قائمة البدلات النشطة"""
+    import hashlib
+    return hashlib.sha256('\n'.join(allowance_columns).encode('utf-8')).hexdigest()[:32]
 
-    output = BytesIO()
-    workbook = xlsxwriter.Workbook(output, {'in_memory': True})
 
-    # تنسيق العناوين
-    header_format = workbook.add_format({
-        'bold': True,
-        'bg_color': '#4472C4',
-        'font_color': 'white',
-        'align': 'center',
-        'valign': 'vcenter',
-        'border': 1
-    })
+def invalidate_import_template():
+    """حذف القالب المخزن مؤقتاً (يستدعى عند تعديل أنواع البدلات)"""
+    from django.core.cache import cache
+    etag = cache.get(IMPORT_TEMPLATE_CACHE_KEY)
+    if etag:
+        cache.delete_many([IMPORT_TEMPLATE_CACHE_KEY, f'{IMPORT_TEMPLATE_CACHE_KEY}:{etag}'])
 
-    # إنشاء ورقة العمل
-    worksheet = workbook.add_worksheet('قالب الموظفين')
+
+def export_template_excel(request):
+    """
+    تحميل قالب Excel للاستيراد
+    القالب يبنى مرة واحدة لكل قائمة بدلات نشطة ويخزن مؤقتاً، ويرد بـ 304 إذا لم يتغير
+    """
+    from django.core.cache import cache
+    from django.http import HttpResponse
+    from django.utils.cache import get_conditional_response, patch_cache_control
 
     # جلب أعمدة البدلات ديناميكيًا من قاعدة البيانات
-    allowance_columns = list(
-        AllowanceType.objects.filter(is_active=True).values_list('name_arabic', flat=True)
-    )
-
-    # العناوين المطلوبة
-    headers = [
-        'رقم الموظف (مطلوب)', 'الاسم (مطلوب)', 'الجنسية (مطلوب)', 'الراتب الأساسي (مطلوب)',
-        'تاريخ التوظيف', 'رقم الهوية', 'الفئة', 'نوع التأمين',
-        'عدد الزوجات', 'عدد الأبناء', 'تكلفة الاستقدام', 'تكلفة التدريب'
-    ] + list(allowance_columns)
-
-    # كتابة العناوين في الصف الأول
-    for col, header in enumerate(headers):
-        worksheet.write(0, col, header, header_format)
-
-    # إضافة صف مثال — يمكنك تخصيص القيم حسب الحاجة
-    example_data = [
-        'EMP001', 'أحمد محمد علي', 'سعودي', '8000',
-        '2024-01-15', '1234567890', 'موظفين', 'أساسي',
-        '1', '2', '5000', '2000'
-    ] + ['1000' for _ in allowance_columns]  # قيمة افتراضية للبدلات
-
-    for col, data in enumerate(example_data):
-        worksheet.write(1, col, data)
-
-    # تنسيق عرض الأعمدة
-    worksheet.set_column(0, len(headers) - 1, 20)
-
-    workbook.close()
-    output.seek(0)
-
-    # تجهيز رد التحميل
-    response = HttpResponse(
-        output.read(),
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
-    response['Content-Disposition'] = 'attachment; filename="template_employees.xlsx"'
-    return response
\ No newline at end of file
+    allowance_columns = _import_template_allowance_columns()
+    etag = _import_template_etag(allowance_columns)
+
+    response = get_conditional_response(request, etag=f'"{etag}"')
+    if response is None:
+        content_key = f'{IMPORT_TEMPLATE_CACHE_KEY}:{etag}'
+        content = cache.get(content_key)
+        if content is None:
+            from . import spreadsheets
+            content = spreadsheets.import_template_workbook(allowance_columns)
+            cache.set_many({IMPORT_TEMPLATE_CACHE_KEY: etag, content_key: content}, timeout=None)
+
+        # تجهيز رد التحميل
+        response = HttpResponse(
+            content,
+            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        )
+        response['Content-Disposition'] = 'attachment; filename="template_employees.xlsx"'
+
+    response['ETag'] = f'"{etag}"'
+    patch_cache_control(response, no_cache=True)
+    return response
@@ -2,21 +2,23 @@ from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.http import HttpResponse, JsonResponse
-from django.db.models import Q, Sum, Avg, Count
+from django.db.models import Q, Sum, Avg, Count, Prefetch
 from django.core.paginator import Paginator
 from django.views.decorators.http import require_http_methods
 from django.urls import reverse
 from django.utils import timezone
 from decimal import Decimal
-import openpyxl
-from openpyxl.styles import Font, Alignment, Border, Side, PatternFill
-from io import BytesIO
-import xlsxwriter
 from datetime import datetime
+from asgiref.sync import sync_to_async
 
 from .models import Employee, Allowance, AllowanceType, EmployeeCategory
-from .forms import EmployeeForm, AllowanceFormSet, ReportFilterForm, ExcelImportForm
+from .forms import EmployeeForm, AllowanceFormSet, ReportFilterForm, ExcelImportForm, BulkOperationForm
 from .utils import import_employees_from_excel, export_template_excel
+from .report_rows import build_report_rows
+from .async_queries import gather_queries
+from .conditional import conditional_report
+from .db_routing import replica_reads
+from .bulk_operations import apply_operation, preview_operation, select_employees
 
 
 @login_required
@@ -26,7 +28,7 @@ def employee_list(request):
     category_filter = request.GET.get('category', '')
     nationality_filter = request.GET.get('nationality', '')
     
-    employees = Employee.objects.filter(is_active=True)
+    employees = Employee.active.all()
     
     # تطبيق المرشحات
     if search_query:
@@ -42,31 +44,30 @@ def employee_list(request):
     if nationality_filter:
         employees = employees.filter(nationality=nationality_filter)
     
-    employees = employees.order_by('employee_number')
+    employees = employees.select_related('category').with_cost_columns().order_by('employee_number')
     
     # تقسيم الصفحات
     paginator = Paginator(employees, 20)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     
-    # إحصائيات سريعة
-    active_employees = Employee.objects.filter(is_active=True)
-    total_employees = active_employees.count()
-    
-    # حساب متوسط المعامل ومتوسط تكلفة الاستقدام
-    avg_cost_factor = 0
-    avg_recruitment_cost = 0
-    if total_employees > 0:
-        avg_cost_factor = sum(emp.get_cost_factor() for emp in active_employees) / total_employees
-        avg_recruitment_cost = sum(emp.recruitment_cost for emp in active_employees) / total_employees
+    # إحصائيات سريعة في استعلام واحد
+    active_employees = Employee.active.all()
+    totals = active_employees.with_costs().aggregate(
+        total_employees=Count('id'),
+        total_monthly_cost=Sum('monthly_gross'),
+        avg_cost_factor=Avg('cost_factor'),
+        avg_recruitment_cost=Avg('recruitment_cost'),
+    )
+    total_employees = totals['total_employees']
     
     stats = {
         'total_employees': total_employees,
-        'total_monthly_cost': sum(emp.get_monthly_gross_salary() for emp in active_employees),
-        'avg_cost_factor': avg_cost_factor,
-        'avg_recruitment_cost': avg_recruitment_cost,
-        'categories': Employee.objects.values('category').annotate(count=Count('id')).order_by('category'),
-        'nationalities': Employee.objects.values('nationality').annotate(count=Count('id')).order_by('nationality')
+        'total_monthly_cost': totals['total_monthly_cost'] or 0,
+        'avg_cost_factor': totals['avg_cost_factor'] or 0,
+        'avg_recruitment_cost': totals['avg_recruitment_cost'] or 0,
+        'categories': active_employees.values('category').annotate(count=Count('id')).order_by('category'),
+        'nationalities': active_employees.values('nationality').annotate(count=Count('id')).order_by('nationality')
     }
     
     context = {
@@ -76,7 +77,7 @@ def employee_list(request):
         'nationality_filter': nationality_filter,
         'stats': stats,
         'categories': EmployeeCategory.objects.all(),
-        'nationalities': Employee.objects.values_list('nationality', flat=True).distinct().order_by('nationality')
+        'nationalities': Employee.active.values_list('nationality', flat=True).distinct().order_by('nationality')
     }
     
     return render(request, 'employees/employee_list.html', context)
@@ -85,8 +86,14 @@ def employee_list(request):
 @login_required
 def employee_detail(request, pk):
     """عرض تفاصيل الموظف"""
-    employee = get_object_or_404(Employee, pk=pk)
-    allowances = employee.allowances.filter(is_active=True).select_related('allowance_type')
+    # البدلات بأنواعها تجلب مرة واحدة وتستخدمها دوال حساب التكاليف
+    employee = get_object_or_404(
+        Employee.objects.select_related('category').prefetch_related(
+            Prefetch('allowances', queryset=Allowance.objects.select_related('allowance_type'))
+        ),
+        pk=pk
+    )
+    allowances = [allowance for allowance in employee.allowances.all() if allowance.is_active]
     
     # حساب الإحصائيات
     monthly_allowances = employee.get_total_monthly_allowances()
@@ -206,6 +213,49 @@ def employee_delete(request, pk):
 
 
 @login_required
+def bulk_operations(request):
+    """
+    العمليات الجماعية: زيادة الرواتب أو إضافة بدل أو إلغاء التفعيل لمجموعة موظفين
+    الإرسال الأول يعرض معاينة بعدد الموظفين والفرق في التكلفة، والتنفيذ يتطلب زر التأكيد
+    """
+    form = BulkOperationForm(request.POST or None)
+    preview = None
+
+    if request.method == 'POST' and form.is_valid():
+        data = form.cleaned_data
+        employees = select_employees(data['category'], data['nationality'])
+        options = {
+            'value': data['value'],
+            'allowance_type': data['allowance_type'],
+            'allowance_kind': data['allowance_kind'],
+            'update_existing': data['update_existing'],
+        }
+        preview = preview_operation(data['operation'], employees, **options)
+
+        if 'apply' in request.POST:
+            if data['expected_count'] != preview.affected:
+                messages.warning(request, 'تغير عدد الموظفين المتأثرين منذ المعاينة، يرجى مراجعة المعاينة الجديدة')
+            else:
+                updated = apply_operation(data['operation'], employees, **options)
+                messages.success(
+                    request,
+                    f'تم تنفيذ العملية "{dict(form.fields["operation"].choices)[data["operation"]]}" على {updated} موظف'
+                )
+                return redirect('employees:employee_list')
+
+        form = BulkOperationForm(initial={**data, 'expected_count': preview.affected})
+
+    context = {
+        'form': form,
+        'preview': preview,
+        'title': 'العمليات الجماعية',
+    }
+    return render(request, 'employees/bulk_operations.html', context)
+
+
+@login_required
+@replica_reads
+@conditional_report
 def reports_view(request):
     """عرض التقارير المالية المتقدمة"""
     form = ReportFilterForm(request.GET)
@@ -258,7 +308,7 @@ def reports_view(request):
     
     # إضافة تفاصيل إضافية للتقرير
     report_data['filter_applied'] = any(form.cleaned_data.values()) if form.is_valid() else False
-    report_data['total_filtered'] = employees.count()
+    report_data['total_filtered'] = len(report_data['employees'])
     
     context = {
         'form': form,
@@ -269,53 +319,56 @@ def reports_view(request):
     return render(request, 'employees/reports.html', context)
 
 
+def _add_to_group(groups, key, row):
+    group = groups.setdefault(key, {'count': 0, 'total_monthly': 0.0, 'total_annual': 0.0})
+    group['count'] += 1
+    group['total_monthly'] += float(row.monthly_gross)
+    group['total_annual'] += float(row.annual_cost)
+
+
 def generate_report_data(employees):
-    """توليد بيانات التقرير"""
-    total_employees = employees.count()
-    total_monthly_cost = sum(emp.get_monthly_gross_salary() for emp in employees)
-    total_annual_cost = sum(emp.get_annual_total_cost() for emp in employees)
-    avg_cost_factor = sum(emp.get_cost_factor() for emp in employees) / total_employees if total_employees > 0 else 0
-    
-    # تجميع حسب الفئة
+    """توليد بيانات التقرير من صفوف محسوبة مسبقاً في مرور واحد"""
+    rows = build_report_rows(employees)
+
+    total_employees = len(rows)
+    total_monthly_cost = sum(row.monthly_gross for row in rows)
+    total_annual_cost = sum(row.annual_cost for row in rows)
+    avg_cost_factor = 0
+    avg_recruitment_cost = 0
+    if total_employees > 0:
+        avg_cost_factor = sum(row.cost_factor for row in rows) / total_employees
+        avg_recruitment_cost = sum(row.recruitment_cost for row in rows) / total_employees
+
+    # تجميع حسب الفئة والجنسية (قيم عشرية عادية لاستخدامها في الرسوم البيانية)
     by_category = {}
-    for category in EmployeeCategory.objects.all():
-        cat_employees = employees.filter(category=category)
-        if cat_employees.exists():
-            by_category[category.name] = {
-                'count': cat_employees.count(),
-                'total_monthly': sum(emp.get_monthly_gross_salary() for emp in cat_employees),
-                'total_annual': sum(emp.get_annual_total_cost() for emp in cat_employees)
-            }
-    # تجميع حسب الجنسية
     by_nationality = {}
-    nationalities = employees.values_list('nationality', flat=True).distinct()
-    for nationality in nationalities:
-        nat_employees = employees.filter(nationality=nationality)
-        by_nationality[nationality] = {
-            'count': nat_employees.count(),
-            'total_monthly': sum(emp.get_monthly_gross_salary() for emp in nat_employees),
-            'total_annual': sum(emp.get_annual_total_cost() for emp in nat_employees)
-        }
-    
+    for row in rows:
+        if row.category_name:
+            _add_to_group(by_category, row.category_name, row)
+        _add_to_group(by_nationality, row.nationality, row)
+
     return {
         'summary': {
             'total_employees': total_employees,
             'total_monthly_cost': total_monthly_cost,
             'total_annual_cost': total_annual_cost,
-            'avg_cost_factor': avg_cost_factor
+            'avg_cost_factor': avg_cost_factor,
+            'avg_recruitment_cost': avg_recruitment_cost,
         },
         'by_category': by_category,
         'by_nationality': by_nationality,
-        'employees': employees
+        'employees': rows
     }
 
 
 @login_required
+@replica_reads
+@conditional_report
 def export_excel(request):
     """تصدير التقارير إلى Excel"""
     # تطبيق نفس المرشحات المستخدمة في التقارير
     form = ReportFilterForm(request.GET)
-    employees = Employee.objects.filter(is_active=True)
+    employees = Employee.active.all()
     
     if form.is_valid():
         if form.cleaned_data.get('nationality'):
@@ -328,79 +381,13 @@ def export_excel(request):
             year = int(form.cleaned_data['year'])
             employees = employees.filter(hire_date__year__lte=year)
     
-    # إنشاء ملف Excel
-    output = BytesIO()
-    workbook = xlsxwriter.Workbook(output, {'in_memory': True})
-    
-    # تنسيق الخلايا
-    header_format = workbook.add_format({
-        'bold': True,
-        'bg_color': '#4472C4',
-        'font_color': 'white',
-        'align': 'center',
-        'valign': 'vcenter',
-        'border': 1
-    })
-    
-    data_format = workbook.add_format({
-        'align': 'center',
-        'valign': 'vcenter',
-        'border': 1
-    })
-    
-    number_format = workbook.add_format({
-        'num_format': '#,##0.00',
-        'align': 'center',
-        'border': 1
-    })
-    
-    # ورقة التقرير المفصل
-    worksheet = workbook.add_worksheet('التقرير المفصل')
-    
-    # عناوين الأعمدة
-    headers = [
-        'رقم الموظف', 'الاسم', 'الجنسية', 'الفئة', 'تاريخ التوظيف',
-        'الراتب الأساسي', 'البدلات الشهرية', 'الراتب الإجمالي الشهري',
-        'التكلفة السنوية', 'المعامل', 'عدد الزوجات', 'عدد الأبناء',
-        'تكلفة الاستقدام', 'تكلفة التدريب'
-    ]
-    
-    # كتابة العناوين
-    for col, header in enumerate(headers):
-        worksheet.write(0, col, header, header_format)
-    
-    # كتابة البيانات
-    for row, employee in enumerate(employees, start=1):
-        worksheet.write(row, 0, employee.employee_number, data_format)
-        worksheet.write(row, 1, employee.name, data_format)
-        worksheet.write(row, 2, employee.nationality, data_format)
-        worksheet.write(row, 3, employee.get_category_display(), data_format)
-        worksheet.write(row, 4, employee.hire_date.strftime('%Y-%m-%d'), data_format)
-        worksheet.write(row, 5, float(employee.basic_salary), number_format)
-        worksheet.write(row, 6, float(employee.get_total_monthly_allowances()), number_format)
-        worksheet.write(row, 7, float(employee.get_monthly_gross_salary()), number_format)
-        worksheet.write(row, 8, float(employee.get_annual_total_cost()), number_format)
-        worksheet.write(row, 9, float(employee.get_cost_factor()), number_format)
-        worksheet.write(row, 10, employee.num_wives, data_format)
-        worksheet.write(row, 11, employee.num_children, data_format)
-        worksheet.write(row, 12, float(employee.recruitment_cost), number_format)
-        worksheet.write(row, 13, float(employee.training_cost), number_format)
-    
-    # تنسيق عرض الأعمدة
-    worksheet.set_column('A:A', 15)  # رقم الموظف
-    worksheet.set_column('B:B', 25)  # الاسم
-    worksheet.set_column('C:C', 15)  # الجنسية
-    worksheet.set_column('D:D', 15)  # الفئة
-    worksheet.set_column('E:E', 15)  # تاريخ التوظيف
-    worksheet.set_column('F:N', 18)  # باقي الأعمدة
-    
-    workbook.close()
-    output.seek(0)
+    from . import spreadsheets
+    content = spreadsheets.employees_workbook(employees)
     
     # إعداد الاستجابة
     response = HttpResponse(
-        output.read(),
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        content,
+        content_type=spreadsheets.XLSX_CONTENT_TYPE
     )
     response['Content-Disposition'] = f'attachment; filename="تقرير_الموظفين_{datetime.now().strftime("%Y%m%d_%H%M%S")}.xlsx"'
     
@@ -418,8 +405,15 @@ def import_excel(request):
             
             try:
                 result = import_employees_from_excel(excel_file)
-                
-                success_message = f'تم استيراد {result["imported_count"]} موظف'
+
+                if result['skipped_file']:
+                    messages.info(request, 'تم استيراد هذا الملف مسبقاً ولم تتغير البيانات بعده، لا توجد تغييرات')
+                    return redirect('employees:employee_list')
+
+                success_message = (
+                    f'تم استيراد {result["imported_count"]} موظف جديد وتحديث {result["updated_count"]} موظف'
+                    f' ({result["unchanged_count"]} بدون تغيير)'
+                )
                 if result.get('allowances_count', 0) > 0:
                     success_message += f' مع {result["allowances_count"]} بدل'
                 success_message += ' بنجاح!'
@@ -449,54 +443,89 @@ def import_excel(request):
     return render(request, 'employees/import_excel.html', context)
 
 
-@login_required
-def dashboard(request):
-    """لوحة التحكم الرئيسية"""
-    # إحصائيات عامة
-    total_employees = Employee.objects.filter(is_active=True).count()
-    active_employees = Employee.objects.filter(is_active=True)
-    
-    total_monthly_cost = sum(emp.get_monthly_gross_salary() for emp in active_employees)
-    total_annual_cost = sum(emp.get_annual_total_cost() for emp in active_employees)
-    
-    category_stats = []
-    categories = EmployeeCategory.objects.all()
-
-    for category in categories:
-        count = Employee.objects.filter(category=category, is_active=True).count()
-        if count > 0:
-            category_stats.append({
-                'name': category.name,
-                'count': count,
-                'percentage': (count / total_employees * 100) if total_employees > 0 else 0
-            })    # إحصائيات حسب الجنسية
-    nationality_stats = []
-    nationalities = Employee.objects.filter(is_active=True).values('nationality').annotate(
-        count=Count('id')
-    ).order_by('-count')[:5]
-    
-    for nat in nationalities:
-        nationality_stats.append({
-            'name': nat['nationality'],
-            'count': nat['count'],
-            'percentage': (nat['count'] / total_employees * 100) if total_employees > 0 else 0
-        })
-    
-    # الموظفين الجدد (آخر 30 يوم)
+def _dashboard_totals():
+    """عدد الموظفين النشطين وإجمالي التكاليف في استعلام واحد"""
+    return Employee.active.with_costs().aggregate(
+        total_employees=Count('id'),
+        total_monthly_cost=Sum('monthly_gross'),
+        total_annual_cost=Sum('annual_cost'),
+    )
+
+
+def _dashboard_category_counts():
+    return list(
+        Employee.active.filter(category__isnull=False)
+        .values('category__name')
+        .annotate(count=Count('id'))
+        .order_by('category__name')
+    )
+
+
+def _dashboard_top_nationalities():
+    return list(
+        Employee.active.values('nationality').annotate(
+            count=Count('id')
+        ).order_by('-count')[:5]
+    )
+
+
+def _dashboard_recent_employees():
+    """الموظفين الجدد (آخر 30 يوم)"""
     from datetime import timedelta
     recent_date = timezone.now().date() - timedelta(days=30)
-    recent_employees = Employee.objects.filter(
-        hire_date__gte=recent_date,
-        is_active=True
-    ).order_by('-hire_date')[:5]
-    
+    return list(
+        Employee.active.filter(
+            hire_date__gte=recent_date
+        ).select_related('category').order_by('-hire_date')[:5]
+    )
+
+
+def _percentage(count, total):
+    return (count / total * 100) if total > 0 else 0
+
+
+@login_required
+@replica_reads
+async def dashboard(request):
+    """لوحة التحكم الرئيسية (الاستعلامات المستقلة تنفذ بالتوازي)"""
+    results = await gather_queries(
+        totals=_dashboard_totals,
+        categories=_dashboard_category_counts,
+        nationalities=_dashboard_top_nationalities,
+        recent_employees=_dashboard_recent_employees,
+    )
+
+    # إحصائيات عامة
+    totals = results['totals']
+    total_employees = totals['total_employees']
+
+    category_stats = [
+        {
+            'name': item['category__name'],
+            'count': item['count'],
+            'percentage': _percentage(item['count'], total_employees)
+        }
+        for item in results['categories']
+    ]
+
+    # إحصائيات حسب الجنسية
+    nationality_stats = [
+        {
+            'name': item['nationality'],
+            'count': item['count'],
+            'percentage': _percentage(item['count'], total_employees)
+        }
+        for item in results['nationalities']
+    ]
+
     context = {
         'total_employees': total_employees,
-        'total_monthly_cost': total_monthly_cost,
-        'total_annual_cost': total_annual_cost,
+        'total_monthly_cost': totals['total_monthly_cost'] or 0,
+        'total_annual_cost': totals['total_annual_cost'] or 0,
         'category_stats': category_stats,
         'nationality_stats': nationality_stats,
-        'recent_employees': recent_employees,
+        'recent_employees': results['recent_employees'],
     }
-    
-    return render(request, 'employees/dashboard.html', context)
\ No newline at end of file
+
+    # العرض متزامن لأن القالب يصل إلى المستخدم والرسائل المخزنة في الجلسة
+    return await sync_to_async(render)(request, 'employees/dashboard.html', context)
@@ -1,26 +1,77 @@
 from django.shortcuts import render, get_object_or_404
 from django.contrib.auth.decorators import login_required
-from django.http import HttpResponse, JsonResponse
-from django.db.models import Q, Sum, Avg, Count
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.db.models import Q, Sum, Avg, Count, Prefetch
 from django.contrib import messages
+from django.views.decorators.http import require_http_methods
 from decimal import Decimal
 import json
 from datetime import datetime, date
-import xlsxwriter
-from io import BytesIO
 
 from .models import Employee, Allowance, AllowanceType
-from .forms import ReportFilterForm
+from .forms import ForecastForm, ReportFilterForm
 from .reports_advanced import AdvancedReportsGenerator, generate_excel_compatible_report
+from .excel_reports import build_individual_report_workbook, individual_report_payload
+from .bulk_exports import stream_individual_reports_zip
+from .streaming import STREAM_BATCH_SIZE, render_rows_in_batches, render_template, streaming_html_response
+from .report_rows import build_report_rows, iter_report_rows
+from .scenarios import get_snapshot
+from .forecast import workforce_forecast
+from .conditional import conditional_report
+from .db_routing import replica_reads
+
+
+def filter_employees(employees, form):
+    """تطبيق مرشحات نموذج التقارير على قائمة الموظفين"""
+    if not form.is_valid():
+        return employees
+
+    if form.cleaned_data.get('employee_search'):
+        search_term = form.cleaned_data['employee_search']
+        employees = employees.filter(
+            Q(employee_number__icontains=search_term) |
+            Q(name__icontains=search_term)
+        )
+
+    if form.cleaned_data.get('nationality'):
+        employees = employees.filter(nationality=form.cleaned_data['nationality'])
+
+    if form.cleaned_data.get('category'):
+        employees = employees.filter(category=form.cleaned_data['category'])
+
+    if form.cleaned_data.get('date_from'):
+        employees = employees.filter(hire_date__gte=form.cleaned_data['date_from'])
+
+    if form.cleaned_data.get('date_to'):
+        employees = employees.filter(hire_date__lte=form.cleaned_data['date_to'])
+
+    if form.cleaned_data.get('is_active'):
+        is_active = form.cleaned_data['is_active'] == 'true'
+        employees = employees.filter(is_active=is_active)
+
+    if form.cleaned_data.get('salary_min'):
+        employees = employees.filter(basic_salary__gte=form.cleaned_data['salary_min'])
+
+    if form.cleaned_data.get('salary_max'):
+        employees = employees.filter(basic_salary__lte=form.cleaned_data['salary_max'])
+
+    return employees
 
 
 @login_required
+@replica_reads
+@conditional_report
 def employee_individual_report(request, employee_id):
     """تقرير مفصل لموظف واحد"""
-    employee = get_object_or_404(Employee, pk=employee_id)
+    employee = get_object_or_404(
+        Employee.objects.select_related('category').prefetch_related(
+            Prefetch('allowances', queryset=Allowance.objects.select_related('allowance_type'))
+        ),
+        pk=employee_id
+    )
 
     # حساب البدلات حسب معادلات Excel
-    allowances = employee.allowances.filter(is_active=True).select_related('allowance_type')
+    allowances = [allowance for allowance in employee.allowances.all() if allowance.is_active]
 
     monthly_allowances = {}
     annual_allowances = {}
@@ -161,6 +212,8 @@ def employee_individual_report(request, employee_id):
 
     return render(request, 'employees/individual_report.html', context)
 @login_required
+@replica_reads
+@conditional_report
 def employee_cost_breakdown(request, employee_id):
     """تفصيل تكاليف الموظف بصيغة JSON للمخططات"""
     employee = get_object_or_404(Employee, pk=employee_id)
@@ -190,131 +243,22 @@ def employee_cost_breakdown(request, employee_id):
 
 
 @login_required
+@replica_reads
+@conditional_report
 def export_individual_report(request, employee_id):
     """تصدير تقرير الموظف الواحد إلى Excel"""
-    employee = get_object_or_404(Employee, pk=employee_id)
-
-    # إنشاء ملف Excel
-    output = BytesIO()
-    workbook = xlsxwriter.Workbook(output, {'in_memory': True})
-
-    # تنسيقات مختلفة
-    title_format = workbook.add_format({
-        'bold': True,
-        'font_size': 16,
-        'align': 'center',
-        'valign': 'vcenter',
-        'bg_color': '#4472C4',
-        'font_color': 'white',
-        'border': 1
-    })
-
-    header_format = workbook.add_format({
-        'bold': True,
-        'bg_color': '#D9E2F3',
-        'align': 'center',
-        'valign': 'vcenter',
-        'border': 1
-    })
-
-    data_format = workbook.add_format({
-        'align': 'center',
-        'valign': 'vcenter',
-        'border': 1
-    })
-
-    number_format = workbook.add_format({
-        'num_format': '#,##0.00',
-        'align': 'center',
-        'border': 1
-    })
-
-    # إنشاء ورقة العمل
-    worksheet = workbook.add_worksheet(f'تقرير_{employee.employee_number}')
-
-    # عنوان التقرير
-    worksheet.merge_range('A1:F1', f'تقرير مفصل للموظف: {employee.name}', title_format)
-    worksheet.merge_range('A2:F2', f'رقم الموظف: {employee.employee_number}', header_format)
-
-    # البيانات الأساسية
-    row = 4
-    worksheet.write(row, 0, 'البيانات الأساسية', header_format)
-    worksheet.write(row, 1, '', header_format)
-    worksheet.write(row, 2, '', header_format)
-    worksheet.write(row, 3, '', header_format)
-    worksheet.write(row, 4, '', header_format)
-    worksheet.write(row, 5, '', header_format)
-
-    row += 1
-    basic_data = [
-        ('الاسم', employee.name),
-        ('الجنسية', employee.nationality),
-        ('الفئة', employee.category.name if employee.category else ''),
-        ('تاريخ التوظيف', employee.hire_date.strftime('%Y-%m-%d')),
-        ('الراتب الأساسي', employee.basic_salary),
-    ]
-
-    for label, value in basic_data:
-        worksheet.write(row, 0, label, data_format)
-        if isinstance(value, (int, float, Decimal)):
-            worksheet.write(row, 1, float(value), number_format)
-        else:
-            worksheet.write(row, 1, value, data_format)
-        row += 1
-
-    # البدلات
-    row += 1
-    worksheet.write(row, 0, 'البدلات والمزايا', header_format)
-    worksheet.write(row, 1, 'المبلغ', header_format)
-    worksheet.write(row, 2, 'التكرار', header_format)
-    worksheet.write(row, 3, 'النوع', header_format)
-    worksheet.write(row, 4, 'شهري', header_format)
-    worksheet.write(row, 5, 'سنوي', header_format)
-
-    allowances = employee.allowances.filter(is_active=True).select_related('allowance_type')
-    row += 1
+    employee = get_object_or_404(
+        Employee.objects.select_related('category').prefetch_related(
+            Prefetch('allowances', queryset=Allowance.objects.select_related('allowance_type'))
+        ),
+        pk=employee_id
+    )
 
-    for allowance in allowances:
-        worksheet.write(row, 0, allowance.allowance_type.name_arabic, data_format)
-        worksheet.write(row, 1, float(allowance.amount), number_format)
-        worksheet.write(row, 2, allowance.allowance_type.get_frequency_display(), data_format)
-        worksheet.write(row, 3, allowance.get_type_display(), data_format)
-        worksheet.write(row, 4, float(allowance.get_monthly_amount()), number_format)
-        worksheet.write(row, 5, float(allowance.get_annual_amount()), number_format)
-        row += 1
-
-    # الإجماليات
-    row += 1
-    worksheet.write(row, 0, 'الإجماليات', header_format)
-    worksheet.write(row, 1, '', header_format)
-    worksheet.write(row, 2, '', header_format)
-    worksheet.write(row, 3, '', header_format)
-    worksheet.write(row, 4, '', header_format)
-    worksheet.write(row, 5, '', header_format)
-
-    totals = [
-        ('إجمالي البدلات الشهرية', employee.get_total_monthly_allowances()),
-        ('الراتب الإجمالي الشهري', employee.get_monthly_gross_salary()),
-        ('التكلفة السنوية', employee.get_annual_total_cost()),
-        ('المعامل', employee.get_cost_factor()),
-    ]
-
-    row += 1
-    for label, value in totals:
-        worksheet.write(row, 0, label, data_format)
-        worksheet.write(row, 1, float(value), number_format)
-        row += 1
-
-    # تنسيق عرض الأعمدة
-    worksheet.set_column('A:A', 25)
-    worksheet.set_column('B:F', 18)
-
-    workbook.close()
-    output.seek(0)
+    content = build_individual_report_workbook(individual_report_payload(employee))
 
     # إعداد الاستجابة
     response = HttpResponse(
-        output.read(),
+        content,
         content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
     )
     response['Content-Disposition'] = f'attachment; filename="تقرير_{employee.employee_number}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.xlsx"'
@@ -323,10 +267,31 @@ def export_individual_report(request, employee_id):
 
 
 @login_required
+@replica_reads
+@conditional_report
+def export_all_individual_reports(request):
+    """تصدير التقارير الفردية لجميع الموظفين المطابقين للمرشحات في ملف ZIP"""
+    form = ReportFilterForm(request.GET)
+    # الموظفون النشطون فقط كبقية التقارير الجماعية، إلا إذا اختيرت الحالة صراحة في المرشحات
+    employees = Employee.objects.all() if request.GET.get('is_active') else Employee.active.all()
+    employees = filter_employees(employees, form)
+
+    response = StreamingHttpResponse(
+        stream_individual_reports_zip(employees),
+        content_type='application/zip'
+    )
+    response['Content-Disposition'] = f'attachment; filename="تقارير_الموظفين_{datetime.now().strftime("%Y%m%d_%H%M%S")}.zip"'
+
+    return response
+
+
+@login_required
+@replica_reads
+@conditional_report
 def comparison_report(request):
     """تقرير مقارنة بين الموظفين"""
     form = ReportFilterForm(request.GET)
-    employees = Employee.objects.filter(is_active=True)
+    employees = Employee.active.all()
 
     # تطبيق المرشحات
     if form.is_valid():
@@ -350,37 +315,18 @@ def comparison_report(request):
         if form.cleaned_data.get('date_to'):
             employees = employees.filter(hire_date__lte=form.cleaned_data['date_to'])
 
+    # التكاليف محسوبة في قاعدة البيانات والترتيب حسب التكلفة السنوية
+    employees = employees.with_costs().select_related('category').order_by('-annual_cost', 'employee_number')
+
     # حساب بيانات المقارنة مطابقة لمعادلات Excel
     comparison_data = []
     for employee in employees:
-        # التكلفة السنوية مطابقة لمعادلات Excel
-        annual_cost = employee.get_annual_total_cost()
-        basic_salary_annual = employee.basic_salary * 12
-
-        # البدلات الشهرية (H-S)
-        monthly_allowances_only = employee.get_total_monthly_allowances()
-
-        # الراتب الإجمالي الشهري (T + معادل شهري لجميع البدلات)
-        monthly_gross = employee.get_monthly_gross_salary()
-
-        # نسبة الكفاءة (الراتب الأساسي السنوي ÷ التكلفة الإجمالية)
-        efficiency_ratio = float(basic_salary_annual / annual_cost) if annual_cost > 0 else 0.0
-
-        comparison_data.append({
-            'employee': employee,
-            'basic_salary': float(employee.basic_salary),
-            'monthly_allowances': float(monthly_allowances_only),
-            'monthly_gross': float(monthly_gross),
-            'annual_cost': float(annual_cost),
-            'cost_factor': float(employee.get_cost_factor()),
-            'efficiency_ratio': efficiency_ratio,
-            'years_of_service': employee.get_years_of_service(),
-            'training_cost_percentage': float(employee.calculate_training_cost_percentage() * 12),
+        row = _print_comparison_row(employee)
+        row.update({
+            'training_cost_percentage': float(employee.monthly_gross * employee.get_training_cost_rate() * 12),
             'family_ticket_cost': float(employee.calculate_family_ticket_cost()['annual_cost'])
         })
-
-    # ترتيب حسب التكلفة السنوية
-    comparison_data.sort(key=lambda x: x['annual_cost'], reverse=True)
+        comparison_data.append(row)
 
     context = {
         'form': form,
@@ -391,67 +337,74 @@ def comparison_report(request):
     return render(request, 'employees/comparison_report.html', context)
 
 
-@login_required
-def print_comparison_report(request):
-    """طباعة تقرير المقارنة"""
-    form = ReportFilterForm(request.GET)
-    employees = Employee.objects.filter(is_active=True)
+def _print_comparison_row(employee):
+    """بيانات صف تقرير المقارنة من موظف محمل بالتكاليف المحسوبة"""
+    annual_cost = employee.annual_cost
+    basic_salary_annual = employee.basic_salary * 12
+    efficiency_ratio = float(basic_salary_annual / annual_cost) if annual_cost > 0 else 0.0
 
-    # تطبيق المرشحات
-    if form.is_valid():
-        if form.cleaned_data.get('employee_search'):
-            search_term = form.cleaned_data['employee_search']
-            employees = employees.filter(
-                Q(employee_number__icontains=search_term) |
-                Q(name__icontains=search_term)
-            )
+    return {
+        'employee': employee,
+        'basic_salary': float(employee.basic_salary),
+        'monthly_allowances': float(employee.monthly_allowances_total),
+        'monthly_gross': float(employee.monthly_gross),
+        'annual_cost': float(annual_cost),
+        'cost_factor': float(employee.cost_factor),
+        'efficiency_ratio': efficiency_ratio,
+        'years_of_service': employee.get_years_of_service(),
+    }
 
-        if form.cleaned_data.get('nationality'):
-            employees = employees.filter(nationality=form.cleaned_data['nationality'])
 
-        if form.cleaned_data.get('category'):
-            employees = employees.filter(category=form.cleaned_data['category'])
+def _stream_print_comparison_report(employees, context):
+    """إرسال تقرير المقارنة: الرأس ثم الصفوف على دفعات ثم التذييل"""
+    total_employees = 0
 
-        if form.cleaned_data.get('date_from'):
-            employees = employees.filter(hire_date__gte=form.cleaned_data['date_from'])
+    def rows():
+        nonlocal total_employees
+        for employee in employees.iterator(chunk_size=STREAM_BATCH_SIZE):
+            total_employees += 1
+            yield _print_comparison_row(employee)
 
-        if form.cleaned_data.get('date_to'):
-            employees = employees.filter(hire_date__lte=form.cleaned_data['date_to'])
+    yield render_template('employees/print_comparison_report/head.html', context)
+    yield from render_rows_in_batches(
+        'employees/print_comparison_report/rows.html', rows(), context, 'comparison_data'
+    )
+    yield render_template('employees/print_comparison_report/tail.html', {**context, 'total_employees': total_employees})
 
-    # حساب بيانات المقارنة
-    comparison_data = []
-    for employee in employees:
-        annual_cost = employee.get_annual_total_cost()
-        basic_salary_annual = employee.basic_salary * 12
-        monthly_allowances_only = employee.get_total_monthly_allowances()
-        monthly_gross = employee.get_monthly_gross_salary()
-        efficiency_ratio = float(basic_salary_annual / annual_cost) if annual_cost > 0 else 0.0
-
-        comparison_data.append({
-            'employee': employee,
-            'basic_salary': float(employee.basic_salary),
-            'monthly_allowances': float(monthly_allowances_only),
-            'monthly_gross': float(monthly_gross),
-            'annual_cost': float(annual_cost),
-            'cost_factor': float(employee.get_cost_factor()),
-            'efficiency_ratio': efficiency_ratio,
-            'years_of_service': employee.get_years_of_service(),
-        })
 
-    # ترتيب حسب التكلفة السنوية
-    comparison_data.sort(key=lambda x: x['annual_cost'], reverse=True)
+@login_required
+@replica_reads
+@conditional_report
+def print_comparison_report(request):
+    """طباعة تقرير المقارنة"""
+    form = ReportFilterForm(request.GET)
+    employees = filter_employees(Employee.active.all(), form)
 
+    # الترتيب حسب التكلفة السنوية يتم في قاعدة البيانات
+    employees = employees.with_costs().select_related('category').order_by('-annual_cost', 'employee_number')
+
+    filters = request.GET.dict()
+    filters.pop('stream', None)
     context = {
-        'comparison_data': comparison_data,
-        'total_employees': len(comparison_data),
         'print_date': datetime.now(),
-        'filters': request.GET.dict() if request.GET else {}
+        'filters': filters
     }
 
-    return render(request, 'employees/print_comparison_report.html', context)
+    # العرض الكامل دفعة واحدة عند طلبه صراحة
+    if request.GET.get('stream') == '0':
+        comparison_data = [_print_comparison_row(employee) for employee in employees]
+        context.update({
+            'comparison_data': comparison_data,
+            'total_employees': len(comparison_data),
+        })
+        return render(request, 'employees/print_comparison_report.html', context)
+
+    return streaming_html_response(_stream_print_comparison_report(employees, context))
 
 
 @login_required
+@replica_reads
+@conditional_report
 def advanced_excel_reports(request):
     """تقارير متقدمة مطابقة لملف Excel"""
     form = ReportFilterForm(request.GET)
@@ -502,6 +455,8 @@ def advanced_excel_reports(request):
 
 
 @login_required
+@replica_reads
+@conditional_report
 def export_advanced_excel(request):
     """تصدير التقارير المتقدمة إلى Excel بنفس تنسيق الملف الأصلي"""
     form = ReportFilterForm(request.GET)
@@ -528,138 +483,13 @@ def export_advanced_excel(request):
         if form.cleaned_data.get('date_to'):
             employees = employees.filter(hire_date__lte=form.cleaned_data['date_to'])
 
-    # إنشاء ملف Excel متقدم
-    output = BytesIO()
-    workbook = xlsxwriter.Workbook(output, {'in_memory': True})
-
-    # تنسيقات Excel
-    header_format = workbook.add_format({
-        'bold': True,
-        'bg_color': '#4472C4',
-        'font_color': 'white',
-        'align': 'center',
-        'valign': 'vcenter',
-        'border': 1
-    })
-
-    title_format = workbook.add_format({
-        'bold': True,
-        'font_size': 14,
-        'align': 'center',
-        'valign': 'vcenter',
-        'bg_color': '#D9E2F3',
-        'border': 1
-    })
-
-    data_format = workbook.add_format({
-        'align': 'center',
-        'valign': 'vcenter',
-        'border': 1
-    })
-
-    number_format = workbook.add_format({
-        'num_format': '#,##0.00',
-        'align': 'center',
-        'border': 1
-    })
-
-    # إنتاج التقارير
-    generator = AdvancedReportsGenerator(employees)
-    reports_data = generator.export_to_excel_format()
-
-    # ورقة 1: ملخص حسب الفئة (BY CATEGORY)
-    ws_category = workbook.add_worksheet('BY CATEGORY')
-    ws_category.write('A1', 'SUMMARY - CATEGORY', title_format)
-    ws_category.write('B1', '', title_format)
-    ws_category.write('C1', '', title_format)
-
-    ws_category.write('A2', 'No.', header_format)
-    ws_category.write('B2', 'CATEGORY', header_format)
-    ws_category.write('C2', 'TOTAL', header_format)
-
-    row = 3
-    for idx, data in reports_data['summary_by_category'].items():
-        ws_category.write(f'A{row}', idx, data_format)
-        ws_category.write(f'B{row}', data['category'], data_format)
-        ws_category.write(f'C{row}', data['total_employees'], data_format)
-        row += 1
-
-    # ورقة 2: ملخص حسب الجنسية  
-    ws_nationality = workbook.add_worksheet('BY NATIONALITY')
-    ws_nationality.write('A1', 'SUMMARY - NATIONALITY', title_format)
-    ws_nationality.write('B1', '', title_format)
-    ws_nationality.write('C1', '', title_format)
-
-    ws_nationality.write('A2', 'No.', header_format)
-    ws_nationality.write('B2', 'NATIONALITY', header_format)
-    ws_nationality.write('C2', 'TOTAL', header_format)
-
-    row = 3
-    for idx, data in reports_data['summary_by_nationality'].items():
-        ws_nationality.write(f'A{row}', idx, data_format)
-        ws_nationality.write(f'B{row}', data['nationality'], data_format)
-        ws_nationality.write(f'C{row}', data['total_employees'], data_format)
-        row += 1
-
-    # ورقة 3: التقرير المفصل (DETAILED)
-    ws_detailed = workbook.add_worksheet('DETAILED REPORT')
-
-    headers = [
-        'Employee Number', 'Name', 'Category', 'Nationality', 'Hire Date',
-        'Basic Salary', 'Monthly Allowances', 'Monthly Gross', 'Annual Cost',
-        'Years of Service', 'Cost Factor', 'Efficiency Ratio'
-    ]
-
-    for col, header in enumerate(headers):
-        ws_detailed.write(0, col, header, header_format)
-
-    row = 1
-    for emp_data in reports_data['detailed_employee_report']:
-        ws_detailed.write(row, 0, emp_data['employee_number'], data_format)
-        ws_detailed.write(row, 1, emp_data['name'], data_format)
-        ws_detailed.write(row, 2, emp_data['category'], data_format)
-        ws_detailed.write(row, 3, emp_data['nationality'], data_format)
-        ws_detailed.write(row, 4, emp_data['hire_date'], data_format)
-        ws_detailed.write(row, 5, emp_data['basic_salary'], number_format)
-        ws_detailed.write(row, 6, emp_data['monthly_allowances'], number_format)
-        ws_detailed.write(row, 7, emp_data['monthly_gross'], number_format)
-        ws_detailed.write(row, 8, emp_data['annual_cost'], number_format)
-        ws_detailed.write(row, 9, emp_data['years_of_service'], data_format)
-        ws_detailed.write(row, 10, emp_data['cost_factor'], number_format)
-        ws_detailed.write(row, 11, emp_data['efficiency_ratio'], number_format)
-        row += 1
-
-    # ورقة 4: تحليل التكاليف
-    ws_cost = workbook.add_worksheet('COST ANALYSIS')
-    cost_data = reports_data['cost_analysis']
-
-    ws_cost.write('A1', 'تحليل التكاليف الشامل', title_format)
-
-    row = 3
-    ws_cost.write(f'A{row}', 'البند', header_format)
-    ws_cost.write(f'B{row}', 'القيمة', header_format)
-    row += 1
-
-    for key, value in cost_data['summary'].items():
-        ws_cost.write(f'A{row}', key.replace('_', ' ').title(), data_format)
-        if isinstance(value, (int, float)):
-            ws_cost.write(f'B{row}', value, number_format)
-        else:
-            ws_cost.write(f'B{row}', value, data_format)
-        row += 1
-
-    # تنسيق عرض الأعمدة
-    for worksheet in [ws_category, ws_nationality, ws_detailed, ws_cost]:
-        worksheet.set_column('A:A', 15)
-        worksheet.set_column('B:Z', 20)
-
-    workbook.close()
-    output.seek(0)
+    from . import spreadsheets
+    content = spreadsheets.advanced_reports_workbook(employees)
 
     # إعداد الاستجابة
     response = HttpResponse(
-        output.read(),
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        content,
+        content_type=spreadsheets.XLSX_CONTENT_TYPE
     )
     response['Content-Disposition'] = f'attachment; filename="تقرير_شامل_مطابق_للاكسل_{datetime.now().strftime("%Y%m%d_%H%M%S")}.xlsx"'
 
@@ -667,65 +497,175 @@ def export_advanced_excel(request):
 
 
 @login_required
-def print_report(request):
-    """طباعة التقرير بشكل احترافي"""
+@replica_reads
+@conditional_report
+def export_columnar(request):
+    """تصدير الموظفين مع أعمدة التكلفة بصيغة Parquet أو Arrow لأدوات BI (?format=parquet|arrow)"""
+    from . import columnar_export
+
+    if not columnar_export.available():
+        return HttpResponse('التصدير العمودي يتطلب تثبيت pyarrow', status=501, content_type='text/plain; charset=utf-8')
+
+    fmt = request.GET.get('format', 'parquet')
+    if fmt not in columnar_export.FORMATS:
+        return HttpResponse('صيغة غير مدعومة', status=400, content_type='text/plain; charset=utf-8')
+
     form = ReportFilterForm(request.GET)
-    employees = Employee.objects.filter(is_active=True)
+    employees = filter_employees(Employee.objects.all(), form)
 
-    # تطبيق المرشحات
-    if form.is_valid():
-        if form.cleaned_data.get('employee_search'):
-            search_term = form.cleaned_data['employee_search']
-            employees = employees.filter(
-                Q(employee_number__icontains=search_term) |
-                Q(name__icontains=search_term)
-            )
+    response = StreamingHttpResponse(
+        columnar_export.stream_employees(employees, fmt),
+        content_type=columnar_export.FORMATS[fmt]['content_type']
+    )
+    extension = columnar_export.FORMATS[fmt]['extension']
+    response['Content-Disposition'] = f'attachment; filename="employees_costs_{datetime.now().strftime("%Y%m%d_%H%M%S")}.{extension}"'
 
-        if form.cleaned_data.get('nationality'):
-            employees = employees.filter(nationality=form.cleaned_data['nationality'])
+    return response
 
-        if form.cleaned_data.get('category'):
-            employees = employees.filter(category=form.cleaned_data['category'])
 
-        if form.cleaned_data.get('date_from'):
-            employees = employees.filter(hire_date__gte=form.cleaned_data['date_from'])
+class _PrintReportTotals:
+    """تجميع إجماليات تقرير الطباعة أثناء المرور على الصفوف"""
+
+    def __init__(self):
+        self.total_employees = 0
+        self.total_monthly_cost = Decimal('0')
+        self.total_annual_cost = Decimal('0')
+        self.total_cost_factor = Decimal('0')
+        self.total_recruitment_cost = Decimal('0')
+
+    def add(self, row):
+        self.total_employees += 1
+        self.total_monthly_cost += row.monthly_gross
+        self.total_annual_cost += row.annual_cost
+        self.total_cost_factor += row.cost_factor
+        self.total_recruitment_cost += row.recruitment_cost
+
+    def as_context(self):
+        # حساب متوسط المعامل ومتوسط تكلفة الاستقدام
+        avg_cost_factor = 0
+        avg_recruitment_cost = 0
+        if self.total_employees > 0:
+            avg_cost_factor = self.total_cost_factor / self.total_employees
+            avg_recruitment_cost = self.total_recruitment_cost / self.total_employees
+
+        return {
+            'total_employees': self.total_employees,
+            'total_monthly_cost': self.total_monthly_cost,
+            'total_annual_cost': self.total_annual_cost,
+            'avg_cost_factor': avg_cost_factor,
+            'avg_recruitment_cost': avg_recruitment_cost,
+        }
 
-        if form.cleaned_data.get('date_to'):
-            employees = employees.filter(hire_date__lte=form.cleaned_data['date_to'])
 
-        if form.cleaned_data.get('is_active'):
-            is_active = form.cleaned_data['is_active'] == 'true'
-            employees = employees.filter(is_active=is_active)
+def _stream_print_report(employees, context):
+    """إرسال تقرير الطباعة: الرأس مرة واحدة ثم الصفوف على دفعات ثم الإجماليات في النهاية"""
+    totals = _PrintReportTotals()
 
-        if form.cleaned_data.get('salary_min'):
-            employees = employees.filter(basic_salary__gte=form.cleaned_data['salary_min'])
+    def rows():
+        for row in iter_report_rows(employees):
+            totals.add(row)
+            yield row
 
-        if form.cleaned_data.get('salary_max'):
-            employees = employees.filter(basic_salary__lte=form.cleaned_data['salary_max'])
+    yield render_template('employees/print_report/head.html', context)
+    yield render_template('employees/print_report/table_start.html', context)
+    yield from render_rows_in_batches('employees/print_report/rows.html', rows(), context, 'employees')
 
-    employees = employees.order_by('employee_number')
+    context = {**context, **totals.as_context()}
+    yield render_template('employees/print_report/table_end.html', context)
+    yield render_template('employees/print_report/summary.html', context)
+    yield render_template('employees/print_report/tail.html', context)
 
-    # حساب الإحصائيات للطباعة
-    total_employees = employees.count()
-    total_monthly_cost = sum(emp.get_monthly_gross_salary() for emp in employees)
-    total_annual_cost = sum(emp.get_annual_total_cost() for emp in employees)
 
-    # حساب متوسط المعامل ومتوسط تكلفة الاستقدام
-    avg_cost_factor = 0
-    avg_recruitment_cost = 0
-    if total_employees > 0:
-        avg_cost_factor = sum(emp.get_cost_factor() for emp in employees) / total_employees
-        avg_recruitment_cost = sum(emp.recruitment_cost for emp in employees) / total_employees
+@login_required
+@replica_reads
+@conditional_report
+def print_report(request):
+    """طباعة التقرير بشكل احترافي"""
+    form = ReportFilterForm(request.GET)
+    employees = filter_employees(Employee.active.all(), form).order_by('employee_number')
 
+    filters = request.GET.dict()
+    filters.pop('stream', None)
     context = {
-        'employees': employees,
-        'total_employees': total_employees,
-        'total_monthly_cost': total_monthly_cost,
-        'total_annual_cost': total_annual_cost,
-        'avg_cost_factor': avg_cost_factor,
-        'avg_recruitment_cost': avg_recruitment_cost,
         'print_date': datetime.now(),
-        'filters': request.GET.dict() if request.GET else {}
+        'filters': filters
     }
 
-    return render(request, 'employees/print_report.html', context)
\ No newline at end of file
+    # العرض الكامل دفعة واحدة (الإجماليات أعلى الجدول) عند طلبه صراحة
+    if request.GET.get('stream') == '0':
+        rows = build_report_rows(employees)
+        totals = _PrintReportTotals()
+        for row in rows:
+            totals.add(row)
+        context.update(totals.as_context())
+        context['employees'] = rows
+        return render(request, 'employees/print_report.html', context)
+
+    return streaming_html_response(_stream_print_report(employees, context))
+
+
+@login_required
+@replica_reads
+@require_http_methods(["GET", "POST"])
+def scenario_analysis(request):
+    """
+    سيناريوهات "ماذا لو" دون تعديل البيانات
+    GET: الفئات والجنسيات وأنواع البدلات المتاحة
+    POST (JSON): {"adjustments": [{"target": "basic_salary", "mode": "percent", "value": 7, "category": "ENGINEER"}, ...]}
+    """
+    snapshot = get_snapshot()
+
+    if request.method == 'GET':
+        return JsonResponse({
+            'employees': len(snapshot),
+            'categories': [c for c in snapshot.categories if c],
+            'nationalities': snapshot.nationalities,
+            'allowance_types': snapshot.allowance_types,
+        })
+
+    try:
+        payload = json.loads(request.body or b'{}')
+        result = snapshot.run(payload.get('adjustments', []))
+    except (ValueError, AttributeError) as e:
+        return JsonResponse({'error': str(e)}, status=400, json_dumps_params={'ensure_ascii': False})
+
+    return JsonResponse(result, json_dumps_params={'ensure_ascii': False})
+
+
+@login_required
+@replica_reads
+@conditional_report
+def workforce_forecast_report(request):
+    """توقع تكلفة القوى العاملة للسنوات القادمة، مع التصدير إلى Excel عند export=xlsx"""
+    form = ForecastForm(request.GET or None)
+    filter_form = ReportFilterForm(request.GET)
+    employees = filter_employees(Employee.active.all(), filter_form)
+
+    options = {'years': 5, 'raise_rate': 3, 'allowance_growth': 0}
+    if form.is_bound and form.is_valid():
+        options = form.cleaned_data
+
+    forecast = workforce_forecast(
+        employees,
+        years=options['years'],
+        raise_rate=float(options['raise_rate']) / 100,
+        allowance_growth=float(options['allowance_growth']) / 100,
+    )
+
+    if request.GET.get('export') == 'xlsx':
+        from . import spreadsheets
+        response = HttpResponse(
+            spreadsheets.forecast_workbook(forecast),
+            content_type=spreadsheets.XLSX_CONTENT_TYPE
+        )
+        response['Content-Disposition'] = f'attachment; filename="توقع_التكلفة_{datetime.now().strftime("%Y%m%d")}.xlsx"'
+        return response
+
+    context = {
+        'form': form if form.is_bound else ForecastForm(),
+        'filter_form': filter_form,
+        'forecast': forecast,
+        'options': options,
+        'filters': request.GET.urlencode(),
+    }
+    return render(request, 'employees/workforce_forecast.html', context)
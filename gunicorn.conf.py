@@ -0,0 +1,59 @@
+"""
+إعدادات Gunicorn لتشغيل التطبيق في بيئة الإنتاج
+
+جميع القيم قابلة للتعديل عبر متغيرات البيئة، مثلاً:
+    GUNICORN_WORKERS=4 GUNICORN_MAX_REQUESTS=500 python serve.py
+"""
+import os
+
+from employee_management.workers import gunicorn_workers
+
+
+def _env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+# ASGI (لتشغيل العروض غير المتزامنة مثل لوحة التحكم دون خيط لكل طلب):
+#     pip install uvicorn-worker
+#     GUNICORN_WORKER_CLASS=uvicorn_worker.UvicornWorker python serve.py
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'sync')
+if 'uvicorn' in worker_class.lower():
+    wsgi_app = 'employee_management.asgi:application'
+else:
+    wsgi_app = 'employee_management.wsgi:application'
+
+# العنوان والمنفذ (نفس منفذ run_server.py خلف nginx)
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+
+# عدد العمليات: (2 × عدد الأنوية) + 1
+# مع أكثر من عملية يلزم تخزين مؤقت مشترك (CACHE_BACKEND)، انظر accounts.checks
+workers = gunicorn_workers()
+threads = _env_int('GUNICORN_THREADS', 1)
+
+# تحميل التطبيق مرة واحدة في العملية الرئيسية قبل إنشاء العمليات الفرعية
+# حتى تتشارك العمليات الشيفرة المحملة في الذاكرة (copy-on-write)
+preload_app = True
+
+# إعادة تشغيل كل عملية بعد عدد من الطلبات للحد من تضخم الذاكرة بعد التصديرات الكبيرة
+# jitter يمنع إعادة تشغيل جميع العمليات في نفس اللحظة
+max_requests = _env_int('GUNICORN_MAX_REQUESTS', 1000)
+max_requests_jitter = _env_int('GUNICORN_MAX_REQUESTS_JITTER', max_requests // 10)
+
+# التصديرات الكبيرة قد تستغرق وقتاً أطول من المهلة الافتراضية (30 ثانية)
+timeout = _env_int('GUNICORN_TIMEOUT', 300)
+# مهلة إنهاء الطلبات الجارية عند إعادة التحميل (HUP) أو الإيقاف (TERM)
+graceful_timeout = _env_int('GUNICORN_GRACEFUL_TIMEOUT', 60)
+keepalive = _env_int('GUNICORN_KEEPALIVE', 5)
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-')
+errorlog = os.environ.get('GUNICORN_ERROR_LOG', '-')
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+proc_name = 'employee_management'
+
+
+def post_fork(server, worker):
+    # عدم مشاركة أي اتصال بقاعدة البيانات فتح في العملية الرئيسية أثناء التحميل المسبق
+    from django.db import connections
+    connections.close_all()
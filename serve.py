@@ -0,0 +1,31 @@
+#!/usr/bin/env python
+"""
+تشغيل الخادم في بيئة الإنتاج باستخدام Gunicorn بعدة عمليات
+الإعدادات في gunicorn.conf.py
+
+إعادة التحميل دون انقطاع: kill -HUP <pid العملية الرئيسية>
+"""
+import os
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent
+
+if __name__ == "__main__":
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'employee_management.settings')
+    os.chdir(BASE_DIR)
+
+    try:
+        from gunicorn.app.wsgiapp import run
+    except ImportError as exc:
+        raise ImportError(
+            "Couldn't import gunicorn. Install it with 'pip install gunicorn' "
+            "or use run_server.py for development."
+        ) from exc
+
+    sys.argv = [
+        'gunicorn',
+        '--config', str(BASE_DIR / 'gunicorn.conf.py'),
+        *sys.argv[1:],
+    ]
+    sys.exit(run())